@@ -62,7 +62,7 @@ def get_search_page(search_word=None, results=None, use_stoplist=False, limit=20
     html = """
     <main class="main-content">
         <h2>Search in Dictionary</h2>
-        <p>Enter a word to search in the dictionary and posting files.</p>
+        <p>Enter a word to search in the dictionary and posting files. Combine words with AND, OR, NOT and parentheses (words without an operator are joined with OR).</p>
         
         <form method="POST" action="search.py" class="search-form">
             <div class="form-group">
@@ -111,21 +111,18 @@ def get_search_page(search_word=None, results=None, use_stoplist=False, limit=20
             dict_type = "filtered (with stoplist)" if use_stoplist else "full (without stoplist)"
             html += f"""
             <div class="success-box">
-                <p><strong>Found '{escape(search_word)}' in {len(results)} document(s) using {dict_type} dictionary:</strong></p>
+                <p><strong>Top {len(results)} document(s) for '{escape(search_word)}' using {dict_type} dictionary (ranked by BM25, limit: {limit} results):</strong></p>
                 <ol class="results-list">
 """
-            limited_results = results[:limit]
-            for i, doc in enumerate(limited_results, 1):
+            # Results are already the top `limit` documents, best first
+            for doc, score in results:
                 # Each result links to the corresponding HTML file in data/html_sources
                 safe_doc = escape(doc)
                 html += (
                     f'<li><a href="../data/html_sources/{safe_doc}" '
-                    f'target="_blank">{safe_doc}</a></li>'
+                    f'target="_blank">{safe_doc}</a> <em>({score:.3f})</em></li>'
                 )
             
-            if len(results) > limit:
-                html += f"<li><em>... and {len(results) - limit} more document(s) (limit: {limit} results)</em></li>"
-            
             html += """
                 </ol>
             </div>
@@ -177,14 +174,14 @@ def main():
                 
                 start_time = time.time()
                 for _ in range(iterations):
-                    main_module.search_word(search_word, output_dir, use_stoplist)
+                    main_module.search_ranked(search_word, output_dir, use_stoplist, k=limit)
                 end_time = time.time()
                 
                 total_time = end_time - start_time
                 avg_time = total_time / iterations if iterations > 0 else 0.0
                 
                 # Ejecutar una vez más para mostrar los documentos encontrados
-                results = main_module.search_word(search_word, output_dir, use_stoplist)
+                results = main_module.search_ranked(search_word, output_dir, use_stoplist, k=limit)
                 
                 stress_info = {
                     "iterations": iterations,
@@ -193,8 +190,8 @@ def main():
                     "docs_found": len(results) if results else 0,
                 }
             else:
-                # Búsqueda normal
-                results = main_module.search_word(search_word, output_dir, use_stoplist)
+                # Búsqueda normal: el límite de resultados es el k del ranking
+                results = main_module.search_ranked(search_word, output_dir, use_stoplist, k=limit)
         except Exception as e:
             html += f"""
             <main class="main-content">
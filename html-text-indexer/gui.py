@@ -743,7 +743,7 @@ Changes will be applied when you run activities."""
         # Description
         desc_label = ctk.CTkLabel(
             search_scroll,
-            text="Enter a word to search in the dictionary and posting files. The word will be converted to lowercase to match the dictionary format.",
+            text="Enter a word to search in the dictionary and posting files. The word will be converted to lowercase to match the dictionary format. Combine words with AND, OR, NOT and parentheses (words without an operator are joined with OR).",
             font=ctk.CTkFont(size=13),
             text_color="gray",
             justify="left",
@@ -908,14 +908,10 @@ Changes will be applied when you run activities."""
         
         # Perform search
         try:
-            documents = main_module.search_word(word, str(self.results_path), use_stoplist)
-            
-            # Get the results limit
+            # Get the results limit: it is the k of the ranked search
             limit = int(self.results_limit_var.get())
             
-            # Apply limit to results
-            total_documents = len(documents)
-            limited_documents = documents[:limit]
+            documents = main_module.search_ranked(word, str(self.results_path), use_stoplist, k=limit)
             
             # Clear previous results
             self.results_textbox.configure(state='normal')
@@ -924,23 +920,14 @@ Changes will be applied when you run activities."""
             if documents:
                 # Update header
                 dict_type = "filtered (with stoplist)" if use_stoplist else "full (without stoplist)"
-                if total_documents > limit:
-                    self.results_header.configure(
-                        text=f"Found '{word}' in {total_documents} document(s) using {dict_type} dictionary (showing first {limit}):"
-                    )
-                else:
-                    self.results_header.configure(
-                        text=f"Found '{word}' in {total_documents} document(s) using {dict_type} dictionary:"
-                    )
+                self.results_header.configure(
+                    text=f"Top {len(documents)} document(s) for '{word}' using {dict_type} dictionary (ranked by BM25, limit: {limit}):"
+                )
                 
                 # Add results with better formatting
                 results_text = ""
-                for i, doc in enumerate(limited_documents, 1):
-                    results_text += f"{i}. {doc}\n"
-                
-                # Add note if results were limited
-                if total_documents > limit:
-                    results_text += f"\n... and {total_documents - limit} more document(s) (limit: {limit} results)\n"
+                for i, (doc, score) in enumerate(documents, 1):
+                    results_text += f"{i}. {doc}  ({score:.3f})\n"
                 
                 # Insert results
                 self.results_textbox.insert("1.0", results_text)
@@ -948,12 +935,10 @@ Changes will be applied when you run activities."""
                 self.results_textbox.update_idletasks()  # Force update
                 
                 # Also log the documents found in console
-                self.log_message(f"Search for '{word}': Found in {total_documents} document(s) (showing {len(limited_documents)})")
+                self.log_message(f"Search for '{word}': top {len(documents)} document(s) (limit: {limit})")
                 self.log_message("Documents found:")
-                for i, doc in enumerate(limited_documents, 1):
-                    self.log_message(f"  {i}. {doc}")
-                if total_documents > limit:
-                    self.log_message(f"  ... and {total_documents - limit} more document(s) (limit: {limit} results)")
+                for i, (doc, score) in enumerate(documents, 1):
+                    self.log_message(f"  {i}. {doc} ({score:.3f})")
             else:
                 self.results_header.configure(
                     text=f"Word '{word}' not found in the dictionary"
@@ -3,30 +3,207 @@ import time
 import re
 import sys
 import argparse
+import mmap
+import struct
+import heapq
+import math
+import bisect
+import hashlib
+import json
+import tempfile
 from pathlib import Path
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, lru_cache
+from itertools import accumulate, groupby, repeat
+from operator import itemgetter
+from array import array
 import html
+import codecs
+import io
+from abc import ABC, abstractmethod
 
 # Default folder for backward compatibility
 # Use relative path based on script location
 _script_dir = Path(__file__).parent
 FOLDER = str(_script_dir / "data" / "html_sources")
 
-def open_file(file_path):
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-   
-    for encoding in encodings:
+# Número de procesos para las etapas por archivo (actividades 1, 2, 3, 5 y 8).
+# 1 = ejecución secuencial; se puede cambiar con --workers N.
+WORKERS = 1
+
+def run_parallel(func, *iterables, workers=None, chunksize=None, max_pending=None):
+    """
+    Aplica func a cada elemento (como map) usando un ProcessPoolExecutor.
+
+    Los resultados se devuelven en el mismo orden que la entrada y a medida
+    que terminan, para que las actividades puedan seguir imprimiendo el
+    tiempo de cada archivo. func debe ser una función de nivel de módulo
+    (o un functools.partial de una) para poder enviarse a los procesos.
+
+    Args:
+        workers: Número de procesos; None usa WORKERS. Con 1 no se crean procesos.
+        chunksize: Tareas enviadas a cada proceso por lote; None lo calcula
+                   para repartir unos 4 lotes por proceso.
+        max_pending: Si se indica, nunca hay más de max_pending tareas
+                     enviadas cuyo resultado no se consumió (los resultados
+                     terminados no se acumulan mientras el llamador trabaja);
+                     se ignora chunksize.
+    """
+    workers = WORKERS if workers is None else workers
+    items = list(zip(*iterables))
+
+    if workers <= 1 or len(items) <= 1:
+        for args in items:
+            yield func(*args)
+        return
+
+    if max_pending is not None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for args in items:
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(func, *args))
+            while pending:
+                yield pending.popleft().result()
+        return
+
+    if chunksize is None:
+        chunksize = max(1, len(items) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(func, *zip(*items), chunksize=chunksize)
+
+class DocumentError(Exception):
+    """Error al leer un documento del corpus."""
+
+class DocumentOpenError(DocumentError):
+    """El archivo no se pudo abrir o leer."""
+
+class DocumentDecodeError(DocumentError):
+    """El contenido no es válido en la codificación indicada por su BOM."""
+
+class EncodingRestart(Exception):
+    """
+    Un documento que se leía por bloques no es válido en la codificación
+    elegida y ya se generó texto que no es ASCII: hay que leerlo de nuevo
+    con las codificaciones de encodings (ver with_encoding_restart).
+    """
+    
+    def __init__(self, encodings):
+        super().__init__(encodings)
+        self.encodings = encodings
+
+# Marcas de orden de bytes; UTF-32 LE va antes que UTF-16 LE porque empieza igual
+BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+META_CHARSET_RE = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+# Bytes del inicio del documento donde se busca <meta charset>
+META_CHARSET_SCAN_BYTES = 4096
+
+# Codificación cuando el documento no es UTF-8 y no declara otra
+FALLBACK_ENCODING = 'latin-1'
+
+def bom_encoding(head):
+    """Codificación indicada por el BOM al inicio de head, o None."""
+    for bom, encoding in BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+def declared_encoding(head):
+    """
+    Codificación declarada con <meta charset> en head, o None si no hay o no
+    se reconoce. UTF-8 no se devuelve (ya se comprobó) y UTF-16/32 se ignoran,
+    porque un documento que se puede leer como bytes ASCII no está en ellas.
+    """
+    match = META_CHARSET_RE.search(head)
+    if not match:
+        return None
+    try:
+        encoding = codecs.lookup(match.group(1).decode('ascii')).name
+    except LookupError:
+        return None
+    if encoding.startswith(('utf-8', 'utf-16', 'utf-32')):
+        return None
+    return encoding
+
+def decode_document(data, name):
+    """
+    Decodifica el contenido de un documento en una sola pasada cuando es posible.
+
+    Orden: BOM, UTF-8 válido, codificación de <meta charset> y FALLBACK_ENCODING.
+    Los saltos de línea se normalizan a "\n" como al leer en modo texto.
+
+    Raises:
+        DocumentDecodeError: si el contenido no corresponde a su BOM
+    """
+    encoding = bom_encoding(data[:4])
+    if encoding:
         try:
-            with open(file_path, 'r', encoding=encoding) as file:
-                return file.read()
+            text = str(data, encoding)
+        except UnicodeDecodeError as e:
+            raise DocumentDecodeError(f"Failed to decode {name} as {encoding}: {e}") from e
+    else:
+        try:
+            text = str(data, 'utf-8')
         except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            return f"Failed to open {file_path.name}: {e}"
-   
-    return f"Failed to decode {file_path.name} with any encoding"
+            declared = declared_encoding(data[:META_CHARSET_SCAN_BYTES])
+            text = None
+            if declared:
+                try:
+                    text = str(data, declared)
+                except UnicodeDecodeError:
+                    pass
+            if text is None:
+                text = str(data, FALLBACK_ENCODING)
+    
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def open_file(file_path, use_mmap=False):
+    """
+    Lee un documento una sola vez y lo decodifica con decode_document.
+
+    Args:
+        use_mmap: Si True mapea el archivo en memoria en lugar de copiarlo
+                  a un objeto bytes antes de decodificarlo
 
-def actividad1():
+    Raises:
+        DocumentOpenError: si el archivo no se puede leer
+        DocumentDecodeError: si el contenido no corresponde a su BOM
+    """
+    file_path = Path(file_path)
+    try:
+        with open(file_path, 'rb') as file:
+            if use_mmap and os.fstat(file.fileno()).st_size > 0:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return decode_document(data, file_path.name)
+            data = file.read()
+    except OSError as e:
+        raise DocumentOpenError(f"Failed to open {file_path.name}: {e}") from e
+    
+    return decode_document(data, file_path.name)
+
+def _open_file_timed(html_file):
+    """Tarea de la actividad 1: abre un archivo y devuelve (tiempo, tamaño, error)."""
+    file_start = time.time()
+    try:
+        open_file(html_file)
+    except DocumentError as e:
+        return time.time() - file_start, 0, str(e)
+    return time.time() - file_start, html_file.stat().st_size, None
+
+def actividad1(workers=None):
     print("=== EJECUTANDO ACTIVIDAD 1: ABRIR ARCHIVOS HTML ===")
     
     folder_path = Path(FOLDER)
@@ -54,23 +231,17 @@ def actividad1():
     log_lines.append("Archivos procesados:")
     log_lines.append("-" * 60)
     
-    for html_file in html_files:
-        file_start = time.time()
-        
-        content = open_file(html_file)
-        
-        file_end = time.time()
-        opening_time = file_end - file_start
-        
-        if not content.startswith("Failed"):
+    results = run_parallel(_open_file_timed, html_files, workers=workers)
+    
+    for html_file, (opening_time, file_size, error) in zip(html_files, results):
+        if error is None:
             successful_files += 1
             total_opening_time += opening_time
-            file_size = html_file.stat().st_size
             log_lines.append(f"{html_file.name:<25} {opening_time:.6f}s  {file_size:>8} bytes")
             print(f"Abierto: {html_file.name} en {opening_time:.6f} segundos")
         else:
-            log_lines.append(f"{html_file.name:<25} ERROR: {content}")
-            print(f"Error: {html_file.name} - {content}")
+            log_lines.append(f"{html_file.name:<25} ERROR: {error}")
+            print(f"Error: {html_file.name} - {error}")
     
     program_end = time.time()
     total_program_time = program_end - program_start
@@ -95,25 +266,270 @@ def actividad1():
     print(f"Archivos procesados: {successful_files}/{len(html_files)}")
     print(f"Tiempo total: {total_program_time:.6f} segundos")
 
-def remove_html_tags(filename):
-    file_path = Path(FOLDER) / filename
+# Tamaño (en caracteres) de los bloques que se leen y se pasan al extractor HTML
+HTML_CHUNK_SIZE = 64 * 1024
+
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Una referencia de carácter (&nombre; o &#número;) puede continuar en el siguiente bloque
+# mientras el texto tras el último '&' sea corto y no tenga un carácter que la termine
+HTML_OPEN_CHARREF_RE = re.compile(r'&(?:#[xX]?[0-9a-fA-F]*|[^\t\n\f <&#;]*)$')
+HTML_CHARREF_MAX_LENGTH = 40
+
+def strip_tags_stream(chunks):
+    """
+    Quita las etiquetas (<...>) de un texto que llega por bloques.
+
+    Equivale a re.sub(r'<[^>]+>', '', ''.join(chunks)): lo que sigue al
+    primer '<' posterior al último '>' de un bloque puede ser una etiqueta
+    incompleta, así que se conserva y se procesa con el siguiente bloque.
+    """
+    pending = ''
+    for chunk in chunks:
+        text = pending + chunk
+        open_tag = text.find('<', text.rfind('>') + 1)
+        if open_tag == -1:
+            pending = ''
+        else:
+            text, pending = text[:open_tag], text[open_tag:]
+        if text:
+            yield HTML_TAG_RE.sub('', text)
     
-    if not file_path.exists():
-        print(f"El archivo {filename} no existe en {FOLDER}")
-        return 0
+    if pending:
+        yield HTML_TAG_RE.sub('', pending)
+
+def unescape_stream(pieces):
+    """
+    Aplica html.unescape a un texto que llega por bloques, guardando para
+    el siguiente bloque una referencia de carácter que quedó cortada.
+    """
+    pending = ''
+    for piece in pieces:
+        text = pending + piece
+        pending = ''
+        
+        amp = text.rfind('&')
+        if amp != -1 and len(text) - amp <= HTML_CHARREF_MAX_LENGTH and HTML_OPEN_CHARREF_RE.match(text, amp):
+            text, pending = text[:amp], text[amp:]
+        if text:
+            yield html.unescape(text)
+    
+    if pending:
+        yield html.unescape(pending)
+
+@lru_cache(maxsize=None)
+def ascii_compatible(encoding):
+    """True si encoding decodifica los bytes ASCII como ASCII."""
+    return bytes(range(128)).decode(encoding, errors='replace') == ''.join(map(chr, range(128)))
+
+def _newline_decoder(encoding):
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+
+def iter_decoded_text(file_path, chunk_size=HTML_CHUNK_SIZE, encodings=None):
+    """
+    Lee file_path una sola vez por bloques de chunk_size bytes y genera su
+    texto con el mismo criterio que decode_document (BOM, UTF-8 válido,
+    <meta charset> y FALLBACK_ENCODING) y los saltos de línea normalizados.
+
+    Se decodifica con la primera codificación candidata mientras sea
+    válida. Si falla y todo el texto generado hasta ahí era ASCII, se sigue
+    desde ese bloque con la siguiente, lo que da el mismo texto que haberla
+    usado desde el principio; si no, se lanza EncodingRestart con las
+    candidatas que quedan.
+
+    Args:
+        encodings: Codificaciones candidatas en orden; None para elegirlas
+                   con el BOM y el <meta charset> del inicio del archivo
+
+    Raises:
+        DocumentOpenError: si el archivo no se puede leer
+        DocumentDecodeError: si el contenido no corresponde a su BOM
+        EncodingRestart: si hay que volver a leer el archivo
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            chunk = f.read(max(chunk_size, META_CHARSET_SCAN_BYTES))
+            if encodings is None:
+                encoding = bom_encoding(chunk[:4])
+                if encoding:
+                    encodings = (encoding,)
+                else:
+                    declared = declared_encoding(chunk[:META_CHARSET_SCAN_BYTES])
+                    encodings = ('utf-8',) + ((declared,) if declared else ()) + (FALLBACK_ENCODING,)
+            
+            index = 0
+            decoder = _newline_decoder(encodings[0])
+            ascii_only = True
+            while True:
+                try:
+                    text = decoder.decode(chunk, final=not chunk)
+                except UnicodeDecodeError as e:
+                    if index + 1 == len(encodings):
+                        raise DocumentDecodeError(
+                            f"Failed to decode {Path(file_path).name} as {encodings[index]}: {e}"
+                        ) from e
+                    index += 1
+                    if not (ascii_only and ascii_compatible(encodings[index])):
+                        raise EncodingRestart(encodings[index:]) from e
+                    # Everything so far was ASCII: go on from the bytes the failed
+                    # decoder had not consumed, keeping a pending '\r'
+                    pending, flag = decoder.getstate()
+                    decoder = _newline_decoder(encodings[index])
+                    decoder.setstate((b'', flag & 1))
+                    chunk = pending + chunk
+                    continue
+                
+                if text:
+                    ascii_only = ascii_only and text.isascii()
+                    yield text
+                if not chunk:
+                    return
+                chunk = f.read(chunk_size)
+    except OSError as e:
+        raise DocumentOpenError(f"Failed to open {Path(file_path).name}: {e}") from e
+
+def with_encoding_restart(process):
+    """
+    Devuelve process(encodings) con encodings=None y, si lanza
+    EncodingRestart, lo repite con las codificaciones que quedan. Solo se
+    vuelve a leer un documento cuando no es UTF-8 válido y ya se había
+    generado texto no ASCII.
+    """
+    encodings = None
+    while True:
+        try:
+            return process(encodings)
+        except EncodingRestart as restart:
+            encodings = restart.encodings
+
+def iter_html_text(file_path, chunk_size=HTML_CHUNK_SIZE, unescape=True, encodings=None):
+    """
+    Lee un archivo HTML por bloques de chunk_size bytes (iter_decoded_text)
+    y genera sus fragmentos de texto sin etiquetas (y sin entidades si
+    unescape=True), sin guardar nunca el documento completo en memoria.
+
+    Raises:
+        DocumentError: si el archivo no se puede leer o decodificar
+        EncodingRestart: ver iter_decoded_text
+    """
+    fragments = strip_tags_stream(iter_decoded_text(file_path, chunk_size, encodings))
+    if unescape:
+        fragments = unescape_stream(fragments)
+    return fragments
+
+def iter_clean_text(fragments):
+    """
+    Une fragmentos de texto colapsando cada secuencia de espacios en blanco
+    en un solo espacio (sin espacios al inicio ni al final), bloque a bloque.
+    """
+    started = False
+    pending_space = False
     
-    start_time = time.time()
+    for fragment in fragments:
+        collapsed = re.sub(r'\s+', ' ', fragment)
+        if not collapsed:
+            continue
+        
+        if collapsed[0] == ' ':
+            pending_space = True
+        core = collapsed.strip(' ')
+        if core:
+            yield (' ' + core) if (pending_space and started) else core
+            started = True
+            pending_space = False
+        if collapsed[-1] == ' ':
+            pending_space = True
+
+def whitespace_blocks(fragments, chunk_size):
+    """
+    Agrupa fragmentos de texto en bloques de unos chunk_size caracteres que
+    terminan en un espacio en blanco.
+
+    Ningún token contiene espacios, así que tokenizar cada bloque por
+    separado da los mismos tokens que tokenizar el texto completo.
+    """
+    buffer = []
+    buffered = 0
+    
+    for fragment in fragments:
+        buffer.append(fragment)
+        buffered += len(fragment)
+        if buffered < chunk_size:
+            continue
+        
+        text = ''.join(buffer)
+        cut = max(text.rfind(' '), text.rfind('\n'), text.rfind('\t'), text.rfind('\r'))
+        if cut < 0:
+            continue
+        
+        yield text[:cut]
+        buffer = [text[cut:]]
+        buffered = len(text) - cut
+    
+    yield ''.join(buffer)
+
+def iter_html_blocks(file_path, chunk_size=HTML_CHUNK_SIZE, unescape=True, encodings=None):
+    """Texto de iter_html_text agrupado con whitespace_blocks."""
+    return whitespace_blocks(iter_html_text(file_path, chunk_size, unescape, encodings), chunk_size)
+
+def iter_html_words(file_path, chunk_size=HTML_CHUNK_SIZE, unescape=True, encodings=None):
+    """
+    Genera uno a uno los tokens de un archivo HTML (los mismos que process_words).
+
+    Raises:
+        EncodingRestart: ver iter_decoded_text
+    """
+    for block in iter_html_blocks(file_path, chunk_size, unescape, encodings):
+        yield from iter_tokens(block)
+
+def html_token_positions(file_path, chunk_size=HTML_CHUNK_SIZE, unescape=True):
+    """
+    Posiciones de cada token en un archivo HTML: {token: [posición, ...]}.
+
+    La posición es el número de orden del token dentro del documento
+    (0, 1, 2, ...), contando solo los tokens que acepta TOKEN_RE.
+    """
+    def collect(encodings):
+        positions = {}
+        for position, token in enumerate(iter_html_words(file_path, chunk_size, unescape, encodings)):
+            token_positions = positions.get(token)
+            if token_positions is None:
+                positions[token] = [position]
+            else:
+                token_positions.append(position)
+        return positions
     
-    content = open_file(file_path)
+    return with_encoding_restart(collect)
+
+def count_html_words(file_path, counter=None, chunk_size=HTML_CHUNK_SIZE, unescape=True):
+    """
+    Cuenta los tokens de un archivo HTML bloque a bloque; devuelve el Counter.
+
+    Raises:
+        DocumentError: si el archivo no se puede leer o decodificar
+    """
+    def count(encodings):
+        document_counter = Counter()
+        for block in iter_html_blocks(file_path, chunk_size, unescape, encodings):
+            count_tokens(block, document_counter)
+        return document_counter
+    
+    # Counted apart so that a restart does not leave partial counts in counter
+    document_counter = with_encoding_restart(count)
+    if counter is None:
+        return document_counter
+    counter.update(document_counter)
+    return counter
+
+def remove_html_tags(filename, folder=None):
+    folder = FOLDER if folder is None else folder
+    file_path = Path(folder) / filename
     
-    if content.startswith("Failed"):
-        print(f"Error al leer {filename}: {content}")
+    if not file_path.exists():
+        print(f"El archivo {filename} no existe en {folder}")
         return 0
     
-    clean_content = re.sub(r'<[^>]+>', '', content)
-    clean_content = html.unescape(clean_content)
-    clean_content = re.sub(r'\s+', ' ', clean_content)
-    clean_content = clean_content.strip()
+    start_time = time.time()
     
     output_folder = Path('data/extracted_text')
     output_folder.mkdir(exist_ok=True)
@@ -121,15 +537,22 @@ def remove_html_tags(filename):
     clean_filename = file_path.stem + '_clean.txt'
     output_path = output_folder / clean_filename
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(clean_content)
+    def write_clean_text(encodings):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.writelines(iter_clean_text(iter_html_text(file_path, encodings=encodings)))
+    
+    try:
+        with_encoding_restart(write_clean_text)
+    except DocumentError as e:
+        print(f"Error al leer {filename}: {e}")
+        return 0
     
     end_time = time.time()
     processing_time = end_time - start_time
     
     return processing_time
 
-def actividad2():
+def actividad2(workers=None):
     print("=== EJECUTANDO ACTIVIDAD 2: ELIMINAR ETIQUETAS HTML ===")
     
     folder_path = Path(FOLDER)
@@ -157,9 +580,11 @@ def actividad2():
     log_lines.append("Archivos procesados:")
     log_lines.append("-" * 60)
     
-    for html_file in html_files:
-        processing_time = remove_html_tags(html_file.name)
-        
+    # FOLDER se pasa explícitamente porque los procesos hijos no ven cambios al global
+    results = run_parallel(partial(remove_html_tags, folder=FOLDER),
+                           [html_file.name for html_file in html_files], workers=workers)
+    
+    for html_file, processing_time in zip(html_files, results):
         if processing_time > 0:
             successful_files += 1
             total_processing_time += processing_time
@@ -194,36 +619,43 @@ def actividad2():
     print(f"Archivos procesados: {successful_files}/{len(html_files)}")
     print(f"Tiempo total: {total_program_time:.6f} segundos")
 
+# Un token empieza con letra, termina en letra o dígito y puede tener dígitos y
+# guiones en medio. Esto ya cumple las reglas originales (sin guiones en los
+# extremos, al menos 2 caracteres y no solo dígitos); la alternativa de una sola
+# letra que tenía el patrón siempre se descartaba y no cambia las demás coincidencias.
+TOKEN_RE = re.compile(r'\b[a-záéíóúüñç][a-záéíóúüñç0-9\-]*[a-záéíóúüñç0-9]\b')
+
+def iter_tokens(text):
+    """Genera uno a uno los tokens de text (los mismos que process_words)."""
+    for match in TOKEN_RE.finditer(text.lower()):
+        yield match.group()
+
+def count_tokens(text, counter=None):
+    """Suma a counter los tokens de text y lo devuelve."""
+    if counter is None:
+        counter = Counter()
+    counter.update(TOKEN_RE.findall(text.lower()))
+    return counter
+
 def process_words(text):
-    text = text.lower()
-    word_pattern = r'\b[a-záéíóúüñç][a-záéíóúüñç0-9\-]*[a-záéíóúüñç0-9]\b|\b[a-záéíóúüñç]\b'
-    words = re.findall(word_pattern, text)
-    
-    cleaned_words = []
-    for word in words:
-        word = word.strip('-')
-        if len(word) >= 2 and not word.isdigit():
-            cleaned_words.append(word)
-    
-    return cleaned_words
+    return TOKEN_RE.findall(text.lower())
 
 def extract_and_sort_words(clean_filename):
     start_time = time.time()
     
-    clean_file_path = Path('data/extracted_text') / clean_filenamepp
+    clean_file_path = Path('data/extracted_text') / clean_filename
     
     if not clean_file_path.exists():
         print(f"El archivo limpio {clean_filename} no existe")
         return 0, 0
     
-    content = open_file(clean_file_path)
-    
-    if content.startswith("Failed"):
-        print(f"Error al leer {clean_filename}: {content}")
+    try:
+        content = open_file(clean_file_path)
+    except DocumentError as e:
+        print(f"Error al leer {clean_filename}: {e}")
         return 0, 0
     
-    words = process_words(content)
-    word_counter = Counter(words)
+    word_counter = count_tokens(content)
     sorted_words = sorted(word_counter.items())
     
     words_folder = Path('data/sorted_words')
@@ -248,7 +680,7 @@ def extract_and_sort_words(clean_filename):
     
     return processing_time, len(sorted_words)
 
-def actividad3():
+def actividad3(workers=None):
     print("=== EJECUTANDO ACTIVIDAD 3: PROCESAMIENTO DE PALABRAS ===")
     
     clean_folder = Path('data/extracted_text')
@@ -276,9 +708,10 @@ def actividad3():
     log_lines.append("Archivos procesados para extracción de palabras:")
     log_lines.append("-" * 70)
     
-    for clean_file in clean_files:
-        processing_time, unique_words = extract_and_sort_words(clean_file.name)
-        
+    results = run_parallel(extract_and_sort_words, [clean_file.name for clean_file in clean_files],
+                           workers=workers)
+    
+    for clean_file, (processing_time, unique_words) in zip(clean_files, results):
         if processing_time > 0:
             successful_files += 1
             total_words_processing_time += processing_time
@@ -318,26 +751,33 @@ def actividad3():
     print(f"Total palabras únicas: {total_unique_words}")
     print(f"Tiempo total: {total_program_time:.6f} segundos")
 
+def tokenize_document(input_file):
+    """
+    Tokenize a single HTML file in memory.
+
+    Returns:
+        (Counter de tokens o None si no se pudo leer, tiempo en segundos)
+    """
+    start_time = time.time()
+    
+    # Extract words while streaming the HTML text
+    try:
+        word_counter = count_html_words(input_file)
+    except DocumentError as e:
+        print(f"Error al leer {input_file}: {e}")
+        return None, 0
+    
+    return word_counter, time.time() - start_time
+
 def tokenize_file(input_file, output_file):
     """Tokenize a single HTML file and save the result."""
     start_time = time.time()
     
-    content = open_file(input_file)
+    word_counter, _ = tokenize_document(input_file)
     
-    if content.startswith("Failed"):
-        print(f"Error al leer {input_file}: {content}")
+    if word_counter is None:
         return 0, 0
     
-    # Remove HTML tags
-    clean_content = re.sub(r'<[^>]+>', '', content)
-    clean_content = html.unescape(clean_content)
-    clean_content = re.sub(r'\s+', ' ', clean_content)
-    clean_content = clean_content.strip()
-    
-    # Extract words
-    words = process_words(clean_content)
-    word_counter = Counter(words)
-    
     # Save tokenized file (sorted alphabetically, case-insensitive)
     with open(output_file, 'w', encoding='utf-8') as f:
         for word, count in sorted(word_counter.items(), key=lambda x: x[0].lower()):
@@ -348,9 +788,335 @@ def tokenize_file(input_file, output_file):
     
     return processing_time, len(word_counter)
 
-def actividad5(input_dir, output_dir):
-    """Actividad 5: Command-line tokenizer for specific files."""
-    print("=== EJECUTANDO ACTIVIDAD 5: TOKENIZADOR DE ARCHIVOS ESPECÍFICOS ===")
+# Archivos que procesan las actividades 5 y 6 fuera del modo corpus
+ACTIVIDAD5_FILES = ['simple.html', 'medium.html', 'hard.html', '002.html']
+
+def discover_html_files(input_dir, pattern='*.html', recursive=False):
+    """
+    Busca los archivos a tokenizar dentro de input_dir.
+
+    Args:
+        pattern: Filtro glob aplicado al nombre de archivo (por ejemplo "*.html" o "0*.htm*")
+        recursive: Si True también busca en los subdirectorios
+
+    Returns:
+        Lista ordenada de rutas relativas a input_dir (con "/" como separador)
+    """
+    input_path = Path(input_dir)
+    matches = input_path.rglob(pattern) if recursive else input_path.glob(pattern)
+    return sorted(path.relative_to(input_path).as_posix() for path in matches if path.is_file())
+
+TOKEN_FILE_SUFFIX = "_tokens.txt"
+
+def token_file_name(filename):
+    """
+    Nombre del archivo en results/tokenized/ para un documento.
+
+    Se conserva la extensión y el separador de carpetas se escapa como en
+    las URL ("%" -> "%25", "/" -> "%2F"), así que dos documentos distintos
+    nunca comparten archivo y token_file_document recupera el nombre
+    ("a/x.html" -> "a%2Fx.html_tokens.txt").
+    """
+    escaped = Path(filename).as_posix().replace('%', '%25').replace('/', '%2F')
+    return escaped + TOKEN_FILE_SUFFIX
+
+def token_file_document(token_file):
+    """
+    Documento (ruta relativa a input_dir) de un archivo *_tokens.txt.
+
+    Es la inversa de token_file_name. Los archivos de versiones anteriores
+    no guardaban la extensión ("x_tokens.txt"); para ellos se supone ".html".
+    """
+    name = Path(token_file).name[:-len(TOKEN_FILE_SUFFIX)]
+    if '.' not in name:
+        return name + '.html'
+    return re.sub(r'%(25|2F)', lambda m: '%' if m.group(1) == '25' else '/', name)
+
+def legacy_token_file_name(filename):
+    """
+    Nombre que le daban al archivo tokenizado las versiones anteriores
+    ("x.html" -> "x_tokens.txt"), o None si ese nombre no es de este documento.
+    """
+    name = f"{Path(filename).stem}{TOKEN_FILE_SUFFIX}"
+    if token_file_document(name) != filename or name == token_file_name(filename):
+        return None
+    return name
+
+def list_token_files(token_dir):
+    """
+    Archivos *_tokens.txt de token_dir ordenados por nombre, un archivo por
+    documento: si un documento tiene el nombre actual y el de versiones
+    anteriores, se ignora el anterior.
+    """
+    token_files = sorted(Path(token_dir).glob(f"*{TOKEN_FILE_SUFFIX}"))
+    names = {token_file.name for token_file in token_files}
+    return [token_file for token_file in token_files
+            if '.' in token_file.name[:-len(TOKEN_FILE_SUFFIX)]
+            or token_file_name(token_file_document(token_file)) not in names]
+
+# Bytes de líneas que read_token_file lee de una vez
+TOKEN_READ_CHUNK = 1 << 15
+
+def read_token_file(token_file, label, read_times=None):
+    """
+    Lee un archivo *_tokens.txt ("token frecuencia" por línea).
+
+    Las líneas mal formadas se ignoran. Si se indica read_times, acumula en
+    read_times[token_file] el tiempo de lectura del archivo.
+
+    Yields:
+        (token, label, frecuencia) en el orden del archivo
+    """
+    if read_times is not None:
+        read_times[token_file] = 0.0
+    with open(token_file, 'r', encoding='utf-8') as f:
+        while True:
+            # Lines are parsed in batches so that timing them costs little
+            start = time.perf_counter()
+            lines = f.readlines(TOKEN_READ_CHUNK)
+            entries = []
+            for line in lines:
+                parts = line.strip().split(' ', 1)
+                if len(parts) != 2:
+                    continue
+                try:
+                    count = int(parts[1])
+                except ValueError:
+                    continue
+                entries.append((parts[0], label, count))
+            if read_times is not None:
+                read_times[token_file] += time.perf_counter() - start
+            if not lines:
+                return
+            yield from entries
+
+def _token_sort_key(entry):
+    return entry[0].lower()
+
+# Máximo de archivos abiertos a la vez en una mezcla k-way; con más
+# entradas se mezcla en varias pasadas (merge_token_files, ExternalSorter)
+MERGE_FAN_IN = 256
+
+def _read_merge_run(run_file):
+    """Lee una corrida intermedia de merge_token_files ("token frecuencia etiqueta")."""
+    with open(run_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            token, count, label = line[:-1].split(' ', 2)
+            yield token, label, int(count)
+
+def _group_token_entries(merged):
+    """Agrupa por token las entradas (token, etiqueta, frecuencia) ya mezcladas."""
+    for token, group in groupby(merged, key=itemgetter(0)):
+        docs = []
+        for _, label, count in group:
+            if docs and docs[-1][0] == label:
+                # Same document twice: keep the last value, as a dict would
+                docs[-1] = (label, count)
+            else:
+                docs.append((label, count))
+        yield token, docs
+
+def merge_group_sizes(num_inputs, fan_in):
+    """
+    Tamaños de los grupos consecutivos a mezclar en una pasada.
+
+    Si una pasada basta para quedar en fan_in entradas, solo se mezclan las
+    necesarias (505 archivos con fan_in=256 -> un grupo de 250); si no, se
+    mezclan todas por grupos de fan_in.
+    """
+    excess = num_inputs - fan_in
+    groups = -(-excess // (fan_in - 1))
+    merged = excess + groups  # each group of s inputs removes s - 1
+    if merged <= num_inputs:
+        return [fan_in] * (groups - 1) + [merged - fan_in * (groups - 1)]
+    return [min(fan_in, num_inputs - start) for start in range(0, num_inputs, fan_in)]
+
+def _merge_token_pass(streams, fan_in, run_dir, level):
+    """
+    Mezcla los primeros streams en corridas dentro de run_dir (ver
+    merge_group_sizes).
+
+    Los grupos son consecutivos y heapq.merge es estable, así que se
+    conserva el orden de las etiquetas de un mismo token.
+
+    Returns:
+        Los streams de las corridas seguidos de los que no se mezclaron
+    """
+    run_files = []
+    start = 0
+    for size in merge_group_sizes(len(streams), fan_in):
+        run_file = run_dir / f"run_{level}_{len(run_files):04d}.txt"
+        with open(run_file, 'w', encoding='utf-8') as f:
+            for token, label, count in heapq.merge(*streams[start:start + size], key=_token_sort_key):
+                f.write(f"{token} {count} {label}\n")
+        run_files.append(run_file)
+        start += size
+    return [_read_merge_run(run_file) for run_file in run_files] + streams[start:]
+
+def merge_token_files(token_files, fan_in=MERGE_FAN_IN, temp_dir=None, read_times=None):
+    """
+    Mezcla archivos *_tokens.txt ya ordenados por token.
+
+    tokenize_file escribe cada archivo ordenado, así que heapq.merge basta para
+    obtener el orden global sin cargar ni reordenar el vocabulario: solo se
+    mantiene una línea por archivo en memoria. Con más de fan_in archivos se
+    mezclan por grupos de fan_in en corridas intermedias (en un directorio
+    temporal dentro de temp_dir, que se borra al terminar), así que nunca hay
+    más de fan_in archivos abiertos.
+
+    Args:
+        token_files: Lista de (ruta, etiqueta); para un mismo token las
+                     entradas salen en el orden de esta lista
+        read_times: Si se indica, dict donde se guarda el tiempo de lectura
+                    de cada archivo por ruta
+
+    Yields:
+        (token, [(etiqueta, frecuencia)]) en orden alfabético de token
+    """
+    if fan_in < 2:
+        raise ValueError(f"fan_in debe ser al menos 2: {fan_in}")
+    
+    streams = [read_token_file(token_file, label, read_times) for token_file, label in token_files]
+    
+    run_dir = None
+    if len(streams) > fan_in:
+        if temp_dir is not None:
+            Path(temp_dir).mkdir(parents=True, exist_ok=True)
+        run_dir = tempfile.TemporaryDirectory(dir=temp_dir)
+    
+    try:
+        level = 0
+        while len(streams) > fan_in:
+            streams = _merge_token_pass(streams, fan_in, Path(run_dir.name), level)
+            level += 1
+        
+        yield from _group_token_entries(heapq.merge(*streams, key=_token_sort_key))
+    finally:
+        if run_dir is not None:
+            run_dir.cleanup()
+
+def file_content_hash(file_path, chunk_size=1 << 20):
+    """Hash BLAKE2b (hex) del contenido de un archivo, leído por bloques."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Registro de los documentos fuente ya procesados (results/manifest.json).
+
+    Por cada archivo guarda tamaño, mtime, hash del contenido y los
+    artefactos que generó (rutas relativas a results/). Un documento se
+    considera sin cambios si coincide el tamaño y el mtime, o, si solo
+    cambió el mtime, si el hash sigue siendo el mismo.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, manifest_file, input_dir):
+        self.manifest_file = Path(manifest_file)
+        self.input_dir = Path(input_dir)
+        self.documents = {}  # {filename: {'size', 'mtime_ns', 'hash', 'artifacts'}}
+    
+    def load(self):
+        """Carga el manifiesto; si no existe, es de otra versión o de otro directorio, queda vacío."""
+        self.documents = {}
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        
+        if data.get('version') == self.VERSION and data.get('input_dir') == str(self.input_dir.resolve()):
+            self.documents = data.get('documents', {})
+        return self
+    
+    def save(self):
+        """Escribe el manifiesto de forma atómica."""
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_name(self.manifest_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.VERSION,
+                'input_dir': str(self.input_dir.resolve()),
+                'documents': self.documents
+            }, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.manifest_file)
+    
+    def is_unchanged(self, filename, artifacts_root):
+        """
+        True si el documento no cambió desde que se registró y sus artefactos
+        siguen existiendo en artifacts_root.
+        """
+        entry = self.documents.get(filename)
+        if entry is None:
+            return False
+        if not all((Path(artifacts_root) / artifact).exists() for artifact in entry['artifacts']):
+            return False
+        
+        stat = (self.input_dir / filename).stat()
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+        
+        # Touched but maybe not modified: compare the content
+        if file_content_hash(self.input_dir / filename) != entry['hash']:
+            return False
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+    
+    def record(self, filename, artifacts):
+        """Registra (o actualiza) un documento procesado y sus artefactos."""
+        source = self.input_dir / filename
+        stat = source.stat()
+        self.documents[filename] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': file_content_hash(source),
+            'artifacts': list(artifacts)
+        }
+    
+    def stale(self, filenames):
+        """
+        Documentos registrados que ya no forman parte de filenames: los
+        borrados y los que dejaron de coincidir con el filtro.
+        """
+        current = set(filenames)
+        return sorted(filename for filename in self.documents if filename not in current)
+    
+    def remove(self, filename, artifacts_root):
+        """Olvida un documento y borra sus artefactos."""
+        entry = self.documents.pop(filename, None)
+        if entry is None:
+            return
+        for artifact in entry['artifacts']:
+            (Path(artifacts_root) / artifact).unlink(missing_ok=True)
+
+
+def actividad5(input_dir, output_dir, workers=None, corpus=False, pattern='*.html', recursive=False,
+               incremental=False):
+    """
+    Actividad 5: Command-line tokenizer.
+
+    Por defecto tokeniza los archivos de ACTIVIDAD5_FILES. Con corpus=True
+    tokeniza todos los archivos de input_dir que coinciden con pattern
+    (y los de subdirectorios si recursive=True); cada documento se escribe
+    en results/tokenized/ en cuanto se procesa, así que la memoria no crece
+    con el tamaño del corpus.
+
+    Con incremental=True usa results/manifest.json: los documentos sin
+    cambios conservan su archivo tokenizado, solo se tokenizan los nuevos o
+    modificados y se borran los tokens de los documentos que ya no están en
+    la lista (eliminados o fuera del filtro).
+    """
+    if corpus:
+        print("=== EJECUTANDO ACTIVIDAD 5: TOKENIZADOR DEL CORPUS COMPLETO ===")
+    else:
+        print("=== EJECUTANDO ACTIVIDAD 5: TOKENIZADOR DE ARCHIVOS ESPECÍFICOS ===")
     
     input_path = Path(input_dir)
     output_path = Path(output_dir)
@@ -364,61 +1130,119 @@ def actividad5(input_dir, output_dir):
     tokenized_path = output_path / 'tokenized'
     tokenized_path.mkdir(parents=True, exist_ok=True)
     
-    files_to_process = ['simple.html', 'medium.html', 'hard.html', '002.html']
+    if corpus:
+        files_to_process = discover_html_files(input_path, pattern, recursive)
+    else:
+        files_to_process = ACTIVIDAD5_FILES
     
     program_start = time.time()
     
     log_lines = []
-    all_word_frequencies = Counter()
     total_processing_time = 0
     successful_files = 0
+    total_bytes = 0
     
-    log_lines.append("=== ACTIVIDAD 5: REPORTE DE TOKENIZACIÓN DE ARCHIVOS ESPECÍFICOS ===")
+    if corpus:
+        log_lines.append("=== ACTIVIDAD 5: REPORTE DE TOKENIZACIÓN DEL CORPUS COMPLETO ===")
+    else:
+        log_lines.append("=== ACTIVIDAD 5: REPORTE DE TOKENIZACIÓN DE ARCHIVOS ESPECÍFICOS ===")
     log_lines.append(f"Fecha: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     log_lines.append(f"Directorio de entrada: {input_dir}")
     log_lines.append(f"Directorio de salida: {output_dir}")
+    if corpus:
+        log_lines.append(f"Filtro: {pattern} ({'recursivo' if recursive else 'no recursivo'})")
+        log_lines.append(f"Archivos encontrados: {len(files_to_process)}")
     log_lines.append("")
     log_lines.append("Archivos procesados:")
     log_lines.append("-" * 70)
     
     # Process each specified file
+    found_files = []
     for filename in files_to_process:
-        input_file = input_path / filename
-        output_file = tokenized_path / f"{Path(filename).stem}_tokens.txt"
-        
-        if not input_file.exists():
+        if not (input_path / filename).exists():
             log_lines.append(f"{filename:<40} NO ENCONTRADO")
             print(f"Archivo no encontrado: {filename}")
             continue
+        found_files.append(filename)
+    
+    tokenize_start = time.time()
+    
+    unchanged_files = set()
+    deleted_files = []
+    if incremental:
+        manifest = Manifest(output_path / 'manifest.json', input_path).load()
+        
+        for filename in manifest.stale(found_files):
+            manifest.remove(filename, output_path)
+            deleted_files.append(filename)
+            log_lines.append(f"{filename:<40} ELIMINADO")
+            print(f"Documento eliminado: {filename}")
         
-        processing_time, unique_words = tokenize_file(input_file, output_file)
+        # Token files of documents outside the current list (for example
+        # written by a run without the manifest) would also be indexed by actividad7
+        expected = {token_file_name(filename) for filename in found_files}
+        for token_file in sorted(tokenized_path.glob(f"*{TOKEN_FILE_SUFFIX}")):
+            if token_file.name not in expected:
+                token_file.unlink()
+                deleted_files.append(token_file_document(token_file))
+                log_lines.append(f"{token_file.name:<40} ELIMINADO")
+                print(f"Archivo tokenizado eliminado: {token_file.name}")
         
+        unchanged_files = {filename for filename in found_files if manifest.is_unchanged(filename, output_path)}
+    
+    pending_files = [filename for filename in found_files if filename not in unchanged_files]
+    output_files = [tokenized_path / token_file_name(filename) for filename in pending_files]
+    results = run_parallel(tokenize_file, [input_path / filename for filename in pending_files],
+                           output_files, workers=workers)
+    
+    tokenized_by_file = {}
+    for filename, output_file, (processing_time, unique_words) in zip(pending_files, output_files, results):
         if processing_time > 0:
+            # The file written before token files kept the extension would be read as well
+            legacy_name = legacy_token_file_name(filename)
+            if legacy_name is not None:
+                (tokenized_path / legacy_name).unlink(missing_ok=True)
             successful_files += 1
             total_processing_time += processing_time
-            
-            # Read the tokenized file to get word frequencies
-            with open(output_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.strip().split(' ', 1)
-                    if len(parts) == 2:
-                        word, count = parts[0], int(parts[1])
-                        all_word_frequencies[word] += count
+            total_bytes += (input_path / filename).stat().st_size
+            tokenized_by_file[filename] = output_file
+            if incremental:
+                manifest.record(filename, [output_file.relative_to(output_path).as_posix()])
             
             log_lines.append(f"{filename:<40} {processing_time:.6f}s  {unique_words:>6} palabras")
             print(f"Procesado: {filename} en {processing_time:.6f} segundos - {unique_words} palabras únicas")
         else:
+            if incremental:
+                manifest.remove(filename, output_path)
             log_lines.append(f"{filename:<40} ERROR")
     
+    for filename in sorted(unchanged_files):
+        tokenized_by_file[filename] = tokenized_path / token_file_name(filename)
+        log_lines.append(f"{filename:<40} SIN CAMBIOS")
+    
+    if incremental:
+        manifest.save()
+    
+    tokenized_files = [(tokenized_by_file[filename], filename)
+                       for filename in found_files if filename in tokenized_by_file]
+    
+    tokenize_time = time.time() - tokenize_start
+    docs_per_second = successful_files / tokenize_time if tokenize_time > 0 else 0
+    mb_per_second = total_bytes / (1024 * 1024) / tokenize_time if tokenize_time > 0 else 0
+    
     consolidation_start = time.time()
     
-    alphabetically_sorted = sorted(all_word_frequencies.items(), key=lambda x: x[0].lower())
+    # The token files are already sorted: merge them instead of re-sorting
+    word_frequencies = []
     consolidated_alpha_path = output_path / 'actividad5alfabetico.txt'
     with open(consolidated_alpha_path, 'w', encoding='utf-8') as f:
-        for word, count in alphabetically_sorted:
+        for word, docs in merge_token_files(tokenized_files, temp_dir=output_path):
+            count = sum(doc_count for _, doc_count in docs)
             f.write(f"{word} {count}\n")
+            word_frequencies.append((word, count))
     
-    frequency_sorted = sorted(all_word_frequencies.items(), key=lambda x: (-x[1], x[0].lower()))
+    # Stable sort: ties keep the alphabetical order of the merge
+    frequency_sorted = sorted(word_frequencies, key=lambda x: -x[1])
     consolidated_freq_path = output_path / 'consolidated_tokens_freq.txt'
     with open(consolidated_freq_path, 'w', encoding='utf-8') as f:
         for word, count in frequency_sorted:
@@ -432,11 +1256,22 @@ def actividad5(input_dir, output_dir):
     
     log_lines.extend([
         "",
+        f"Archivos tokenizados: {successful_files}/{len(files_to_process)}",
+    ])
+    if incremental:
+        log_lines.extend([
+            f"Sin cambios (omitidos): {len(unchanged_files)}",
+            f"Eliminados: {len(deleted_files)}",
+        ])
+    log_lines.extend([
+        f"Bytes procesados: {total_bytes}",
+        f"Throughput: {docs_per_second:.2f} documentos/s, {mb_per_second:.2f} MB/s",
         f"tiempo total en crear el nuevo archivo: {consolidation_time:.2f} segundos",
         f"tiempo total de ejecucion: {total_program_time:.2f} segundos"
     ])
     
     log_path = output_path / 'reports' / 'activity_5_consolidate.txt'
+    log_path.parent.mkdir(parents=True, exist_ok=True)
     with open(log_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(log_lines))
     
@@ -445,12 +1280,17 @@ def actividad5(input_dir, output_dir):
     print(f"Archivo consolidado (alfabético): {consolidated_alpha_path}")
     print(f"Archivo consolidado (por frecuencia): {consolidated_freq_path}")
     print(f"Reporte guardado en: {log_path}")
-    print(f"Total palabras únicas: {len(all_word_frequencies)}")
+    print(f"Total palabras únicas: {len(word_frequencies)}")
+    print(f"Throughput: {docs_per_second:.2f} documentos/s, {mb_per_second:.2f} MB/s")
     print(f"Tiempo de consolidación: {consolidation_time:.6f} segundos")
     print(f"Tiempo total: {total_program_time:.6f} segundos")
 
-def actividad6(input_dir, output_dir):
-    """Actividad 6: Create dictionary file with unique tokens and file counts."""
+def actividad6(input_dir, output_dir, corpus=False, pattern='*.html', recursive=False):
+    """
+    Actividad 6: Create dictionary file with unique tokens and file counts.
+
+    corpus, pattern y recursive seleccionan los mismos archivos que actividad5.
+    """
     print("=== EJECUTANDO ACTIVIDAD 6: CREACIÓN DE DICCIONARIO DE TOKENS ===")
     
     input_path = Path(input_dir)
@@ -464,7 +1304,10 @@ def actividad6(input_dir, output_dir):
     
     program_start = time.time()
     
-    files_to_process = ['simple.html', 'medium.html', 'hard.html', '002.html']
+    if corpus:
+        files_to_process = discover_html_files(input_path, pattern, recursive)
+    else:
+        files_to_process = ACTIVIDAD5_FILES
     
     log_lines = []
     token_data = {}  # {token: {'count': total_count, 'files': set_of_files}}
@@ -479,7 +1322,7 @@ def actividad6(input_dir, output_dir):
     log_lines.append("-" * 70)
     
     for filename in files_to_process:
-        token_file = tokenized_path / f"{Path(filename).stem}_tokens.txt"
+        token_file = tokenized_path / token_file_name(filename)
         
         if not token_file.exists():
             log_lines.append(f"{filename:<40} NO ENCONTRADO")
@@ -552,7 +1395,106 @@ def actividad6(input_dir, output_dir):
     print(f"Tiempo de creación del diccionario: {dictionary_time:.6f} segundos")
     print(f"Tiempo total: {total_program_time:.6f} segundos")
 
-def actividad4():
+class ExternalSorter:
+    """
+    Ordenamiento externo de palabras con memoria acotada.
+
+    Las palabras se acumulan en memoria hasta llegar a memory_budget_mb
+    (al menos 1 MB); en ese momento se ordenan y se escriben como una
+    corrida (run) en temp_dir. sorted_words() mezcla las corridas con
+    heapq.merge, así que en memoria solo queda una línea por corrida; si hay
+    más de fan_in, antes se mezclan por grupos en corridas más grandes (ver
+    merge_group_sizes). Si todo cabe en el presupuesto no se escribe ningún
+    archivo temporal.
+    """
+    
+    # Bytes por palabra además del objeto str (puntero en la lista)
+    ITEM_OVERHEAD = 8
+    
+    def __init__(self, memory_budget_mb, temp_dir, fan_in=MERGE_FAN_IN):
+        if memory_budget_mb < 1:
+            raise ValueError(f"El presupuesto de memoria debe ser de al menos 1 MB: {memory_budget_mb}")
+        if fan_in < 2:
+            raise ValueError(f"fan_in debe ser al menos 2: {fan_in}")
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.temp_dir = Path(temp_dir)
+        self.fan_in = fan_in
+        self.run_files = []
+        self.num_runs = 0  # Runs written by _flush_run
+        self.merge_passes = 0  # Intermediate merge passes
+        self.buffer = []
+        self.buffer_size = 0
+    
+    def extend(self, words):
+        for word in words:
+            self.buffer.append(word)
+            self.buffer_size += sys.getsizeof(word) + self.ITEM_OVERHEAD
+            if self.buffer_size >= self.memory_budget:
+                self._flush_run()
+    
+    def _flush_run(self):
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        run_file = self.temp_dir / f"run_{self.num_runs:04d}.txt"
+        self.buffer.sort()
+        with open(run_file, 'w', encoding='utf-8') as f:
+            f.writelines(f"{word}\n" for word in self.buffer)
+        self.run_files.append(run_file)
+        self.num_runs += 1
+        self.buffer = []
+        self.buffer_size = 0
+    
+    @staticmethod
+    def _read_run(run_file):
+        with open(run_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield line[:-1]
+    
+    def _merge_pass(self):
+        """Mezcla grupos de corridas en corridas nuevas y borra las de entrada."""
+        merged_files = []
+        start = 0
+        for size in merge_group_sizes(len(self.run_files), self.fan_in):
+            group = self.run_files[start:start + size]
+            merged_file = self.temp_dir / f"merge_{self.merge_passes}_{len(merged_files):04d}.txt"
+            with open(merged_file, 'w', encoding='utf-8') as f:
+                f.writelines(f"{word}\n" for word in heapq.merge(*(self._read_run(run_file) for run_file in group)))
+            for run_file in group:
+                run_file.unlink()
+            merged_files.append(merged_file)
+            start += size
+        self.run_files = merged_files + self.run_files[start:]
+        self.merge_passes += 1
+    
+    def sorted_words(self):
+        """Devuelve un iterador con todas las palabras en orden."""
+        self.buffer.sort()
+        if not self.run_files:
+            return iter(self.buffer)
+        while len(self.run_files) > self.fan_in:
+            self._merge_pass()
+        return heapq.merge(self.buffer, *(self._read_run(run_file) for run_file in self.run_files))
+    
+    def close(self):
+        """Elimina las corridas temporales."""
+        for run_file in self.run_files:
+            run_file.unlink(missing_ok=True)
+        if self.temp_dir.exists() and not any(self.temp_dir.iterdir()):
+            self.temp_dir.rmdir()
+        self.run_files = []
+        self.buffer = []
+
+
+def actividad4(memory_budget_mb=None, word_counts=False):
+    """
+    Actividad 4: Archivo consolidado con todas las palabras ordenadas.
+
+    Args:
+        memory_budget_mb: Si se indica, ordena con ExternalSorter usando como
+                          máximo esa memoria (en MB) en lugar de cargar todas
+                          las palabras en una lista
+        word_counts: Si True escribe "palabra frecuencia" una vez por palabra
+                     en lugar de repetir cada palabra
+    """
     print("=== EJECUTANDO ACTIVIDAD 4: ARCHIVO CONSOLIDADO DE PALABRAS ===")
     
     clean_folder = Path('data/extracted_text')
@@ -570,7 +1512,10 @@ def actividad4():
         return
     
     log_lines = []
-    all_words = []  # List to keep all words (with duplicates)
+    if memory_budget_mb is None:
+        all_words = []  # List to keep all words (with duplicates)
+    else:
+        sorter = ExternalSorter(memory_budget_mb, Path('results/a4_runs'))
     total_consolidation_time = 0
     successful_files = 0
     
@@ -583,14 +1528,17 @@ def actividad4():
     for clean_file in clean_files:
         file_start = time.time()
         
-        content = open_file(clean_file)
-        
-        if content.startswith("Failed"):
+        try:
+            content = open_file(clean_file)
+        except DocumentError:
             log_lines.append(f"{clean_file.name:<40} ERROR")
             continue
         
         words = process_words(content)
-        all_words.extend(words)  # Add all words (keeping duplicates)
+        if memory_budget_mb is None:
+            all_words.extend(words)  # Add all words (keeping duplicates)
+        else:
+            sorter.extend(words)
         
         file_end = time.time()
         processing_time = file_end - file_start
@@ -602,13 +1550,30 @@ def actividad4():
     
     consolidation_start = time.time()
     
-    sorted_words = sorted(all_words)  # Sort all words (with duplicates)
+    if memory_budget_mb is None:
+        sorted_words = sorted(all_words)  # Sort all words (with duplicates)
+    else:
+        sorted_words = sorter.sorted_words()
     
     consolidated_path = Path('results/consolidated_words.txt')
     consolidated_path.parent.mkdir(parents=True, exist_ok=True)
+    unique_count = 0
+    total_count = 0
     with open(consolidated_path, 'w', encoding='utf-8') as f:
-        for word in sorted_words:
-            f.write(f"{word}\n")
+        # Equal words are adjacent once sorted, so the counts need no set
+        for word, group in groupby(sorted_words):
+            count = sum(1 for _ in group)
+            if word_counts:
+                f.write(f"{word} {count}\n")
+            else:
+                f.write(f"{word}\n" * count)
+            unique_count += 1
+            total_count += count
+    
+    if memory_budget_mb is not None:
+        runs = sorter.num_runs
+        merge_passes = sorter.merge_passes
+        sorter.close()
     
     consolidation_end = time.time()
     consolidation_time = consolidation_end - consolidation_start
@@ -616,11 +1581,14 @@ def actividad4():
     program_end = time.time()
     total_program_time = program_end - program_start
     
-    unique_count = len(set(all_words))
-    total_count = len(all_words)
+    log_lines.append("")
+    if memory_budget_mb is not None:
+        log_lines.append(f"Ordenamiento externo: {runs} corridas, {merge_passes} pasadas de mezcla intermedias, "
+                         f"presupuesto de memoria {memory_budget_mb} MB")
+    if word_counts:
+        log_lines.append("Formato de salida: palabra frecuencia")
     
     log_lines.extend([
-        "",
         f"Total palabras: {total_count}",
         f"Total palabras únicas: {unique_count}",
         f"tiempo total en crear el nuevo archivo: {consolidation_time:.2f} segundos",
@@ -676,9 +1644,75 @@ def test_single_file():
 
 
 
-def actividad7(output_dir="results"):
+def write_a7_stream(dict_file, post_file, term_postings, front_coded_file=None):
+    """
+    Escribe a7_Diccionario.txt y a7_Posting.txt a partir de un flujo ordenado
+    y, si se indica front_coded_file, el mismo diccionario con front coding
+    (FrontCodedWriter, a medida que llegan los tokens).
+
+    Args:
+        term_postings: Iterable de (token, [(archivo, frecuencia)]) en orden
+                       alfabético de token y con los archivos ya ordenados
+
+    Returns:
+        (número de tokens, número de registros del posting)
+    """
+    num_tokens = 0
+    posting_records = 0
+    front_coded = FrontCodedWriter(front_coded_file, 2) if front_coded_file is not None else None
+    
+    try:
+        with open(dict_file, "w", encoding="utf-8") as df, open(post_file, "w", encoding="utf-8") as pf:
+            for token, docs in term_postings:
+                # Dictionary (no header): token;repetitions;num_docs
+                repetitions = sum(freq for _, freq in docs)
+                df.write(f"{token};{repetitions};{len(docs)}\n")
+                if front_coded is not None:
+                    front_coded.add(token, (repetitions, len(docs)))
+                
+                # Posting (no header): archivo.html;frecuencia
+                pf.writelines(f"{doc};{freq}\n" for doc, freq in docs)
+                num_tokens += 1
+                posting_records += len(docs)
+    except BaseException:
+        if front_coded is not None:
+            front_coded.discard()
+        raise
+    
+    if front_coded is not None:
+        front_coded.close()
+    
+    return num_tokens, posting_records
+
+def write_a7_files(dict_file, post_file, word_docs, front_coded_file=None):
+    """
+    Escribe a7_Diccionario.txt y a7_Posting.txt (y el diccionario con front
+    coding si se indica front_coded_file).
+
+    Args:
+        word_docs: {token: {archivo: frecuencia}}
+
+    Returns:
+        (tokens en el orden del diccionario, número de registros del posting)
+    """
+    # Sort tokens alphabetically (case-insensitive)
+    sorted_tokens = sorted(word_docs.keys(), key=lambda x: x.lower())
+    
+    _, posting_records = write_a7_stream(
+        dict_file, post_file,
+        ((token, sorted(word_docs[token].items())) for token in sorted_tokens),
+        front_coded_file
+    )
+    
+    return sorted_tokens, posting_records
+
+def actividad7(output_dir="results", incremental=False):
     """
     Actividad 7: Crear diccionario y archivo posting desde archivos tokenizados.
+
+    Con incremental=True no se reconstruye nada si el diccionario y el posting
+    son más recientes que todos los archivos tokenizados y que la carpeta
+    tokenized/ (que cambia cuando se agregan o borran documentos).
     """
     import os
     import time
@@ -715,9 +1749,7 @@ def actividad7(output_dir="results"):
             log.write('\n'.join(log_lines))
         return
 
-    # Step 1: Read tokenized files and collect word data
-    word_docs = defaultdict(lambda: defaultdict(int))  # {token: {filename: frequency}}
-    token_files = list(token_dir.glob("*_tokens.txt"))
+    token_files = list_token_files(token_dir)
     
     if not token_files:
         error_msg = "No se encontraron archivos tokenizados (_tokens.txt)"
@@ -728,101 +1760,55 @@ def actividad7(output_dir="results"):
             log.write('\n'.join(log_lines))
         return
 
+    if incremental and dict_file.exists() and post_file.exists():
+        built_at = min(dict_file.stat().st_mtime_ns, post_file.stat().st_mtime_ns)
+        inputs_at = max([token_dir.stat().st_mtime_ns] + [f.stat().st_mtime_ns for f in token_files])
+        if inputs_at <= built_at:
+            print("Sin cambios en los archivos tokenizados; se conservan el diccionario y el posting.")
+            return
+
     log_lines.append("Archivos tokenizados procesados:")
     log_lines.append("-" * 70)
     
-    for token_file in token_files:
-        file_start = time.time()
-        
-        # Extract original filename (remove _tokens.txt suffix and add .html)
-        original_filename = token_file.stem.replace('_tokens', '') + '.html'
-        
-        try:
-            with open(token_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Parse "token count" format
-                    parts = line.split(' ', 1)
-                    if len(parts) == 2:
-                        token, count_str = parts
-                        try:
-                            count = int(count_str)
-                            word_docs[token][original_filename] = count
-                        except ValueError:
-                            continue
-            
-            file_end = time.time()
-            processing_time = file_end - file_start
-            
-            log_lines.append(f"{token_file.name:<40} {processing_time:.6f}s")
-            print(f"Procesado: {token_file.name} en {processing_time:.6f} segundos")
-            
-        except Exception as e:
-            log_lines.append(f"{token_file.name:<40} ERROR: {e}")
-            print(f"Error procesando {token_file.name}: {e}")
-
-    log_lines.extend([
-        "",
-        f"Total archivos tokenizados procesados: {len(token_files)}",
-        f"Total tokens únicos encontrados: {len(word_docs)}",
-        ""
-    ])
-
-    # Step 2: Build posting and dictionary
-    posting_start = time.time()
+    # Step 1: Pair each tokenized file with its original filename; sorting
+    # by that name makes the merge emit each token's documents in posting order
+    sources = sorted(
+        ((token_file, token_file_document(token_file)) for token_file in token_files),
+        key=itemgetter(1)
+    )
     
-    posting_lines = []
-    dict_lines = []
-    position = 0  # Initial posting position
-
-    # Sort tokens alphabetically (case-insensitive)
-    sorted_tokens = sorted(word_docs.keys(), key=lambda x: x.lower())
+    # Step 2: Merge the sorted token files straight into posting and dictionary
+    posting_start = time.time()
     
-    for token in sorted_tokens:
-        docs = word_docs[token]
-        num_docs = len(docs)
-        
-        # Calculate total repetitions (sum of frequencies across all documents)
-        total_repetitions = sum(docs.values())
-
-        # Add to dictionary: token;repetitions;num_docs
-        dict_lines.append(f"{token};{total_repetitions};{num_docs}\n")
-
-        # Add to posting: Archivo, Frecuencia (sorted by filename)
-        for doc in sorted(docs.keys()):
-            freq = docs[doc]
-            posting_lines.append(f"{doc};{freq}\n")
-
-        # Update posting position for next token
-        position += num_docs
-
-    # Step 3: Write dictionary file
-    with open(dict_file, "w", encoding="utf-8") as df:
-        # No header needed, just write the data lines
-        df.writelines(dict_lines)
-
-    # Step 4: Write posting file
-    with open(post_file, "w", encoding="utf-8") as pf:
-        # No header - format: archivo.html;frecuencia
-        pf.writelines(posting_lines)
+    front_coded_file = dict_posting_dir / "a7_Diccionario_fc.bin"
+    read_times = {}  # Time spent reading each token file during the merge
+    num_tokens, posting_records = write_a7_stream(
+        dict_file, post_file, merge_token_files(sources, temp_dir=base_dir, read_times=read_times), front_coded_file
+    )
 
     posting_end = time.time()
     posting_time = posting_end - posting_start
     
+    for token_file, _ in sources:
+        processing_time = read_times.get(token_file, 0.0)
+        log_lines.append(f"{token_file.name:<40} {processing_time:.6f}s")
+        print(f"Procesado: {token_file.name} en {processing_time:.6f} segundos")
+    
     program_end = time.time()
     total_program_time = program_end - program_start
 
     log_lines.extend([
+        "",
+        f"Total archivos tokenizados procesados: {len(token_files)}",
+        "",
         "=== ARCHIVOS GENERADOS ===",
-        f"Diccionario: {dict_file}",
+        f"Diccionario: {dict_file} ({dict_file.stat().st_size} bytes)",
+        f"Diccionario con front coding: {front_coded_file} ({front_coded_file.stat().st_size} bytes)",
         f"Posting: {post_file}",
         "",
         "=== ESTADÍSTICAS ===",
-        f"Total tokens únicos en diccionario: {len(sorted_tokens)}",
-        f"Total registros en posting: {len(posting_lines)}",
+        f"Total tokens únicos en diccionario: {num_tokens}",
+        f"Total registros en posting: {posting_records}",
         f"Tiempo creando diccionario y posting: {posting_time:.6f} segundos",
         f"Tiempo total de ejecución: {total_program_time:.6f} segundos",
         "",
@@ -835,136 +1821,2301 @@ def actividad7(output_dir="results"):
 
     print(f"\n Actividad 7 completada.")
     print(f"Diccionario generado: {dict_file}")
+    print(f"Diccionario con front coding: {front_coded_file}")
     print(f"Archivo Posting generado: {post_file}")
     print(f"Reporte guardado en: {report_file}")
-    print(f"Total tokens únicos: {len(sorted_tokens)}")
+    print(f"Total tokens únicos: {num_tokens}")
     print(f"Tiempo total: {total_program_time:.6f} segundos")
 
 
-def hash_function(key, size):
-    """Implementa una versión simple de la función hash DJB2."""
+def djb2_hash(key):
+    """Función hash DJB2 (hash * 33 + carácter) reducida a 64 bits."""
     hash_value = 5381
-    for char in key:
-        hash_value = ((hash_value << 5) + hash_value) + ord(char)
-    return hash_value % size
+    for code in map(ord, key):
+        hash_value = (hash_value * 33 + code) & 0xFFFFFFFFFFFFFFFF
+    return hash_value
+
+
+def fnv1a_hash(key):
+    """FNV-1a de 64 bits sobre los bytes UTF-8 del token."""
+    hash_value = 0xCBF29CE484222325
+    for byte in key.encode('utf-8'):
+        hash_value = ((hash_value ^ byte) * 0x100000001B3) & 0xFFFFFFFFFFFFFFFF
+    return hash_value
+
+
+def blake2b_hash(key):
+    """Primeros 8 bytes de BLAKE2b (hashlib, en C) del token."""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def builtin_hash(key):
+    """hash() de Python; solo es reproducible entre procesos con PYTHONHASHSEED fijo."""
+    return hash(key) & 0xFFFFFFFFFFFFFFFF
+
 
-def search_word(word, output_dir="results", use_stoplist=False):
+# Funciones hash de 64 bits seleccionables para los diccionarios de las actividades 8 y 9
+HASH_FUNCTIONS = {
+    'djb2': djb2_hash,
+    'fnv1a': fnv1a_hash,
+    'blake2b': blake2b_hash,
+    'builtin': builtin_hash,
+}
+
+
+def builtin_hash_is_fixed():
+    """True si PYTHONHASHSEED fija la semilla de hash() (un entero, 0 desactiva la aleatorización)."""
+    return os.environ.get('PYTHONHASHSEED', '').isdigit()
+
+
+def get_hash_function(name):
+    """Función hash registrada con ese nombre."""
+    if name not in HASH_FUNCTIONS:
+        raise ValueError(f"Función hash desconocida: {name} (opciones: {', '.join(HASH_FUNCTIONS)})")
+    return HASH_FUNCTIONS[name]
+
+
+class Dictionary(ABC):
     """
-    Actividad 12: Buscar una o varias palabras en el diccionario y posting.
-    
+    Interfaz común de los diccionarios token -> tupla de num_values enteros.
+
+    Implementaciones: HashDictionary, PerfectHashDictionary,
+    SortedArrayDictionary, TrieDictionary y FrontCodedDictionary (ver
+    DICTIONARY_BACKENDS).
+    """
+
+    @classmethod
+    @abstractmethod
+    def build(cls, items, num_values):
+        """Construye el diccionario a partir de [(token, valores)] sin tokens repetidos."""
+
+    @abstractmethod
+    def __len__(self):
+        """Número de tokens."""
+
+    @abstractmethod
+    def get(self, key, default=None):
+        """Tupla con los valores del token, o default si no existe."""
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    @abstractmethod
+    def prefix(self, prefix):
+        """[(token, valores)] de los tokens que empiezan con prefix, en orden alfabético."""
+
+    @abstractmethod
+    def save(self, dictionary_file):
+        """Escribe el diccionario en un archivo binario (reemplazo atómico)."""
+
+    @classmethod
+    @abstractmethod
+    def load(cls, dictionary_file):
+        """Lee un diccionario escrito con save."""
+
+
+def read_arrays(data, offset, layout):
+    """
+    Lee arreglos little endian consecutivos de data a partir de offset.
+
     Args:
-        word: Palabra(s) a buscar (por ejemplo: "exploitation hygiene").
-              Se separan por espacios y se buscan individualmente.
-        output_dir: Directorio donde están los archivos de resultados
-        use_stoplist: Si True, usa los archivos de actividad 9 (con stoplist),
-                     si False, usa los archivos de actividad 8 (sin stoplist)
-    
+        layout: [(typecode, longitud)] en el orden en que están escritos
+
     Returns:
-        Lista de documentos que contienen al menos una de las palabras
-        (unión de resultados, sin duplicados), o lista vacía si no se encuentra
+        (lista de array, offset final)
+    """
+    arrays = []
+    for typecode, length in layout:
+        a = array(typecode)
+        a.frombytes(data[offset:offset + length * a.itemsize])
+        if sys.byteorder == 'big':
+            a.byteswap()
+        offset += length * a.itemsize
+        arrays.append(a)
+    return arrays, offset
+
+
+def write_arrays(f, arrays):
+    """Escribe los arreglos en little endian (inverso de read_arrays)."""
+    for a in arrays:
+        if sys.byteorder == 'big':
+            a = array(a.typecode, a)
+            a.byteswap()
+        f.write(a.tobytes())
+
+
+# --- Diccionario hash con direccionamiento abierto ---
+# Sondeo lineal Robin Hood: un token que ya se alejó más de su posición hash
+# desplaza al que está más cerca de la suya, así las distancias quedan parejas
+# y una búsqueda fallida se corta en cuanto encuentra un residente más cercano
+# a su posición que ella. La tabla duplica su capacidad (potencia de 2) al
+# superar HASH_MAX_LOAD, reutilizando los hashes guardados. Los bits bajos de
+# DJB2 se repiten mucho entre tokens cortos, así que el hash pasa por
+# mix64 antes de tomar la posición.
+# En disco se guardan los mismos arreglos paralelos:
+#   cabecera | hashes | columnas de valores | longitud de cada token (-1 = vacío) | pool de tokens
+HASH_INITIAL_CAPACITY = 1024
+HASH_MAX_LOAD = 0.8
+HASH_DICT_MAGIC = b"HTHSH002"
+HASH_DICT_MAGIC_V1 = b"HTHSH001"             # sin nombre de función hash (siempre djb2)
+HASH_DICT_HEADER = struct.Struct('<8s8sIII')  # magic, hash_name, capacity, count, num_values
+HASH_DICT_HEADER_V1 = struct.Struct('<8sIII')
+
+
+def mix64(hash_value):
+    """Finalizador de MurmurHash3: reparte todos los bits del hash en los bits bajos."""
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * 0xFF51AFD7ED558CCD) & 0xFFFFFFFFFFFFFFFF
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * 0xC4CEB9FE1A85EC53) & 0xFFFFFFFFFFFFFFFF
+    return hash_value ^ (hash_value >> 33)
+
+
+class HashDictionary(Dictionary):
+    """
+    Tabla hash de token -> num_values enteros sobre arreglos paralelos:
+    keys (str o None), hashes (array 'Q') y una array 'q' por valor.
+    """
+
+    def __init__(self, num_values, capacity=HASH_INITIAL_CAPACITY, hash_name='djb2'):
+        self.num_values = num_values
+        self.hash_name = hash_name
+        self.hash_func = get_hash_function(hash_name)
+        self.count = 0
+        self.resizes = 0
+        self._allocate(1 << max(capacity - 1, 1).bit_length())
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.keys = [None] * capacity
+        self.hashes = array('Q', bytes(8 * capacity))
+        self.values = [array('q', bytes(8 * capacity)) for _ in range(self.num_values)]
+
+    def __len__(self):
+        return self.count
+
+    def _distance(self, slot):
+        return (slot - self.hashes[slot]) & self._mask
+
+    def _insert(self, key, hash_value, values):
+        keys, hashes, columns, mask = self.keys, self.hashes, self.values, self._mask
+        slot = hash_value & mask
+        distance = 0
+        while True:
+            resident = keys[slot]
+            if resident is None:
+                keys[slot] = key
+                hashes[slot] = hash_value
+                for column, value in zip(columns, values):
+                    column[slot] = value
+                self.count += 1
+                return
+            if hashes[slot] == hash_value and resident == key:
+                for column, value in zip(columns, values):
+                    column[slot] = value
+                return
+            resident_hash = hashes[slot]
+            resident_distance = (slot - resident_hash) & mask
+            if resident_distance < distance:
+                # Robin Hood: the entry carried so far takes the slot, the resident moves on
+                resident_values = [column[slot] for column in columns]
+                keys[slot] = key
+                hashes[slot] = hash_value
+                for column, value in zip(columns, values):
+                    column[slot] = value
+                key, hash_value, values, distance = resident, resident_hash, resident_values, resident_distance
+            slot = (slot + 1) & mask
+            distance += 1
+
+    def _rehash(self, capacity, recompute=False):
+        entries = [(key, hash_value, [column[slot] for column in self.values])
+                   for slot, (key, hash_value) in enumerate(zip(self.keys, self.hashes)) if key is not None]
+        self._allocate(capacity)
+        self.count = 0
+        for key, hash_value, values in entries:
+            self._insert(key, mix64(self.hash_func(key)) if recompute else hash_value, values)
+
+    def _resize(self, capacity):
+        self.resizes += 1
+        self._rehash(capacity)
+
+    @classmethod
+    def build(cls, items, num_values, hash_name='djb2'):
+        """Construye la tabla a partir de [(token, valores)]."""
+        items = list(items)
+        table = cls(num_values, max(HASH_INITIAL_CAPACITY, int(len(items) / HASH_MAX_LOAD) + 1), hash_name)
+        for key, values in items:
+            table.put(key, *values)
+        return table
+
+    def put(self, key, *values):
+        """Inserta o reemplaza los valores del token."""
+        if self.count + 1 > self.capacity * HASH_MAX_LOAD:
+            self._resize(self.capacity * 2)
+        self._insert(key, mix64(self.hash_func(key)), values)
+
+    def find(self, key):
+        """Devuelve la posición del token en la tabla o -1 si no existe."""
+        hash_value = mix64(self.hash_func(key))
+        keys, hashes, mask = self.keys, self.hashes, self._mask
+        slot = hash_value & mask
+        distance = 0
+        while True:
+            resident = keys[slot]
+            if resident is None or (slot - hashes[slot]) & mask < distance:
+                return -1
+            if hashes[slot] == hash_value and resident == key:
+                return slot
+            slot = (slot + 1) & mask
+            distance += 1
+
+    def get(self, key, default=None):
+        """Tupla con los valores del token, o default si no existe."""
+        slot = self.find(key)
+        if slot < 0:
+            return default
+        return tuple(column[slot] for column in self.values)
+
+    def __contains__(self, key):
+        return self.find(key) >= 0
+
+    def prefix(self, prefix):
+        """[(token, valores)] de los tokens que empiezan con prefix; recorre toda la tabla."""
+        return sorted((key, tuple(column[slot] for column in self.values))
+                      for slot, key in enumerate(self.keys) if key is not None and key.startswith(prefix))
+
+    def slots(self):
+        """Itera (posición, token o None, valores) de todas las posiciones de la tabla."""
+        for slot, key in enumerate(self.keys):
+            yield slot, key, tuple(column[slot] for column in self.values)
+
+    def probe_histogram(self):
+        """Counter {sondeos necesarios para encontrar el token: cantidad de tokens}."""
+        return Counter(self._distance(slot) + 1 for slot, key in enumerate(self.keys) if key is not None)
+
+    def probe_summary(self):
+        """(promedio, máximo) de sondeos de una búsqueda exitosa."""
+        histogram = self.probe_histogram()
+        total = sum(length * count for length, count in histogram.items())
+        return total / (self.count or 1), max(histogram, default=0)
+
+    def report_lines(self):
+        """Líneas de reporte: capacidad, factor de carga e histograma de longitud de sondeo."""
+        histogram = self.probe_histogram()
+        mean, longest = self.probe_summary()
+        lines = [
+            f"Capacidad de la tabla: {self.capacity} (redimensionada {self.resizes} veces)",
+            f"Tokens: {self.count}, factor de carga: {self.count / self.capacity:.2%}",
+            f"Sondeos por búsqueda: promedio {mean:.3f}, máximo {longest}",
+            "Histograma de longitud de sondeo (sondeos: tokens):",
+        ]
+        for length in sorted(histogram):
+            lines.append(f"  {length:>4}: {histogram[length]:>8} ({histogram[length] / self.count:.2%})")
+        return lines
+
+    def save(self, table_file):
+        """Escribe los arreglos paralelos tal como están en memoria."""
+        if self.hash_name == 'builtin' and not builtin_hash_is_fixed():
+            print("Advertencia: PYTHONHASHSEED no está fijo; hash() cambia en cada proceso, así que "
+                  f"{table_file} se volverá a calcular al cargarlo.")
+        encoded = [key.encode('utf-8') if key is not None else None for key in self.keys]
+        lengths = array('i', (len(key) if key is not None else -1 for key in encoded))
+        table_file = Path(table_file)
+        tmp_file = table_file.with_name(table_file.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(HASH_DICT_HEADER.pack(HASH_DICT_MAGIC, self.hash_name.encode('ascii'),
+                                          self.capacity, self.count, self.num_values))
+            write_arrays(f, [self.hashes, *self.values, lengths])
+            f.write(b''.join(key for key in encoded if key is not None))
+        os.replace(tmp_file, table_file)
+
+    @classmethod
+    def load(cls, table_file):
+        """
+        Lee una tabla escrita con save, sin volver a calcular hashes (salvo con
+        'builtin' sin PYTHONHASHSEED fijo, que cambia entre procesos).
+        """
+        data = Path(table_file).read_bytes()
+        if data[:8] == HASH_DICT_MAGIC_V1:
+            _, capacity, count, num_values = HASH_DICT_HEADER_V1.unpack_from(data, 0)
+            hash_name, offset = 'djb2', HASH_DICT_HEADER_V1.size
+        else:
+            magic, hash_name, capacity, count, num_values = HASH_DICT_HEADER.unpack_from(data, 0)
+            if magic != HASH_DICT_MAGIC:
+                raise ValueError(f"{table_file} no es un diccionario hash válido")
+            hash_name, offset = hash_name.rstrip(b'\0').decode('ascii'), HASH_DICT_HEADER.size
+        table = cls(num_values, capacity, hash_name)
+        (table.hashes, *table.values, lengths), offset = read_arrays(
+            data, offset, [('Q', capacity)] + [('q', capacity)] * num_values + [('i', capacity)])
+        keys = table.keys
+        for slot, length in enumerate(lengths):
+            if length >= 0:
+                keys[slot] = data[offset:offset + length].decode('utf-8')
+                offset += length
+        table.count = count
+        if hash_name == 'builtin' and not builtin_hash_is_fixed():
+            table._rehash(capacity, recompute=True)
+        return table
+
+
+def benchmark_hash_functions(output_dir="results", table_sizes=None, repeat=3):
+    """
+    Compara las HASH_FUNCTIONS sobre el vocabulario real (a8_diccionario_hash.bin
+    o, si no existe, a9_diccionario_refinado.bin): tokens por segundo y, para
+    cada tamaño de tabla, posiciones hash distintas ocupadas y sondeos promedio
+    y máximo con direccionamiento abierto (después de mix64, como en la tabla).
+    Escribe el reporte y devuelve las filas.
     """
-    from pathlib import Path
-    import re
-    
-    # Convertir a minúsculas para coincidir con el diccionario
-    word = word.lower().strip()
-    
-    # Separar en términos individuales (por espacios). Ej: "exploitation hygiene"
-    terms = [t for t in word.split() if t]
-    if not terms:
-        return []
-    
     base_dir = Path(output_dir)
-    EMPTY_SLOT_INDICATOR = "vacio"
-    
-    # Seleccionar archivos según si se usa stoplist o no
-    if use_stoplist:
-        dict_file = base_dir / "a9_diccionario_refinado.txt"
-        posting_file = base_dir / "a9_posting.txt"
-    else:
-        dict_file = base_dir / "a8_diccionario_hash.txt"
-        posting_file = base_dir / "a8_posting.txt"
-    
-    # Verificar que los archivos existan
-    if not dict_file.exists():
-        print(f"Error: No se encontró el archivo de diccionario: {dict_file}")
-        return []
-    
-    if not posting_file.exists():
-        print(f"Error: No se encontró el archivo de posting: {posting_file}")
-        return []
-    
-    # Función interna: busca UN solo término recorriendo diccionario y posting en disco
-    def _search_single_term(term: str):
-        posting_offset = 0      # Número de entradas en posting antes de este token
-        num_docs = 0            # Número de documentos donde aparece el término
-        found = False
-        
-        # Paso 1: Recorrer el diccionario para localizar el término y su posición en posting
-        with open(dict_file, 'r', encoding='utf-8') as f_dict:
-            for line in f_dict:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                match = re.search(
-                    r'Posición Hash: \d+, Token: ([^,]+), Frecuencia: \d+, Archivos: (\d+), Posición Posting: -?\d+',
-                    line
-                )
-                if not match:
-                    continue
-                
-                token, archivos_str = match.groups()
-                token = token.strip()
-                archivos = int(archivos_str)
-                
-                if token == EMPTY_SLOT_INDICATOR or archivos <= 0:
-                    continue
-                
-                if token == term:
-                    num_docs = archivos
-                    found = True
-                    break
-                
-                # Para cualquier otro token válido, acumulamos su número de documentos
-                posting_offset += archivos
-        
-        if not found or num_docs <= 0:
-            return set()
-        
-        # Paso 2: Leer SOLO las líneas correspondientes a este término en el posting
-        docs_for_term = set()
-        with open(posting_file, 'r', encoding='utf-8') as f_post:
-            for i, line in enumerate(f_post):
-                if i < posting_offset:
-                    continue
-                if i >= posting_offset + num_docs:
-                    break
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                parts = line.split(';')
-                if len(parts) >= 1:
-                    doc_name = parts[0].strip()
-                    if doc_name:
-                        docs_for_term.add(doc_name)
-        
-        return docs_for_term
+    report_file = base_dir / "reports" / "hash_benchmark.txt"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    table_file = base_dir / "a8_diccionario_hash.bin"
+    if not table_file.exists():
+        table_file = base_dir / "a9_diccionario_refinado.bin"
+    keys = [key for key in HashDictionary.load(table_file).keys if key is not None]
+
+    if table_sizes is None:
+        # The size activities 8 and 9 end up with, and two larger ones
+        capacity = 1 << max(math.ceil(math.log2(len(keys) / HASH_MAX_LOAD)), 1)
+        table_sizes = (capacity, capacity * 2, capacity * 4)
+
+    rows = []  # [(función, tokens/s, [(tamaño, ocupación, promedio, máximo)])]
+    for name, hash_func in HASH_FUNCTIONS.items():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hashes = [hash_func(key) for key in keys]
+            best = min(best, time.perf_counter() - start)
+        mixed = [mix64(hash_value) for hash_value in hashes]
+
+        sizes = []
+        for size in table_sizes:
+            table = HashDictionary(0, size, name)
+            for key, hash_value in zip(keys, mixed):
+                table._insert(key, hash_value, ())
+            occupancy = len({hash_value & table._mask for hash_value in mixed}) / size
+            sizes.append((size, occupancy, *table.probe_summary()))
+        rows.append((name, len(keys) / best, sizes))
+
+    log_lines = [
+        "=== COMPARACIÓN DE FUNCIONES HASH ===",
+        f"Fecha: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Vocabulario: {len(keys)} tokens ({table_file})",
+        f"PYTHONHASHSEED fijo: {'sí' if builtin_hash_is_fixed() else 'no'}",
+        "",
+        f"{'Función':<10}{'Tokens/s':>12}{'Tamaño':>10}{'Carga':>8}{'Ocupación':>11}{'Promedio':>10}{'Máximo':>8}",
+    ]
+    for name, throughput, sizes in rows:
+        for i, (size, occupancy, mean, longest) in enumerate(sizes):
+            label, rate = (name, f"{throughput:.0f}") if i == 0 else ('', '')
+            log_lines.append(f"{label:<10}{rate:>12}{size:>10}{len(keys) / size:>8.2%}"
+                             f"{occupancy:>11.2%}{mean:>10.3f}{longest:>8}")
+
+    with open(report_file, 'w', encoding='utf-8') as log:
+        log.write('\n'.join(log_lines))
+    print('\n'.join(log_lines))
+    print(f"Reporte: {report_file}")
+    return rows
+
+
+# --- Hash perfecto mínimo (CHD: hash and displace) ---
+# Para un vocabulario fijo: cada token cae en un bucket (unos MPHF_BUCKET_SIZE
+# tokens por bucket) y cada bucket guarda un desplazamiento d = d0 * n + d1
+# que lleva a todos sus tokens a posiciones libres distintas de 0..n-1:
+#   posición = (f1 + d0 * f2 + d1) % n
+# Los buckets se colocan de mayor a menor; d1 solo se prueba para las
+# posiciones libres del primer token y los buckets de un solo token toman
+# directamente una posición libre. Cada búsqueda es un hash, un
+# desplazamiento y una posición del arreglo denso, donde se compara el token
+# guardado para descartar los que no son del vocabulario. Si algún bucket no
+# encuentra lugar en MPHF_MAX_D0 intentos se vuelve a empezar con otra semilla.
+#   cabecera | desplazamientos | columnas de valores | longitud de cada token | pool de tokens
+MPHF_BUCKET_SIZE = 4
+MPHF_MAX_D0 = 64
+MPHF_MAGIC = b"HTMPH001"
+MPHF_HEADER = struct.Struct('<8sIIII')  # magic, seed, num_keys, num_buckets, num_values
+MPHF_KEY_HASH = struct.Struct('<QQQ')   # bucket, f1, f2
+
+
+def mphf_hashes(key, seed=0):
+    """(bucket, f1, f2) del token: 24 bytes de BLAKE2b con la semilla como salt."""
+    return MPHF_KEY_HASH.unpack(hashlib.blake2b(key.encode('utf-8'), digest_size=MPHF_KEY_HASH.size,
+                                                salt=seed.to_bytes(16, 'little')).digest())
+
+
+class PerfectHashDictionary(Dictionary):
+    """
+    Diccionario de solo lectura token -> num_values enteros sobre un hash
+    perfecto mínimo: n tokens en exactamente n posiciones, sin posiciones vacías.
+    """
+
+    def __init__(self, seed, displacements, values, key_pool, key_offsets):
+        self.seed = seed
+        self.displacements = displacements  # array 'Q', uno por bucket
+        self.values = values                # una array 'q' de n valores por columna
+        self.num_values = len(values)
+        self.count = len(key_offsets) - 1
+        self._key_pool = key_pool
+        self._key_offsets = key_offsets
+
+    @classmethod
+    def build(cls, items, num_values):
+        """Construye la tabla a partir de [(token, valores)] sin tokens repetidos."""
+        items = list(items)
+        seed = 0
+        placement = cls._place_keys(items, seed)
+        while placement is None:
+            seed += 1
+            placement = cls._place_keys(items, seed)
+        displacements, slot_of = placement
+
+        order = [0] * len(items)
+        for i, slot in enumerate(slot_of):
+            order[slot] = i
+        values = [array('q', (items[i][1][column] for i in order)) for column in range(num_values)]
+        encoded = [items[i][0].encode('utf-8') for i in order]
+        key_offsets = array('Q', [0])
+        key_offsets.extend(accumulate(len(key) for key in encoded))
+        return cls(seed, displacements, values, b''.join(encoded), key_offsets)
+
+    @classmethod
+    def _place_keys(cls, items, seed):
+        """(desplazamientos, posición de cada token) con esa semilla, o None si un bucket no cabe."""
+        n = len(items)
+        num_buckets = max(1, -(-n // MPHF_BUCKET_SIZE))
+        hashes = [mphf_hashes(key, seed) for key, _ in items]
+        buckets = [[] for _ in range(num_buckets)]
+        for i, (bucket, _, _) in enumerate(hashes):
+            buckets[bucket % num_buckets].append(i)
+
+        displacements = array('Q', bytes(8 * num_buckets))
+        slot_of = [0] * n
+        taken = bytearray(n)
+        free_slots = list(range(n))  # unordered; free_index[slot] is the slot's place in it
+        free_index = list(range(n))
+        for bucket in sorted(range(num_buckets), key=lambda b: -len(buckets[b])):
+            members = buckets[bucket]
+            if not members:
+                break  # the remaining buckets are empty too
+            if len(members) == 1:
+                slot, (_, f1, _) = free_slots[-1], hashes[members[0]]
+                displacement = (slot - f1) % n
+                positions = [slot]
+            else:
+                placement = cls._place_bucket([hashes[i] for i in members], taken, free_slots, n)
+                if placement is None:
+                    return None
+                displacement, positions = placement
+            displacements[bucket] = displacement
+            for i, slot in zip(members, positions):
+                taken[slot] = 1
+                slot_of[i] = slot
+                # Swap-remove the slot from free_slots
+                last = free_slots.pop()
+                if last != slot:
+                    free_slots[free_index[slot]] = last
+                    free_index[last] = free_index[slot]
+        return displacements, slot_of
+
+    @staticmethod
+    def _place_bucket(hashes, taken, free_slots, n):
+        """
+        Primer desplazamiento d0 * n + d1 que deja los tokens del bucket en
+        posiciones libres distintas, con sus posiciones; None si no hay.
+        """
+        for d0 in range(MPHF_MAX_D0):
+            first, *rest = [(f1 + d0 * f2) % n for _, f1, f2 in hashes]
+            if len({first, *rest}) == len(hashes):
+                for slot in free_slots:
+                    d1 = (slot - first) % n
+                    if not any(taken[(position + d1) % n] for position in rest):
+                        return d0 * n + d1, [slot] + [(position + d1) % n for position in rest]
+        return None
+
+    def __len__(self):
+        return self.count
+
+    def find(self, key):
+        """Devuelve la posición del token o -1 si no es del vocabulario."""
+        n = self.count
+        if not n:
+            return -1
+        bucket, f1, f2 = mphf_hashes(key, self.seed)
+        d0, d1 = divmod(self.displacements[bucket % len(self.displacements)], n)
+        slot = (f1 + d0 * f2 + d1) % n
+        if self._key_pool[self._key_offsets[slot]:self._key_offsets[slot + 1]] != key.encode('utf-8'):
+            return -1
+        return slot
+
+    def get(self, key, default=None):
+        """Tupla con los valores del token, o default si no existe."""
+        slot = self.find(key)
+        if slot < 0:
+            return default
+        return tuple(column[slot] for column in self.values)
+
+    def __contains__(self, key):
+        return self.find(key) >= 0
+
+    def prefix(self, prefix):
+        """[(token, valores)] de los tokens que empiezan con prefix; recorre todas las posiciones."""
+        encoded = prefix.encode('utf-8')
+        pool, offsets = self._key_pool, self._key_offsets
+        return sorted((self.key_at(slot), tuple(column[slot] for column in self.values))
+                      for slot in range(self.count) if pool.startswith(encoded, offsets[slot], offsets[slot + 1]))
+
+    def key_at(self, slot):
+        return self._key_pool[self._key_offsets[slot]:self._key_offsets[slot + 1]].decode('utf-8')
+
+    def slots(self):
+        """Itera (posición, token, valores) de las n posiciones."""
+        for slot in range(self.count):
+            yield slot, self.key_at(slot), tuple(column[slot] for column in self.values)
+
+    def report_lines(self):
+        """Líneas de reporte del hash perfecto."""
+        size = (MPHF_HEADER.size + 8 * len(self.displacements) + 8 * self.num_values * self.count
+                + 4 * self.count + len(self._key_pool))
+        return [
+            f"Hash perfecto mínimo: {self.count} tokens en {self.count} posiciones, "
+            f"{len(self.displacements)} buckets",
+            f"Tamaño en disco: {size} bytes ({size / (self.count or 1):.1f} bytes por token), 1 sondeo por búsqueda",
+        ]
+
+    def save(self, table_file):
+        """Escribe desplazamientos, columnas de valores y tokens."""
+        lengths = array('I', (end - start for start, end in zip(self._key_offsets, self._key_offsets[1:])))
+        table_file = Path(table_file)
+        tmp_file = table_file.with_name(table_file.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(MPHF_HEADER.pack(MPHF_MAGIC, self.seed, self.count, len(self.displacements), self.num_values))
+            write_arrays(f, [self.displacements, *self.values, lengths])
+            f.write(self._key_pool)
+        os.replace(tmp_file, table_file)
+
+    @classmethod
+    def load(cls, table_file):
+        """Lee una tabla escrita con save."""
+        data = Path(table_file).read_bytes()
+        magic, seed, count, num_buckets, num_values = MPHF_HEADER.unpack_from(data, 0)
+        if magic != MPHF_MAGIC:
+            raise ValueError(f"{table_file} no es un hash perfecto válido")
+        (displacements, *values, lengths), offset = read_arrays(
+            data, MPHF_HEADER.size, [('Q', num_buckets)] + [('q', count)] * num_values + [('I', count)])
+        key_offsets = array('Q', [0])
+        key_offsets.extend(accumulate(lengths))
+        return cls(seed, displacements, values, data[offset:], key_offsets)
+
+
+# --- Diccionario ordenado con índice de bloques ---
+# Los tokens ordenados van concatenados en un solo str (con sus offsets) y en
+# memoria solo se guarda el primer token de cada bloque de DICT_BLOCK_SIZE:
+# la búsqueda es bisect sobre esos tokens y después binaria dentro del bloque.
+# En disco:
+#   cabecera | offsets (en caracteres) | columnas de valores | tokens en UTF-8
+DICT_BLOCK_SIZE = 64
+SORTED_DICT_MAGIC = b"HTSAD001"
+SORTED_DICT_HEADER = struct.Struct('<8sIII')  # magic, num_terms, num_values, block_size
+
+
+class SortedArrayDictionary(Dictionary):
+    """Tokens ordenados en un arreglo con búsqueda binaria e índice disperso de bloques."""
+
+    def __init__(self, pool, offsets, values, block_size=DICT_BLOCK_SIZE):
+        self._pool = pool          # str con todos los tokens concatenados
+        self._offsets = offsets    # array 'I' de n + 1 offsets en _pool
+        self.values = values       # una array 'q' por columna, en orden de token
+        self.block_size = block_size
+        self.count = len(offsets) - 1
+        self._leaders = [self.key_at(i) for i in range(0, self.count, block_size)]
+
+    @classmethod
+    def build(cls, items, num_values, block_size=DICT_BLOCK_SIZE):
+        items = sorted(items)
+        offsets = array('I', [0])
+        offsets.extend(accumulate(len(key) for key, _ in items))
+        values = [array('q', (item_values[column] for _, item_values in items)) for column in range(num_values)]
+        return cls(''.join(key for key, _ in items), offsets, values, block_size)
+
+    def __len__(self):
+        return self.count
+
+    def key_at(self, i):
+        return self._pool[self._offsets[i]:self._offsets[i + 1]]
+
+    def _lower_bound(self, key):
+        """Posición del primer token >= key."""
+        block = max(bisect.bisect_right(self._leaders, key) - 1, 0)
+        lo = block * self.block_size
+        hi = min(lo + self.block_size, self.count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, key, default=None):
+        i = self._lower_bound(key)
+        if i < self.count and self.key_at(i) == key:
+            return tuple(column[i] for column in self.values)
+        return default
+
+    def prefix(self, prefix):
+        result = []
+        i = self._lower_bound(prefix)
+        while i < self.count:
+            key = self.key_at(i)
+            if not key.startswith(prefix):
+                break
+            result.append((key, tuple(column[i] for column in self.values)))
+            i += 1
+        return result
+
+    def save(self, dictionary_file):
+        """Escribe la cabecera, los offsets, las columnas de valores y los tokens."""
+        dictionary_file = Path(dictionary_file)
+        tmp_file = dictionary_file.with_name(dictionary_file.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(SORTED_DICT_HEADER.pack(SORTED_DICT_MAGIC, self.count, len(self.values), self.block_size))
+            write_arrays(f, [self._offsets, *self.values])
+            f.write(self._pool.encode('utf-8'))
+        os.replace(tmp_file, dictionary_file)
+
+    @classmethod
+    def load(cls, dictionary_file):
+        """Lee un diccionario escrito con save."""
+        data = Path(dictionary_file).read_bytes()
+        magic, count, num_values, block_size = SORTED_DICT_HEADER.unpack_from(data, 0)
+        if magic != SORTED_DICT_MAGIC:
+            raise ValueError(f"{dictionary_file} no es un diccionario ordenado válido")
+        (offsets, *values), offset = read_arrays(data, SORTED_DICT_HEADER.size,
+                                                 [('I', count + 1)] + [('q', count)] * num_values)
+        return cls(data[offset:].decode('utf-8'), offsets, values, block_size)
+
+
+# --- Trie compacto ---
+# Trie con caminos comprimidos (cada arista lleva una cadena, no una letra)
+# guardado en arreglos paralelos por nodo. Los hijos de cada nodo son
+# consecutivos y están ordenados por su primera letra, así que se eligen con
+# bisect sobre first_char. En disco van los mismos arreglos:
+#   cabecera | offsets de etiquetas | first_char | first_child | num_children | value_index | valores | etiquetas
+TRIE_DICT_MAGIC = b"HTTRI001"
+TRIE_DICT_HEADER = struct.Struct('<8sIII')  # magic, num_nodes, num_terms, num_values
+
+
+class TrieDictionary(Dictionary):
+    """Trie compacto (radix) sobre arreglos paralelos."""
+
+    def __init__(self, label_pool, label_offsets, first_char, first_child, num_children, value_index, values):
+        self._label_pool = label_pool        # str con la etiqueta de la arista que llega a cada nodo
+        self._label_offsets = label_offsets  # array 'I' de num_nodes + 1 offsets en _label_pool
+        self._first_char = first_char        # array 'I': primera letra de la etiqueta de cada nodo
+        self._first_child = first_child      # array 'I'
+        self._num_children = num_children    # array 'I'
+        self._value_index = value_index      # array 'i': posición del token en values, -1 si el nodo no es un token
+        self.values = values
+        self.count = len(values[0]) if values else sum(1 for i in value_index if i >= 0)
+
+    @classmethod
+    def build(cls, items, num_values):
+        items = sorted(items)
+        keys = [key for key, _ in items]
+        labels = ['']
+        first_char = array('I', [0])
+        first_child = array('I', [0])
+        num_children = array('I', [0])
+        value_index = array('i', [-1])
+
+        # Breadth-first, so that the children of every node get consecutive ids
+        queue = [(0, 0, len(keys), 0)]  # (node, lo, hi, depth): keys[lo:hi] share their first depth letters
+        for node, lo, hi, depth in queue:
+            if lo < hi and len(keys[lo]) == depth:
+                value_index[node] = lo
+                lo += 1
+            first_child[node] = len(labels)
+            start = lo
+            while start < hi:
+                char = keys[start][depth]
+                end = start + 1
+                while end < hi and keys[end][depth] == char:
+                    end += 1
+                # The child's label is the common prefix of the whole group (first and last key, as they are sorted)
+                first, last = keys[start], keys[end - 1]
+                length = depth + 1
+                while length < len(first) and length < len(last) and first[length] == last[length]:
+                    length += 1
+                child = len(labels)
+                labels.append(first[depth:length])
+                first_char.append(ord(char))
+                first_child.append(0)
+                num_children.append(0)
+                value_index.append(-1)
+                queue.append((child, start, end, length))
+                start = end
+            num_children[node] = len(labels) - first_child[node]
+
+        label_offsets = array('I', [0])
+        label_offsets.extend(accumulate(len(label) for label in labels))
+        values = [array('q', (item_values[column] for _, item_values in items)) for column in range(num_values)]
+        return cls(''.join(labels), label_offsets, first_char, first_child, num_children, value_index, values)
+
+    def __len__(self):
+        return self.count
+
+    def _label(self, node):
+        return self._label_pool[self._label_offsets[node]:self._label_offsets[node + 1]]
+
+    def _child(self, node, char):
+        """Hijo del nodo cuya etiqueta empieza con char, o -1."""
+        lo = self._first_child[node]
+        hi = lo + self._num_children[node]
+        i = bisect.bisect_left(self._first_char, ord(char), lo, hi)
+        if i < hi and self._first_char[i] == ord(char):
+            return i
+        return -1
+
+    def get(self, key, default=None):
+        node = pos = 0
+        while pos < len(key):
+            node = self._child(node, key[pos])
+            if node < 0:
+                return default
+            label = self._label(node)
+            if not key.startswith(label, pos):
+                return default
+            pos += len(label)
+        i = self._value_index[node]
+        if i < 0:
+            return default
+        return tuple(column[i] for column in self.values)
+
+    def prefix(self, prefix):
+        node = pos = 0
+        path = ''
+        while pos < len(prefix):
+            node = self._child(node, prefix[pos])
+            if node < 0:
+                return []
+            label = self._label(node)
+            rest = prefix[pos:]
+            if not (label.startswith(rest) or rest.startswith(label)):
+                return []
+            path += label
+            pos += len(label)
+
+        # Depth-first in child order gives the tokens in alphabetical order
+        result = []
+        stack = [(node, path)]
+        while stack:
+            node, path = stack.pop()
+            i = self._value_index[node]
+            if i >= 0:
+                result.append((path, tuple(column[i] for column in self.values)))
+            first = self._first_child[node]
+            for child in range(first + self._num_children[node] - 1, first - 1, -1):
+                stack.append((child, path + self._label(child)))
+        return result
+
+    def save(self, dictionary_file):
+        """Escribe la cabecera, los arreglos por nodo, los valores y las etiquetas."""
+        dictionary_file = Path(dictionary_file)
+        tmp_file = dictionary_file.with_name(dictionary_file.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(TRIE_DICT_HEADER.pack(TRIE_DICT_MAGIC, len(self._first_char), self.count, len(self.values)))
+            write_arrays(f, [self._label_offsets, self._first_char, self._first_child, self._num_children,
+                             self._value_index, *self.values])
+            f.write(self._label_pool.encode('utf-8'))
+        os.replace(tmp_file, dictionary_file)
+
+    @classmethod
+    def load(cls, dictionary_file):
+        """Lee un trie escrito con save."""
+        data = Path(dictionary_file).read_bytes()
+        magic, num_nodes, count, num_values = TRIE_DICT_HEADER.unpack_from(data, 0)
+        if magic != TRIE_DICT_MAGIC:
+            raise ValueError(f"{dictionary_file} no es un trie válido")
+        layout = [('I', num_nodes + 1), ('I', num_nodes), ('I', num_nodes), ('I', num_nodes),
+                  ('i', num_nodes)] + [('q', count)] * num_values
+        (label_offsets, first_char, first_child, num_children, value_index, *values), offset = \
+            read_arrays(data, TRIE_DICT_HEADER.size, layout)
+        return cls(data[offset:].decode('utf-8'), label_offsets, first_char, first_child, num_children,
+                   value_index, values)
+
+
+# --- Diccionario con front coding por bloques ---
+# Los tokens ordenados se agrupan en bloques de FRONT_CODING_BLOCK_SIZE. Cada
+# token guarda solo cuántos bytes comparte con el anterior del bloque y el
+# resto (el primero de cada bloque va completo), seguidos de sus valores, todo
+# en variable byte:
+#   prefijo compartido | largo del sufijo | sufijo UTF-8 | valores
+# En memoria solo quedan el offset y el primer token de cada bloque; una
+# búsqueda hace bisect sobre esos tokens y decodifica un solo bloque.
+# Los offsets van al final para poder escribir los bloques a medida que se
+# codifican (FrontCodedWriter):
+#   cabecera | bloques | offset de cada bloque
+FRONT_CODING_BLOCK_SIZE = 16
+FRONT_CODING_MAGIC = b"HTFCD002"
+FRONT_CODING_MAGIC_V1 = b"HTFCD001"  # offsets antes de los bloques
+FRONT_CODING_HEADER = struct.Struct('<8sIII')  # magic, num_terms, num_values, block_size
+
+
+def front_code_entry(out, previous, key, values):
+    """Agrega a out la entrada de key (bytes) con el prefijo que comparte con previous."""
+    shared = 0
+    limit = min(len(previous), len(key))
+    while shared < limit and previous[shared] == key[shared]:
+        shared += 1
+    vbyte_encode((shared, len(key) - shared), out)
+    out += key[shared:]
+    vbyte_encode(values, out)
+
+
+class FrontCodedWriter:
+    """
+    Escribe un diccionario con front coding a partir de tokens ya ordenados
+    (orden de bytes UTF-8), sin tenerlos todos en memoria: cada bloque se
+    escribe al completarse y solo se guardan los offsets de los bloques. El
+    archivo final aparece con close(); discard() borra el temporal.
+    """
+
+    def __init__(self, dictionary_file, num_values, block_size=FRONT_CODING_BLOCK_SIZE):
+        self.dictionary_file = Path(dictionary_file)
+        self.num_values = num_values
+        self.block_size = block_size
+        self.count = 0
+        self._block_offsets = array('Q')
+        self._block = bytearray()
+        self._data_size = 0
+        self._previous = b''
+        self._tmp_file = self.dictionary_file.with_name(self.dictionary_file.name + '.tmp')
+        self._file = open(self._tmp_file, 'wb')
+        self._file.write(bytes(FRONT_CODING_HEADER.size))  # rewritten by close()
+
+    def add(self, key, values):
+        encoded = key.encode('utf-8')
+        if self.count and encoded <= self._previous:
+            raise ValueError(f"Los tokens del diccionario no están ordenados: {key!r}")
+        if self.count % self.block_size == 0:
+            self._flush_block()
+            self._block_offsets.append(self._data_size)
+            previous = b''
+        else:
+            previous = self._previous
+        front_code_entry(self._block, previous, encoded, values)
+        self._previous = encoded
+        self.count += 1
+
+    def _flush_block(self):
+        self._file.write(self._block)
+        self._data_size += len(self._block)
+        self._block.clear()
+
+    def close(self):
+        """Escribe el último bloque, los offsets y la cabecera, y reemplaza el archivo."""
+        self._flush_block()
+        write_arrays(self._file, [self._block_offsets])
+        self._file.seek(0)
+        self._file.write(FRONT_CODING_HEADER.pack(FRONT_CODING_MAGIC, self.count, self.num_values, self.block_size))
+        self._file.close()
+        os.replace(self._tmp_file, self.dictionary_file)
+
+    def discard(self):
+        self._file.close()
+        self._tmp_file.unlink(missing_ok=True)
+
+
+class FrontCodedDictionary(Dictionary):
+    """Diccionario ordenado comprimido con front coding por bloques."""
+
+    def __init__(self, data, block_offsets, count, num_values, block_size=FRONT_CODING_BLOCK_SIZE):
+        self._data = data                    # bytes con todos los bloques
+        self._block_offsets = block_offsets  # array 'Q' con el inicio de cada bloque en _data
+        self.count = count
+        self.num_values = num_values
+        self.block_size = block_size
+        # First token of every block (stored whole), as UTF-8 bytes so that comparisons follow the file order
+        self._leaders = [self._decode_entry(offset, b'')[0] for offset in block_offsets]
+
+    @classmethod
+    def build(cls, items, num_values, block_size=FRONT_CODING_BLOCK_SIZE):
+        data = bytearray()
+        block_offsets = array('Q')
+        previous = b''
+        count = 0
+        for i, (key, values) in enumerate(sorted(items)):
+            encoded = key.encode('utf-8')
+            if i % block_size == 0:
+                block_offsets.append(len(data))
+                previous = b''
+            front_code_entry(data, previous, encoded, values)
+            previous = encoded
+            count += 1
+        return cls(bytes(data), block_offsets, count, num_values, block_size)
+
+    def _decode_entry(self, offset, previous):
+        """(token en bytes, valores, offset siguiente) de la entrada en offset."""
+        (shared, suffix_length), offset = vbyte_decode(self._data, offset, 2)
+        key = previous[:shared] + self._data[offset:offset + suffix_length]
+        values, offset = vbyte_decode(self._data, offset + suffix_length, self.num_values)
+        return key, tuple(values), offset
+
+    def _block_entries(self, block):
+        """Itera (token en bytes, valores) de un bloque."""
+        offset = self._block_offsets[block]
+        key = b''
+        for _ in range(min(self.block_size, self.count - block * self.block_size)):
+            key, values, offset = self._decode_entry(offset, key)
+            yield key, values
+
+    def __len__(self):
+        return self.count
+
+    def get(self, key, default=None):
+        encoded = key.encode('utf-8')
+        block = bisect.bisect_right(self._leaders, encoded) - 1
+        if block < 0:
+            return default
+        for entry_key, values in self._block_entries(block):
+            if entry_key == encoded:
+                return values
+            if entry_key > encoded:
+                break
+        return default
+
+    def prefix(self, prefix):
+        encoded = prefix.encode('utf-8')
+        result = []
+        for block in range(max(bisect.bisect_right(self._leaders, encoded) - 1, 0), len(self._leaders)):
+            for entry_key, values in self._block_entries(block):
+                if entry_key.startswith(encoded):
+                    result.append((entry_key.decode('utf-8'), values))
+                elif entry_key > encoded:
+                    return result
+        return result
+
+    def save(self, dictionary_file):
+        """Escribe la cabecera, los bloques y los offsets de los bloques."""
+        dictionary_file = Path(dictionary_file)
+        tmp_file = dictionary_file.with_name(dictionary_file.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(FRONT_CODING_HEADER.pack(FRONT_CODING_MAGIC, self.count, self.num_values, self.block_size))
+            f.write(self._data)
+            write_arrays(f, [self._block_offsets])
+        os.replace(tmp_file, dictionary_file)
+
+    @classmethod
+    def load(cls, dictionary_file):
+        """Lee un diccionario escrito con save o FrontCodedWriter (o con offsets al principio)."""
+        data = Path(dictionary_file).read_bytes()
+        magic, count, num_values, block_size = FRONT_CODING_HEADER.unpack_from(data, 0)
+        if magic not in (FRONT_CODING_MAGIC, FRONT_CODING_MAGIC_V1):
+            raise ValueError(f"{dictionary_file} no es un diccionario con front coding válido")
+        num_blocks = -(-count // block_size)
+        if magic == FRONT_CODING_MAGIC_V1:
+            offsets_start = FRONT_CODING_HEADER.size
+            blocks = data[offsets_start + 8 * num_blocks:]
+        else:
+            offsets_start = len(data) - 8 * num_blocks
+            blocks = data[FRONT_CODING_HEADER.size:offsets_start]
+        (block_offsets,), _ = read_arrays(data, offsets_start, [('Q', num_blocks)])
+        return cls(blocks, block_offsets, count, num_values, block_size)
+
+
+DICTIONARY_BACKENDS = {
+    'hash': HashDictionary,
+    'mphf': PerfectHashDictionary,
+    'sorted': SortedArrayDictionary,
+    'trie': TrieDictionary,
+    'front': FrontCodedDictionary,
+}
+
+
+def benchmark_dictionaries(output_dir="results", num_queries=20000, num_prefixes=50, repeat=3):
+    """
+    Compara los DICTIONARY_BACKENDS sobre el vocabulario de a7_Diccionario.txt
+    (token -> repeticiones, documentos): tiempo de construcción, memoria
+    (tracemalloc), búsqueda exacta (aciertos y fallos) y búsqueda por prefijo.
+    Escribe el reporte y devuelve las filas.
+    """
+    import random
+    import tracemalloc
+
+    base_dir = Path(output_dir)
+    dict_file = base_dir / "dictionary_posting" / "a7_Diccionario.txt"
+    report_file = base_dir / "reports" / "dictionary_benchmark.txt"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+
+    items = []
+    with open(dict_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip().split(';')
+            if len(parts) >= 3:
+                items.append((parts[0], (int(parts[1]), int(parts[2]))))
+
+    rng = random.Random(0)
+    keys = [key for key, _ in items]
+    hits = rng.sample(keys, min(num_queries, len(keys)))
+    misses = [key + 'ñq' for key in hits]
+    prefixes = [key[:rng.randint(1, 4)] for key in rng.sample(keys, min(num_prefixes, len(keys)))]
+
+    def best_of(func):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    rows = []  # [(backend, s construcción, bytes, µs por búsqueda exacta, µs por prefijo)]
+    expected = None
+    for name, backend in DICTIONARY_BACKENDS.items():
+        build_time = best_of(lambda: backend.build(items, 2))
+        tracemalloc.start()
+        dictionary = backend.build(items, 2)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        lookup_time = best_of(lambda: [dictionary.get(key) for key in hits + misses])
+        prefix_time = best_of(lambda: [dictionary.prefix(prefix) for prefix in prefixes])
+        # Every backend has to return the same answers
+        answers = ([dictionary.get(key) for key in hits + misses], [dictionary.prefix(prefix) for prefix in prefixes])
+        if expected is None:
+            expected = answers
+        elif answers != expected:
+            raise AssertionError(f"El diccionario {name} no devuelve los mismos resultados")
+        rows.append((name, build_time, memory, lookup_time / len(hits + misses) * 1e6,
+                     prefix_time / len(prefixes) * 1e6))
+
+    log_lines = [
+        "=== COMPARACIÓN DE DICCIONARIOS ===",
+        f"Fecha: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Vocabulario: {len(items)} tokens ({dict_file})",
+        f"Búsquedas exactas: {len(hits)} aciertos y {len(misses)} fallos; prefijos: {len(prefixes)}",
+        "",
+        f"{'Diccionario':<12}{'Construcción (s)':>18}{'Memoria (bytes)':>17}{'Exacta (µs)':>13}{'Prefijo (µs)':>14}",
+    ]
+    for name, build_time, memory, lookup_us, prefix_us in rows:
+        log_lines.append(f"{name:<12}{build_time:>18.3f}{memory:>17}{lookup_us:>13.2f}{prefix_us:>14.1f}")
+
+    with open(report_file, 'w', encoding='utf-8') as log:
+        log.write('\n'.join(log_lines))
+    print('\n'.join(log_lines))
+    print(f"Reporte: {report_file}")
+    return rows
+
+
+# Formato de cada línea de los diccionarios hash de las actividades 8 y 9
+DICT_HASH_LINE_RE = re.compile(
+    r'Posición Hash: \d+, Token: ([^,]+), Frecuencia: (\d+), Archivos: (\d+), '
+    r'Posición Posting: (-?\d+)(?:, Longitud Posting: (\d+))?'
+)
+
+
+# --- Consultas booleanas ---
+# Gramática (los operadores van en mayúsculas; "and", "or" y "not" en
+# minúsculas son términos normales):
+#   expresion := termino_y ([OR] termino_y)*      palabras seguidas sin operador = OR
+#   termino_y := negacion (AND negacion)*
+#   negacion  := NOT negacion | '(' expresion ')' | palabra
+# El árbol resultante usa tuplas: ('term', t), ('and', [hijos]), ('or', [hijos]), ('not', hijo).
+QUERY_TOKEN_RE = re.compile(r'[()]|[^\s()]+')
+QUERY_OPERATORS = ('AND', 'OR', 'NOT')
+
+
+class QuerySyntaxError(ValueError):
+    """La consulta booleana no está bien formada."""
+
+
+def parse_query(query):
+    """Convierte la consulta en un árbol booleano, o None si no tiene términos."""
+    tokens = QUERY_TOKEN_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def parse_or():
+        nonlocal pos
+        children = [parse_and()]
+        while peek() is not None and peek() != ')':
+            if peek() == 'OR':
+                pos += 1
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else ('or', children)
+
+    def parse_and():
+        nonlocal pos
+        children = [parse_not()]
+        while peek() == 'AND':
+            pos += 1
+            children.append(parse_not())
+        return children[0] if len(children) == 1 else ('and', children)
+
+    def parse_not():
+        nonlocal pos
+        token = peek()
+        if token is None or token == ')' or token in ('AND', 'OR'):
+            raise QuerySyntaxError(f"Se esperaba un término en la posición {pos + 1} de la consulta")
+        pos += 1
+        if token == 'NOT':
+            return ('not', parse_not())
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise QuerySyntaxError("Falta cerrar un paréntesis en la consulta")
+            pos += 1
+            return node
+        return ('term', token.lower())
+
+    if not tokens:
+        return None
+    node = parse_or()
+    if pos < len(tokens):
+        raise QuerySyntaxError("Paréntesis de cierre sin abrir en la consulta")
+    return node
+
+
+def gallop_to(seq, target, lo=0):
+    """Primer índice i >= lo con seq[i] >= target (búsqueda exponencial y después binaria)."""
+    n = len(seq)
+    hi = lo
+    step = 1
+    while hi < n and seq[hi] < target:
+        lo = hi + 1
+        hi += step
+        step *= 2
+    return bisect.bisect_left(seq, target, lo, min(hi, n))
+
+
+def intersect_sorted(small, large):
+    """Intersección de dos secuencias ordenadas; recorre small y salta sobre large."""
+    result = []
+    i = 0
+    n = len(large)
+    for doc in small:
+        i = gallop_to(large, doc, i)
+        if i == n:
+            break
+        if large[i] == doc:
+            result.append(doc)
+            i += 1
+    return result
+
+
+def difference_sorted(docs, excluded):
+    """Elementos de docs que no están en excluded (ambas ordenadas)."""
+    result = []
+    i = 0
+    n = len(excluded)
+    for doc in docs:
+        i = gallop_to(excluded, doc, i)
+        if i == n or excluded[i] != doc:
+            result.append(doc)
+    return result
+
+
+def union_sorted(sequences):
+    """Unión ordenada y sin duplicados de varias secuencias ordenadas."""
+    return [doc for doc, _ in groupby(heapq.merge(*sequences))]
+
+
+def evaluate_query(node, index):
+    """
+    Evalúa un árbol de parse_query sobre un índice y devuelve la lista ordenada de doc_ids.
+
+    El índice debe ofrecer doc_frequency(term), posting_ids(term) (ordenados
+    por doc_id), all_doc_ids() y doc_name(doc_id). En un AND los hijos se
+    intersectan empezando por el de menor df, y las listas más largas solo se
+    recorren con saltos (gallop_to), sin decodificarlas completas.
+    """
+    kind = node[0]
+    if kind == 'term':
+        return index.posting_ids(node[1])
+    if kind == 'not':
+        return difference_sorted(index.all_doc_ids(), evaluate_query(node[1], index))
+    if kind == 'or':
+        return union_sorted([evaluate_query(child, index) for child in node[1]])
+
+    # df comes from the dictionary, so terms are ordered without reading their postings;
+    # subexpressions are evaluated once and ordered by their actual size
+    positives = []
+    for child in node[1]:
+        if child[0] == 'term':
+            positives.append((index.doc_frequency(child[1]), child))
+        elif child[0] != 'not':
+            docs = evaluate_query(child, index)
+            positives.append((len(docs), ('docs', docs)))
+    positives.sort(key=itemgetter(0))
+    negatives = [child[1] for child in node[1] if child[0] == 'not']
+
+    def docs_of(operand):
+        kind, value = operand
+        return index.posting_ids(value) if kind == 'term' else value
+
+    result = list(docs_of(positives[0][1])) if positives else list(index.all_doc_ids())
+    for _, operand in positives[1:]:
+        if not result:
+            return result
+        result = intersect_sorted(result, docs_of(operand))
+    for child in negatives:
+        if not result:
+            return result
+        result = difference_sorted(result, evaluate_query(child, index))
+    return result
+
+
+def query_terms(node, negated=False):
+    """Términos de un árbol de parse_query que no están negados (los que puntúan en el ranking)."""
+    kind = node[0]
+    if kind == 'term':
+        return [] if negated else [node[1]]
+    if kind == 'not':
+        return query_terms(node[1], not negated)
+    return [term for child in node[1] for term in query_terms(child, negated)]
+
+
+def is_disjunctive(node):
+    """True si el árbol es una sola palabra o un OR de palabras."""
+    return node[0] == 'term' or node[0] == 'or' and all(child[0] == 'term' for child in node[1])
+
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def bm25_top_k(index, query, k, k1=BM25_K1, b=BM25_B):
+    """
+    Los k documentos con mayor puntaje BM25 para la consulta: [(doc_id, puntaje)].
+
+    Usa el df del diccionario y la longitud de cada documento (doc_lengths)
+    guardados al indexar. Los puntajes se acumulan término a término y solo
+    los k mejores se conservan en un heap (heapq.nlargest), sin ordenar el
+    resto. Si la consulta tiene AND o NOT, solo se devuelven los documentos
+    que la cumplen (evaluate_query); los términos negados no puntúan.
+    """
+    node = parse_query(query)
+    if node is None or k <= 0:
+        return []
+
+    doc_lengths = index.doc_lengths()
+    num_docs = len(doc_lengths)
+    lengths = doc_lengths.values() if isinstance(doc_lengths, dict) else doc_lengths
+    avg_length = (sum(lengths) / num_docs if num_docs else 0) or 1
+
+    scores = {}
+    for term, query_freq in Counter(query_terms(node)).items():
+        df = index.doc_frequency(term)
+        if not df:
+            continue
+        idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+        for doc_id, tf in index.postings(term):
+            norm = k1 * (1 - b + b * doc_lengths[doc_id] / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + query_freq * idf * tf * (k1 + 1) / (tf + norm)
+
+    return select_top_k(scores, node, index, k)
+
+
+def select_top_k(scores, node, index, k):
+    """
+    Los k mejores (doc_id, puntaje) de scores, de mayor a menor puntaje.
+
+    Si la consulta no es un OR de palabras, se limita a los documentos que la
+    cumplen (evaluate_query). Los k mejores se eligen con un heap de tamaño k.
+    """
+    # A plain OR of words matches exactly the documents that got a score
+    if not is_disjunctive(node):
+        scores = {doc_id: scores.get(doc_id, 0.0) for doc_id in evaluate_query(node, index)}
+
+    top = heapq.nlargest(k, scores.items(), key=itemgetter(1))
+    return sorted(top, key=lambda item: (-item[1], item[0]))
+
+
+class Searcher:
+    """
+    Índice de búsqueda persistente en memoria.
+
+    Carga una sola vez el diccionario hash (actividad 8 o 9) en un dict
+    {token: (offset_en_bytes, longitud_en_bytes, num_docs)} de modo que cada
+    término se resuelve con una consulta O(1) y un único seek() sobre el
+    archivo posting. Si cambia el mtime del diccionario o del posting, el
+    índice se recarga automáticamente en la siguiente búsqueda.
+
+    Con dict_backend (una clave de DICTIONARY_BACKENDS) los términos se
+    guardan en ese diccionario en lugar del dict, y se conserva en
+    '<diccionario>_<backend>.bin' para cargarlo sin leer el texto mientras
+    no cambien el diccionario ni el posting.
+    """
+
+    EMPTY_SLOT_INDICATOR = "vacio"
+
+    def __init__(self, dict_file, posting_file, dict_backend=None):
+        if dict_backend is not None and dict_backend not in DICTIONARY_BACKENDS:
+            raise ValueError(f"Diccionario desconocido: {dict_backend} "
+                             f"(opciones: {', '.join(DICTIONARY_BACKENDS)})")
+        self.dict_file = Path(dict_file)
+        self.posting_file = Path(posting_file)
+        self.dict_backend = dict_backend
+        self.backend_file = (self.dict_file.with_name(f"{self.dict_file.stem}_{dict_backend}.bin")
+                             if dict_backend else None)
+        self.terms = {}  # {token: (offset, length, num_docs)}, o un Dictionary con dict_backend
+        self._mtimes = None
+        self._doc_lengths = None  # (mtimes, {documento: tokens}) para NOT y el ranking
+
+    def _current_mtimes(self):
+        return (self.dict_file.stat().st_mtime_ns, self.posting_file.stat().st_mtime_ns)
+
+    def load(self):
+        """Lee el diccionario y obtiene el offset en bytes de cada token en el posting."""
+        mtimes = self._current_mtimes()
+        if self.dict_backend is not None:
+            backend = DICTIONARY_BACKENDS[self.dict_backend]
+            if self.backend_file.exists() and self.backend_file.stat().st_mtime_ns >= max(mtimes):
+                self.terms = backend.load(self.backend_file)
+                self._mtimes = mtimes
+                return
+
+        terms = {}
+        doc_counts = {}  # {token: num_docs} para diccionarios sin offsets en bytes
+        with open(self.dict_file, 'r', encoding='utf-8') as f_dict:
+            for line in f_dict:
+                match = DICT_HASH_LINE_RE.match(line)
+                if not match:
+                    continue
+                token, _, archivos, posicion, longitud = match.groups()
+                token = token.strip()
+                archivos = int(archivos)
+                if token == self.EMPTY_SLOT_INDICATOR or archivos <= 0:
+                    continue
+                if longitud is not None:
+                    terms[token] = (int(posicion), int(longitud), archivos)
+                else:
+                    doc_counts[token] = archivos
+
+        if doc_counts:
+            terms.update(self._legacy_offsets(doc_counts))
+
+        if self.dict_backend is not None:
+            terms = backend.build(terms.items(), 3)
+            terms.save(self.backend_file)
+        self.terms = terms
+        self._mtimes = mtimes
+
+    def _legacy_offsets(self, doc_counts):
+        """
+        Reconstruye los offsets para diccionarios generados antes de que se
+        guardara 'Longitud Posting': el posting se escribe en orden alfabético
+        de token, num_docs líneas por token.
+        """
+        line_offsets = [0]
+        with open(self.posting_file, 'rb') as f_post:
+            for line in f_post:
+                line_offsets.append(line_offsets[-1] + len(line))
+
+        terms = {}
+        line_index = 0
+        for token in sorted(doc_counts):
+            num_docs = doc_counts[token]
+            end_index = min(line_index + num_docs, len(line_offsets) - 1)
+            start = line_offsets[line_index]
+            terms[token] = (start, line_offsets[end_index] - start, num_docs)
+            line_index = end_index
+
+        return terms
+
+    def _ensure_loaded(self):
+        if self._mtimes != self._current_mtimes():
+            self.load()
+
+    def _read_postings(self, f_post, term):
+        entry = self.terms.get(term)
+        if entry is None:
+            return set()
+
+        offset, length, _ = entry
+        f_post.seek(offset)
+        docs = set()
+        for line in f_post.read(length).decode('utf-8').splitlines():
+            doc_name = line.split(';', 1)[0].strip()
+            if doc_name:
+                docs.add(doc_name)
+        return docs
+
+    def lookup(self, term):
+        """Devuelve el conjunto de documentos que contienen un término."""
+        self._ensure_loaded()
+        with open(self.posting_file, 'rb') as f_post:
+            return self._read_postings(f_post, term)
+
+    def doc_frequency(self, term):
+        """Número de documentos del término según el diccionario (0 si no existe)."""
+        self._ensure_loaded()
+        entry = self.terms.get(term)
+        return entry[2] if entry is not None else 0
+
+    def posting_ids(self, term):
+        """Documentos del término ordenados; en este índice el doc_id es el nombre del archivo."""
+        return sorted(self.lookup(term))
+
+    def postings(self, term):
+        """Lista de (documento, frecuencia) del término."""
+        self._ensure_loaded()
+        entry = self.terms.get(term)
+        if entry is None:
+            return []
+        offset, length, _ = entry
+        with open(self.posting_file, 'rb') as f_post:
+            f_post.seek(offset)
+            block = f_post.read(length).decode('utf-8')
+        postings = []
+        for line in block.splitlines():
+            doc_name, _, freq = line.partition(';')
+            if doc_name.strip():
+                postings.append((doc_name.strip(), int(freq)))
+        return postings
+
+    def doc_lengths(self):
+        """
+        {documento: número de tokens}. El diccionario de texto no guarda la
+        longitud de los documentos, así que se suma una vez el posting completo.
+        """
+        self._ensure_loaded()
+        if self._doc_lengths is None or self._doc_lengths[0] != self._mtimes:
+            lengths = {}
+            with open(self.posting_file, 'r', encoding='utf-8') as f_post:
+                for line in f_post:
+                    doc_name, _, freq = line.partition(';')
+                    doc_name = doc_name.strip()
+                    if doc_name:
+                        lengths[doc_name] = lengths.get(doc_name, 0) + int(freq)
+            self._doc_lengths = (self._mtimes, lengths)
+        return self._doc_lengths[1]
+
+    def all_doc_ids(self):
+        """Todos los documentos del posting, ordenados."""
+        return sorted(self.doc_lengths())
+
+    def doc_name(self, doc_id):
+        return doc_id
+
+    def search(self, query):
+        """Documentos que cumplen la consulta booleana (ver parse_query), ordenados."""
+        node = parse_query(query)
+        if node is None:
+            return []
+        return evaluate_query(node, self)
+
+
+# --- Índice binario (mmap) ---
+# Estructura del archivo (little endian):
+#   cabecera | registros del diccionario | pool de tokens | postings | tabla de documentos | pool de documentos
+# Los registros del diccionario son de tamaño fijo y están ordenados por token,
+# por lo que una búsqueda es una búsqueda binaria directamente sobre el mmap.
+# La versión 2 agrega a cada documento su longitud (número de tokens), que usa
+# el ranking BM25; los índices de la versión 1 se siguen pudiendo leer.
+BINARY_INDEX_MAGIC = b"HTIDX002"
+BINARY_INDEX_MAGIC_V1 = b"HTIDX001"
+BINARY_HEADER = struct.Struct('<8sIIQQQQ')    # magic, num_terms, num_docs, pool, postings, docs, doc_pool
+BINARY_TERM_RECORD = struct.Struct('<IIIIQ')  # term_offset, term_len, num_docs, total_freq, first_posting
+BINARY_POSTING = struct.Struct('<If')         # doc_id, peso
+BINARY_DOC_RECORD = struct.Struct('<III')     # name_offset, name_len, doc_length
+BINARY_DOC_RECORD_V1 = struct.Struct('<II')   # name_offset, name_len
+
+
+def write_binary_index(index_file, term_postings, doc_names, doc_lengths=None):
+    """
+    Escribe el índice binario.
+
+    Args:
+        index_file: Ruta del archivo .bin a generar
+        term_postings: Iterable de (token, total_freq, [(doc_id, peso), ...])
+                       ordenado alfabéticamente por token
+        doc_names: Lista de nombres de documento; el doc_id es su posición
+        doc_lengths: Número de tokens de cada documento; si es None se usa la
+                     suma de los pesos de sus postings (en las actividades 8 y
+                     9 el peso es la frecuencia del token)
+    """
+    records = bytearray()
+    pool = bytearray()
+    postings = bytearray()
+    num_terms = 0
+    num_postings = 0
+    weight_sums = [0] * len(doc_names)
+
+    for token, total_freq, docs in term_postings:
+        token_bytes = token.encode('utf-8')
+        records += BINARY_TERM_RECORD.pack(len(pool), len(token_bytes), len(docs), total_freq, num_postings)
+        pool += token_bytes
+        for doc_id, weight in docs:
+            postings += BINARY_POSTING.pack(doc_id, weight)
+            weight_sums[doc_id] += weight
+        num_postings += len(docs)
+        num_terms += 1
+
+    if doc_lengths is None:
+        doc_lengths = [round(total) for total in weight_sums]
+    doc_records, doc_pool = pack_doc_table(doc_names, doc_lengths)
+
+    pool_offset = BINARY_HEADER.size + len(records)
+    postings_offset = pool_offset + len(pool)
+    docs_offset = postings_offset + len(postings)
+    doc_pool_offset = docs_offset + len(doc_records)
+
+    # Se escribe en un archivo temporal y se reemplaza, así un lector nunca ve un índice a medias
+    index_file = Path(index_file)
+    tmp_file = index_file.with_name(index_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(BINARY_HEADER.pack(BINARY_INDEX_MAGIC, num_terms, len(doc_names),
+                                   pool_offset, postings_offset, docs_offset, doc_pool_offset))
+        f.write(records)
+        f.write(pool)
+        f.write(postings)
+        f.write(doc_records)
+        f.write(doc_pool)
+    os.replace(tmp_file, index_file)
+
+
+def pack_doc_table(doc_names, doc_lengths):
+    """Tabla de documentos (BINARY_DOC_RECORD) y pool de nombres de los índices binarios."""
+    doc_records = bytearray()
+    doc_pool = bytearray()
+    for name, length in zip(doc_names, doc_lengths):
+        name_bytes = name.encode('utf-8')
+        doc_records += BINARY_DOC_RECORD.pack(len(doc_pool), len(name_bytes), length)
+        doc_pool += name_bytes
+    return doc_records, doc_pool
+
+
+class PostingIds:
+    """
+    Secuencia de solo lectura con los doc_id de una lista de postings del mmap.
+
+    Cada acceso desempaqueta un único registro, así que intersect_sorted y
+    bisect solo tocan los postings por los que realmente pasan.
+    """
+
+    def __init__(self, buffer, start, count, record=BINARY_POSTING):
+        self._buffer = buffer
+        self._start = start
+        self._count = count
+        self._record = record
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._record.unpack_from(self._buffer, self._start + i * self._record.size)[0]
+
+    def __iter__(self):
+        view = memoryview(self._buffer)[self._start:self._start + self._count * self._record.size]
+        return (doc_id for doc_id, *_ in self._record.iter_unpack(view))
+
+
+class BinaryIndex:
+    """
+    Lector del índice binario mapeado en memoria con mmap.
+
+    Los registros se decodifican en su lugar con struct.unpack_from; no se
+    construye ningún dict ni lista por token al cargar el índice, así que
+    abrirlo cuesta lo mismo sin importar el tamaño del vocabulario.
+    """
+
+    def __init__(self, index_file):
+        self.index_file = Path(index_file)
+        self._file = None
+        self._mm = None
+        self._mtime = None
+        self._doc_record = BINARY_DOC_RECORD
+        self._doc_lengths = None
+
+    def load(self):
+        self.close()
+        mtime = self.index_file.stat().st_mtime_ns
+        self._file = open(self.index_file, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, self.num_terms, self.num_docs, self._pool_offset, self._postings_offset,
+         self._docs_offset, self._doc_pool_offset) = BINARY_HEADER.unpack_from(self._mm, 0)
+        if magic not in (BINARY_INDEX_MAGIC, BINARY_INDEX_MAGIC_V1):
+            self.close()
+            raise ValueError(f"{self.index_file} no es un índice binario válido")
+        self._doc_record = BINARY_DOC_RECORD if magic == BINARY_INDEX_MAGIC else BINARY_DOC_RECORD_V1
+        self._mtime = mtime
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._mtime = None
+        self._doc_lengths = None
+
+    def _ensure_loaded(self):
+        if self._mm is None or self._mtime != self.index_file.stat().st_mtime_ns:
+            self.load()
+
+    def _record(self, i):
+        return BINARY_TERM_RECORD.unpack_from(self._mm, BINARY_HEADER.size + i * BINARY_TERM_RECORD.size)
+
+    def _term_at(self, i):
+        term_offset, term_len = self._record(i)[:2]
+        start = self._pool_offset + term_offset
+        return self._mm[start:start + term_len]
+
+    def __len__(self):
+        self._ensure_loaded()
+        return self.num_terms
+
+    def find(self, term):
+        """Devuelve el número de registro del token o -1 si no existe."""
+        self._ensure_loaded()
+        key = term.encode('utf-8')
+        # El orden de bytes UTF-8 coincide con el orden de los str de Python
+        lo, hi = 0, self.num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.num_terms and self._term_at(lo) == key:
+            return lo
+        return -1
+
+    def term_info(self, term):
+        """Devuelve (num_docs, total_freq) del token o None si no existe."""
+        i = self.find(term)
+        if i < 0:
+            return None
+        _, _, num_docs, total_freq, _ = self._record(i)
+        return num_docs, total_freq
+
+    def postings(self, term):
+        """Itera (doc_id, peso) del token directamente sobre el mmap."""
+        i = self.find(term)
+        if i < 0:
+            return iter(())
+        _, _, num_docs, _, first_posting = self._record(i)
+        start = self._postings_offset + first_posting * BINARY_POSTING.size
+        return BINARY_POSTING.iter_unpack(memoryview(self._mm)[start:start + num_docs * BINARY_POSTING.size])
+
+    def doc_frequency(self, term):
+        """Número de documentos del término según el diccionario (0 si no existe)."""
+        i = self.find(term)
+        return self._record(i)[2] if i >= 0 else 0
+
+    def posting_ids(self, term):
+        """doc_ids del término en orden creciente, leídos del mmap solo cuando se accede a ellos."""
+        i = self.find(term)
+        if i < 0:
+            return ()
+        _, _, num_docs, _, first_posting = self._record(i)
+        return PostingIds(self._mm, self._postings_offset + first_posting * BINARY_POSTING.size, num_docs)
+
+    def posting_columns(self, term):
+        """
+        (doc_ids, pesos) del término como secuencias indexables.
+
+        En máquinas little endian son vistas sobre el mmap (sin copiar nada),
+        así que bisect y zip las recorren a velocidad de C.
+        """
+        i = self.find(term)
+        if i < 0:
+            return (), ()
+        _, _, num_docs, _, first_posting = self._record(i)
+        start = self._postings_offset + first_posting * BINARY_POSTING.size
+        view = memoryview(self._mm)[start:start + num_docs * BINARY_POSTING.size]
+        if sys.byteorder != 'little':
+            postings = list(BINARY_POSTING.iter_unpack(view))
+            return [doc_id for doc_id, _ in postings], [weight for _, weight in postings]
+        # Records are <If, so each column is every other 4-byte value
+        return view.cast('I')[0::2], view.cast('f')[1::2]
+
+    def all_doc_ids(self):
+        self._ensure_loaded()
+        return range(self.num_docs)
+
+    def doc_name(self, doc_id):
+        self._ensure_loaded()
+        name_offset, name_len = self._doc_record.unpack_from(
+            self._mm, self._docs_offset + doc_id * self._doc_record.size)[:2]
+        start = self._doc_pool_offset + name_offset
+        return self._mm[start:start + name_len].decode('utf-8')
+
+    def doc_lengths(self):
+        """Lista con la longitud en tokens de cada documento, indexada por doc_id."""
+        self._ensure_loaded()
+        if self._doc_lengths is None:
+            if self._doc_record is not BINARY_DOC_RECORD:
+                raise ValueError(f"{self.index_file} no guarda la longitud de los documentos; "
+                                 f"vuelva a ejecutar la actividad que lo genera")
+            view = memoryview(self._mm)[self._docs_offset:self._docs_offset + self.num_docs * BINARY_DOC_RECORD.size]
+            self._doc_lengths = [length for _, _, length in BINARY_DOC_RECORD.iter_unpack(view)]
+        return self._doc_lengths
+
+    def lookup(self, term):
+        """Devuelve el conjunto de documentos que contienen un término."""
+        return {self.doc_name(doc_id) for doc_id, _ in self.postings(term)}
+
+    def search(self, query):
+        """Documentos que cumplen la consulta booleana (ver parse_query), ordenados."""
+        node = parse_query(query)
+        if node is None:
+            return []
+        # doc_ids follow the sorted document names, so the result is already in order
+        return [self.doc_name(doc_id) for doc_id in evaluate_query(node, self)]
+
+
+def vbyte_encode(numbers, out):
+    """Agrega a out (bytearray) los enteros no negativos en variable byte, 7 bits por byte."""
+    for n in numbers:
+        while n >= 0x80:
+            out.append(n & 0x7F | 0x80)  # continuation bit set: more bytes follow
+            n >>= 7
+        out.append(n)
+    return out
+
+
+def vbyte_decode(data, offset, count):
+    """Decodifica count enteros en variable byte desde data[offset:]; devuelve (lista, offset final)."""
+    numbers = []
+    n = shift = 0
+    while len(numbers) < count:
+        byte = data[offset]
+        offset += 1
+        n |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            numbers.append(n)
+            n = shift = 0
+    return numbers, offset
+
+
+def delta_encode(positions):
+    """Convierte posiciones crecientes en la primera posición seguida de las diferencias."""
+    previous = 0
+    for position in positions:
+        yield position - previous
+        previous = position
+
+
+def delta_decode(gaps):
+    """Inversa de delta_encode."""
+    positions = []
+    position = 0
+    for gap in gaps:
+        position += gap
+        positions.append(position)
+    return positions
+
+
+def gamma_encode(numbers):
+    """Codifica enteros no negativos en Elias-gamma (n + 1: unario de la longitud y binario)."""
+    bits = []
+    for n in numbers:
+        binary = format(n + 1, 'b')
+        bits.append('0' * (len(binary) - 1))
+        bits.append(binary)
+    bits = ''.join(bits)
+    bits += '0' * (-len(bits) % 8)  # pad to a whole byte
+    return int(bits, 2).to_bytes(len(bits) // 8, 'big') if bits else b''
+
+
+def gamma_decode(data, count):
+    """Inversa de gamma_encode: devuelve los primeros count enteros de data."""
+    bits = format(int.from_bytes(data, 'big'), f'0{len(data) * 8}b')
+    find = bits.find
+    numbers = []
+    pos = 0
+    for _ in range(count):
+        one = find('1', pos)
+        end = 2 * one - pos + 1  # as many binary digits after the first 1 as zeros before it
+        numbers.append(int(bits[one:end], 2) - 1)
+        pos = end
+    return numbers
+
+
+# Simple-9: palabras de 32 bits con un selector de 4 bits y 28 bits de datos,
+# repartidos en (cantidad, bits por valor)
+SIMPLE9_LAYOUTS = ((28, 1), (14, 2), (9, 3), (7, 4), (5, 5), (4, 7), (3, 9), (2, 14), (1, 28))
+
+
+def simple9_encode(numbers):
+    """Empaqueta enteros menores que 2**28 en palabras Simple-9 (little-endian)."""
+    numbers = list(numbers)
+    words = []
+    i = 0
+    while i < len(numbers):
+        for selector, (count, width) in enumerate(SIMPLE9_LAYOUTS):
+            chunk = numbers[i:i + count]
+            if max(chunk) >> width == 0:
+                break
+        else:
+            raise ValueError(f"Simple-9 no admite valores de más de 28 bits: {max(chunk)}")
+        word = selector << 28
+        for j, n in enumerate(chunk):
+            word |= n << (j * width)
+        words.append(word)
+        i += len(chunk)
+    return struct.pack(f'<{len(words)}I', *words)
+
+
+def simple9_decode(data, count):
+    """Inversa de simple9_encode: devuelve los primeros count enteros de data."""
+    numbers = []
+    for word in struct.unpack(f'<{len(data) // 4}I', data):
+        n, width = SIMPLE9_LAYOUTS[word >> 28]
+        mask = (1 << width) - 1
+        numbers.extend([(word >> shift) & mask for shift in range(0, n * width, width)])
+    del numbers[count:]  # the last word may be padded with zeros
+    return numbers
+
+
+# Codecs de listas de enteros: nombre -> (encode(números) -> bytes, decode(bytes, cantidad) -> lista)
+POSTING_CODECS = {
+    'vbyte': (lambda numbers: bytes(vbyte_encode(numbers, bytearray())),
+              lambda data, count: vbyte_decode(data, 0, count)[0]),
+    'gamma': (gamma_encode, gamma_decode),
+    'simple9': (simple9_encode, simple9_decode),
+}
+
+
+# --- Índice posicional (mmap) ---
+# Misma idea que el índice binario, pero cada (token, documento) apunta a la
+# lista de posiciones del token en ese documento, guardada como diferencias
+# (delta_encode) en variable byte (vbyte_encode):
+#   cabecera | registros del diccionario | pool de tokens | entradas | posiciones | documentos | pool de documentos
+# Los doc_id son los mismos que los del índice binario de la actividad 8.
+POSITIONAL_INDEX_MAGIC = b"HTPOS002"
+POSITIONAL_HEADER = struct.Struct('<8sIIQQQQQ')  # magic, num_terms, num_docs, pool, entries, positions, docs, doc_pool
+POSITIONAL_TERM_RECORD = struct.Struct('<IIIQ')  # term_offset, term_len, num_docs, first_entry
+POSITIONAL_ENTRY = struct.Struct('<IIQ')         # doc_id, num_positions, positions_offset
+
+
+def write_positional_index(index_file, term_positions, doc_names):
+    """
+    Escribe el índice posicional.
+
+    Args:
+        index_file: Ruta del archivo .bin a generar
+        term_positions: Iterable de (token, [(doc_id, [posición, ...]), ...])
+                        ordenado alfabéticamente por token, con los documentos
+                        ordenados por doc_id y las posiciones en orden creciente
+        doc_names: Lista de nombres de documento; el doc_id es su posición
+    """
+    records = bytearray()
+    pool = bytearray()
+    entries = bytearray()
+    positions_data = bytearray()
+    num_terms = 0
+    num_entries = 0
+    doc_lengths = [0] * len(doc_names)
+
+    for token, docs in term_positions:
+        token_bytes = token.encode('utf-8')
+        records += POSITIONAL_TERM_RECORD.pack(len(pool), len(token_bytes), len(docs), num_entries)
+        pool += token_bytes
+        for doc_id, positions in docs:
+            entries += POSITIONAL_ENTRY.pack(doc_id, len(positions), len(positions_data))
+            doc_lengths[doc_id] += len(positions)
+            vbyte_encode(delta_encode(positions), positions_data)
+        num_entries += len(docs)
+        num_terms += 1
+
+    doc_records, doc_pool = pack_doc_table(doc_names, doc_lengths)
+
+    pool_offset = POSITIONAL_HEADER.size + len(records)
+    entries_offset = pool_offset + len(pool)
+    positions_offset = entries_offset + len(entries)
+    docs_offset = positions_offset + len(positions_data)
+    doc_pool_offset = docs_offset + len(doc_records)
+
+    index_file = Path(index_file)
+    tmp_file = index_file.with_name(index_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(POSITIONAL_HEADER.pack(POSITIONAL_INDEX_MAGIC, num_terms, len(doc_names), pool_offset,
+                                       entries_offset, positions_offset, docs_offset, doc_pool_offset))
+        f.write(records)
+        f.write(pool)
+        f.write(entries)
+        f.write(positions_data)
+        f.write(doc_records)
+        f.write(doc_pool)
+    os.replace(tmp_file, index_file)
+
+
+class PositionalIndex(BinaryIndex):
+    """
+    Lector del índice posicional (write_positional_index) mapeado con mmap.
+
+    Las consultas de frase y de proximidad se resuelven intersectando primero
+    los documentos, empezando por el término con menos documentos, y solo
+    después se decodifican las posiciones de los documentos candidatos; nunca
+    se vuelve a leer el HTML.
+    """
+
+    def load(self):
+        self.close()
+        mtime = self.index_file.stat().st_mtime_ns
+        self._file = open(self.index_file, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, self.num_terms, self.num_docs, self._pool_offset, self._entries_offset,
+         self._positions_offset, self._docs_offset, self._doc_pool_offset) = POSITIONAL_HEADER.unpack_from(self._mm, 0)
+        if magic != POSITIONAL_INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{self.index_file} no es un índice posicional válido")
+        self._mtime = mtime
+
+    def _record(self, i):
+        return POSITIONAL_TERM_RECORD.unpack_from(self._mm, POSITIONAL_HEADER.size + i * POSITIONAL_TERM_RECORD.size)
+
+    def term_info(self, term):
+        """Devuelve (num_docs, total_freq) del token o None si no existe."""
+        if self.find(term) < 0:
+            return None
+        entries = self.entries(term)
+        return len(entries), sum(num_positions for num_positions, _ in entries.values())
+
+    def entries(self, term):
+        """Devuelve {doc_id: (num_positions, positions_offset)} del token (vacío si no existe)."""
+        i = self.find(term)
+        if i < 0:
+            return {}
+        _, _, num_docs, first_entry = self._record(i)
+        start = self._entries_offset + first_entry * POSITIONAL_ENTRY.size
+        return {doc_id: (num_positions, offset) for doc_id, num_positions, offset in
+                POSITIONAL_ENTRY.iter_unpack(memoryview(self._mm)[start:start + num_docs * POSITIONAL_ENTRY.size])}
+
+    def postings(self, term):
+        """Itera (doc_id, frecuencia) del token."""
+        return ((doc_id, num_positions) for doc_id, (num_positions, _) in self.entries(term).items())
+
+    def posting_ids(self, term):
+        i = self.find(term)
+        if i < 0:
+            return ()
+        _, _, num_docs, first_entry = self._record(i)
+        return PostingIds(self._mm, self._entries_offset + first_entry * POSITIONAL_ENTRY.size, num_docs,
+                          POSITIONAL_ENTRY)
+
+    def _positions(self, entry):
+        num_positions, offset = entry
+        gaps, _ = vbyte_decode(self._mm, self._positions_offset + offset, num_positions)
+        return delta_decode(gaps)
+
+    def positions(self, term, doc_id):
+        """Posiciones del token en el documento, en orden creciente."""
+        entry = self.entries(term).get(doc_id)
+        return self._positions(entry) if entry is not None else []
+
+    def _candidates(self, terms):
+        """Documentos que contienen todos los términos, con las entradas de cada término."""
+        term_entries = {term: self.entries(term) for term in terms}
+        # Start from the rarest term so the candidate set is as small as possible
+        by_rarity = sorted(term_entries.values(), key=len)
+        candidates = set(by_rarity[0])
+        for entries in by_rarity[1:]:
+            candidates.intersection_update(entries)
+            if not candidates:
+                break
+        return candidates, term_entries
+
+    def phrase_docs(self, terms):
+        """doc_ids en los que los términos aparecen seguidos y en ese orden."""
+        if not terms:
+            return []
+        candidates, term_entries = self._candidates(set(terms))
+        matches = []
+        for doc_id in sorted(candidates):
+            # Align every term on the position where the phrase would start
+            starts = None
+            for shift, term in enumerate(terms):
+                shifted = {position - shift for position in self._positions(term_entries[term][doc_id])}
+                starts = shifted if starts is None else starts & shifted
+                if not starts:
+                    break
+            if starts:
+                matches.append(doc_id)
+        return matches
+
+    def near_docs(self, terms, distance):
+        """doc_ids en los que todos los términos caben, en cualquier orden, en una ventana de distance posiciones."""
+        unique_terms = list(dict.fromkeys(terms))
+        if not unique_terms:
+            return []
+        candidates, term_entries = self._candidates(unique_terms)
+        matches = []
+        for doc_id in sorted(candidates):
+            merged = heapq.merge(*(zip(self._positions(term_entries[term][doc_id]), repeat(i))
+                                   for i, term in enumerate(unique_terms)))
+            # Sliding window over the merged positions, keeping the last position of each term
+            last_seen = {}
+            for position, i in merged:
+                last_seen[i] = position
+                if len(last_seen) == len(unique_terms) and position - min(last_seen.values()) <= distance:
+                    matches.append(doc_id)
+                    break
+        return matches
+
+    def search_phrase(self, query):
+        """Documentos que contienen la frase, ordenados."""
+        return sorted(self.doc_name(doc_id) for doc_id in self.phrase_docs(process_words(query)))
+
+    def search_near(self, query, distance):
+        """Documentos con todos los términos a no más de distance posiciones, ordenados."""
+        return sorted(self.doc_name(doc_id) for doc_id in self.near_docs(process_words(query), distance))
+
+
+_searchers = {}  # {(dict_file, posting_file): Searcher o BinaryIndex}
+
+
+def release_searchers():
+    """Cierra los índices abiertos (necesario antes de reescribirlos en Windows)."""
+    for searcher in _searchers.values():
+        if isinstance(searcher, BinaryIndex):
+            searcher.close()
+    _searchers.clear()
+
+
+def get_searcher(output_dir="results", use_stoplist=False, dict_backend=None):
+    """
+    Devuelve el índice de búsqueda compartido para la actividad 8 o 9.
+
+    Si existe el índice binario (a8_index.bin / a9_index.bin) y no es más
+    antiguo que el diccionario de texto, se usa ese; si no, se carga el
+    diccionario de texto en un Searcher. Con dict_backend (ver
+    DICTIONARY_BACKENDS) siempre se usa el diccionario de texto, cargado en
+    ese diccionario.
+
+    Returns:
+        Searcher o BinaryIndex listo para usarse, o None si faltan los archivos
+    """
+    base_dir = Path(output_dir)
+
+    if use_stoplist:
+        dict_file = base_dir / "a9_diccionario_refinado.txt"
+        posting_file = base_dir / "a9_posting.txt"
+        binary_file = base_dir / "a9_index.bin"
+    else:
+        dict_file = base_dir / "a8_diccionario_hash.txt"
+        posting_file = base_dir / "a8_posting.txt"
+        binary_file = base_dir / "a8_index.bin"
+
+    if dict_backend is None and binary_file.exists() and (
+            not dict_file.exists() or binary_file.stat().st_mtime_ns >= dict_file.stat().st_mtime_ns):
+        key = (str(binary_file.resolve()),)
+        searcher = _searchers.get(key)
+        if searcher is None:
+            searcher = BinaryIndex(binary_file)
+            _searchers[key] = searcher
+        return searcher
+
+    if not dict_file.exists():
+        print(f"Error: No se encontró el archivo de diccionario: {dict_file}")
+        return None
+
+    if not posting_file.exists():
+        print(f"Error: No se encontró el archivo de posting: {posting_file}")
+        return None
+
+    key = (str(dict_file.resolve()), str(posting_file.resolve()), dict_backend)
+    searcher = _searchers.get(key)
+    if searcher is None:
+        searcher = Searcher(dict_file, posting_file, dict_backend)
+        _searchers[key] = searcher
+    return searcher
+
+
+def get_positional_index(output_dir="results"):
+    """
+    Devuelve el índice posicional compartido (a8_positions.bin).
+
+    Returns:
+        PositionalIndex listo para usarse, o None si no se generó
+    """
+    positions_file = Path(output_dir) / "a8_positions.bin"
+    if not positions_file.exists():
+        print(f"Error: No se encontró el índice posicional: {positions_file} "
+              f"(se genera con actividad8(positional_index=True))")
+        return None
+
+    key = (str(positions_file.resolve()),)
+    index = _searchers.get(key)
+    if index is None:
+        index = PositionalIndex(positions_file)
+        _searchers[key] = index
+    return index
+
+
+SEARCH_MODES = ('boolean', 'phrase', 'near')
+NEAR_DISTANCE = 10
+
+
+def search_ranked(word, output_dir="results", use_stoplist=False, k=10, dict_backend=None):
+    """
+    Búsqueda con ranking BM25 (ver bm25_top_k) en el índice de la actividad 8 o 9.
+
+    Args:
+        word: Consulta; las palabras sin operador se unen con OR
+        output_dir: Directorio donde están los archivos de resultados
+        use_stoplist: Si True, usa los archivos de actividad 9 (con stoplist)
+        k: Número máximo de documentos a devolver
+        dict_backend: Diccionario para los términos (ver get_searcher)
+
+    Returns:
+        Lista de (documento, puntaje) ordenada de mayor a menor puntaje
+
+    Raises:
+        QuerySyntaxError: si la consulta booleana no está bien formada
+    """
+    searcher = get_searcher(output_dir, use_stoplist, dict_backend)
+    if searcher is None:
+        return []
+    return [(searcher.doc_name(doc_id), score) for doc_id, score in bm25_top_k(searcher, word, k)]
+
+
+def search_cosine(word, output_dir="results", k=10):
+    """
+    Búsqueda por similitud coseno sobre los pesos tf·idf de la actividad 10
+    (a10_index.bin y a10_norms.bin; con a10_blockmax.bin poda el top k).
+
+    Returns:
+        Lista de (documento, puntaje) ordenada de mayor a menor puntaje
+
+    Raises:
+        QuerySyntaxError: si la consulta booleana no está bien formada
+    """
+    dict_posting_dir = Path(output_dir) / "dictionary_posting"
+    index_file = dict_posting_dir / "a10_index.bin"
+    norms_file = dict_posting_dir / "a10_norms.bin"
+    if not index_file.exists() or not norms_file.exists():
+        print(f"Error: No se encontró el índice tf·idf: {index_file} (se genera con actividad10)")
+        return []
+
+    key = (str(index_file.resolve()),)
+    index = _searchers.get(key)
+    if index is None:
+        index = BinaryIndex(index_file)
+        _searchers[key] = index
+    blockmax_file = dict_posting_dir / "a10_blockmax.bin"
+    block_max = None
+    if blockmax_file.exists():
+        key = (str(blockmax_file.resolve()),)
+        block_max = _searchers.get(key)
+        if block_max is None:
+            block_max = BlockMaxTable(blockmax_file)
+            _searchers[key] = block_max
+    # Only the schemes are needed at query time: the weights are already normalized
+    tf_scheme, idf_scheme, _ = read_tfidf_norms(norms_file)
+    return [(index.doc_name(doc_id), score)
+            for doc_id, score in cosine_top_k(index, word, k, tf_scheme, idf_scheme, block_max)]
+
+
+def search_word(word, output_dir="results", use_stoplist=False, mode="boolean", distance=NEAR_DISTANCE,
+                dict_backend=None):
+    """
+    Actividad 12: Buscar una o varias palabras en el diccionario y posting.
+    
+    Args:
+        word: Palabra(s) a buscar (por ejemplo: "exploitation hygiene").
+              Se separan por espacios y se buscan individualmente.
+        output_dir: Directorio donde están los archivos de resultados
+        use_stoplist: Si True, usa los archivos de actividad 9 (con stoplist),
+                     si False, usa los archivos de actividad 8 (sin stoplist)
+        mode: 'boolean' (consulta con AND, OR, NOT y paréntesis, ver
+              parse_query; las palabras sin operador se unen con OR), 'phrase'
+              (las palabras seguidas y en orden) o 'near' (todas las palabras,
+              en cualquier orden, a no más de distance posiciones). 'phrase' y
+              'near' usan el índice posicional de la actividad 8 con cualquier
+              valor de use_stoplist, porque las posiciones incluyen todos los tokens.
+        distance: Ventana máxima, en tokens, del modo 'near'
+        dict_backend: Modo 'boolean': diccionario donde se cargan los términos
+                      (una clave de DICTIONARY_BACKENDS, ver get_searcher);
+                      None usa el índice binario o un dict
     
-    # Buscar cada término individualmente y unir los resultados (sin duplicados)
-    all_docs = set()
-    for term in terms:
-        all_docs |= _search_single_term(term)
+    Returns:
+        Lista ordenada de documentos que cumplen la consulta, o lista vacía
+        si no se encuentra
+
+    Raises:
+        QuerySyntaxError: si la consulta booleana no está bien formada
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Modo de búsqueda no válido: {mode} (opciones: {', '.join(SEARCH_MODES)})")
+
+    if mode != 'boolean':
+        index = get_positional_index(output_dir)
+        if index is None:
+            return []
+        if mode == 'phrase':
+            return index.search_phrase(word)
+        return index.search_near(word, distance)
+
+    searcher = get_searcher(output_dir, use_stoplist, dict_backend)
+    if searcher is None:
+        return []
     
-    return sorted(all_docs) if all_docs else []
+    return searcher.search(word)
+
+def _count_html_tokens(html_file):
+    """
+    Tarea de la actividad 8: cuenta los tokens de un archivo HTML.
+
+    Returns:
+        (Counter de tokens o None, duración en segundos, mensaje de error o None)
+    """
+    start_file = time.time()
+    try:
+        # Extract and process words while streaming the HTML text
+        # (this activity has always kept entities as written)
+        word_counts = count_html_words(html_file, unescape=False)
+    except DocumentError as e:
+        return None, 0, str(e)
+    except Exception as e:
+        return None, 0, f"Error procesando {html_file.name}: {e}"
+    
+    return word_counts, time.time() - start_file, None
+
+def _html_token_positions(html_file):
+    """
+    Tarea de la actividad 8 con índice posicional: posiciones de los tokens de un archivo HTML.
+
+    Returns:
+        ({token: [posiciones]} o None, duración en segundos, mensaje de error o None)
+    """
+    start_file = time.time()
+    try:
+        positions = html_token_positions(html_file, unescape=False)
+    except DocumentError as e:
+        return None, 0, str(e)
+    except Exception as e:
+        return None, 0, f"Error procesando {html_file.name}: {e}"
+    
+    return positions, time.time() - start_file, None
 
-def actividad8(output_dir="results"):
+def actividad8(output_dir="results", binary_index=True, workers=None, positional_index=False, hash_name='djb2',
+               perfect_hash=False):
     """
     Actividad 8:
     Genera archivos 'diccionario_hash.txt', 'posting.txt' y 'a8_<matricula>.txt' (log de tiempos).
-    Usa una hash table para almacenar los tokens.
+    Usa una hash table con direccionamiento abierto (HashDictionary) para
+    almacenar los tokens; también la guarda en 'a8_diccionario_hash.bin'.
+    hash_name elige la función hash (ver HASH_FUNCTIONS).
+    Si perfect_hash es True también genera 'a8_diccionario_mphf.bin' (ver
+    PerfectHashDictionary) y el diccionario de texto sigue su orden, sin
+    posiciones vacías.
+    Si binary_index es True también genera 'a8_index.bin' (ver write_binary_index),
+    que es el que usa search_word; los archivos de texto quedan como exportación legible.
+    Si positional_index es True también genera 'a8_positions.bin' (ver
+    write_positional_index), que usan las búsquedas de frase y proximidad.
     """
     import os
     import time
@@ -972,7 +4123,6 @@ def actividad8(output_dir="results"):
     from pathlib import Path
 
     matricula = "2878113"
-    HASH_TABLE_SIZE = 20000
     EMPTY_SLOT_INDICATOR = "vacio"
     EMPTY_POSTING_POSITION = -1
     
@@ -987,8 +4137,7 @@ def actividad8(output_dir="results"):
 
     # --- Step 1: Preparar estructuras de datos ---
     token_data = defaultdict(lambda: defaultdict(int))  # {token: {archivo: frecuencia}}
-    hash_table = [[] for _ in range(HASH_TABLE_SIZE)]  # Lista de listas para chaining
-    colisiones = 0
+    hash_table = HashDictionary(4, hash_name=hash_name)  # token -> frecuencia, archivos, posición y longitud en el posting
     posting_data = []                                   # [(archivo, frecuencia)]
 
     # --- Step 2: Leer archivos HTML y contar tiempos individuales ---
@@ -1001,33 +4150,26 @@ def actividad8(output_dir="results"):
         print("No se encontraron archivos HTML")
         return
 
-    for html_file in html_files:
-        start_file = time.time()
+    # Each worker returns a per-file Counter (or the token positions); they are merged here in the parent
+    worker = _html_token_positions if positional_index else _count_html_tokens
+    results = run_parallel(worker, html_files, workers=workers)
+    token_positions = {}  # {archivo: {token: [posiciones]}}
+    
+    for html_file, (word_counts, duration, error) in zip(html_files, results):
         filename = html_file.name
         
-        try:
-            # Read HTML file
-            content = open_file(html_file)
-            if content.startswith("Failed"):
-                print(f"Error: {content}")
-                continue
-            
-            # Clean HTML tags
-            clean_content = re.sub(r'<[^>]+>', '', content)
-            
-            # Extract and process words
-            words = process_words(clean_content)
-            
-            # Count token frequencies per file
-            for word in words:
-                token_data[word][filename] += 1
-                
-        except Exception as e:
-            print(f"Error procesando {filename}: {e}")
+        if error is not None:
+            print(f"Error: {error}")
             continue
+        
+        if positional_index:
+            token_positions[filename] = word_counts
+            word_counts = {word: len(positions) for word, positions in word_counts.items()}
+        
+        # Count token frequencies per file
+        for word, count in word_counts.items():
+            token_data[word][filename] += count
 
-        end_file = time.time()
-        duration = end_file - start_file
         file_durations.append((filename, duration))
         print(f"Procesado: {filename} en {duration:.4f} segundos")
 
@@ -1035,29 +4177,30 @@ def actividad8(output_dir="results"):
     
     posting_file = base_dir / "a8_posting.txt"
 
-    with open(posting_file, "w", encoding="utf-8") as post:
+    # newline="\n" para que los offsets en bytes sean iguales en todas las plataformas
+    with open(posting_file, "w", encoding="utf-8", newline="\n") as post:
         # Sort tokens alphabetically for consistent ordering
         sorted_tokens = sorted(token_data.keys())
+        posting_offset = 0  # Offset en bytes dentro de a8_posting.txt
         
         for token in sorted_tokens:
             docs = token_data[token]
             num_docs = len(docs)
             total_freq = sum(docs.values())
             
+            token_lines = []
             for archivo in sorted(docs.keys()): 
                 frecuencia = docs[archivo]
-                post.write(f"{archivo};{frecuencia}\n")
+                token_lines.append(f"{archivo};{frecuencia}\n")
                 posting_data.append((archivo, frecuencia))
-
-            # Calcular hash del token usando DJB2
-            hash_index = hash_function(token, HASH_TABLE_SIZE)
-            
-            # Manejo de colisiones con chaining (listas de listas)
-            if hash_table[hash_index]:
-                colisiones += 1
             
-            # Almacenar en la lista de ese índice
-            hash_table[hash_index].append((token, total_freq, num_docs, hash_index))
+            block = ''.join(token_lines)
+            post.write(block)
+            posting_length = len(block.encode('utf-8'))
+
+            # Almacenar en la tabla hash (direccionamiento abierto) junto con su ubicación real en el posting
+            hash_table.put(token, total_freq, num_docs, posting_offset, posting_length)
+            posting_offset += posting_length
 
     posting_end = time.time()
     posting_time = posting_end - posting_start
@@ -1065,20 +4208,54 @@ def actividad8(output_dir="results"):
     # --- Step 4: Crear archivo diccionario hash (ASCII legible) ---
     dict_start = time.time()
     
+    # With perfect_hash the dictionary is written in perfect hash order, without empty slots
+    dictionary = hash_table
+    if perfect_hash:
+        dictionary = PerfectHashDictionary.build(
+            ((token, values) for _, token, values in hash_table.slots() if token is not None), 4)
+    
     dict_file = base_dir / "a8_diccionario_hash.txt"
     with open(dict_file, "w", encoding="utf-8") as dic:
-        occupied_slots = 0
-        for i, slot in enumerate(hash_table):
-            if not slot:
-                dic.write(f"Posición Hash: {i}, Token: {EMPTY_SLOT_INDICATOR}, Frecuencia: 0, Archivos: 0, Posición Posting: {EMPTY_POSTING_POSITION}\n")
+        for i, token, (freq, num_files, pos, length) in dictionary.slots():
+            if token is None:
+                dic.write(f"Posición Hash: {i}, Token: {EMPTY_SLOT_INDICATOR}, Frecuencia: 0, Archivos: 0, Posición Posting: {EMPTY_POSTING_POSITION}, Longitud Posting: 0\n")
             else:
-                occupied_slots += 1
-                for token, freq, num_files, pos in slot:
-                    dic.write(f"Posición Hash: {i}, Token: {token}, Frecuencia: {freq}, Archivos: {num_files}, Posición Posting: {pos}\n")
+                dic.write(f"Posición Hash: {i}, Token: {token}, Frecuencia: {freq}, Archivos: {num_files}, Posición Posting: {pos}, Longitud Posting: {length}\n")
+    
+    hash_file = base_dir / "a8_diccionario_hash.bin"
+    hash_table.save(hash_file)
+    mphf_file = base_dir / "a8_diccionario_mphf.bin"
+    if perfect_hash:
+        dictionary.save(mphf_file)
     
     dict_end = time.time()
     dict_time = dict_end - dict_start
 
+    binary_file = base_dir / "a8_index.bin"
+    if binary_index:
+        release_searchers()
+        doc_names = sorted({archivo for docs in token_data.values() for archivo in docs})
+        doc_ids = {name: doc_id for doc_id, name in enumerate(doc_names)}
+        write_binary_index(
+            binary_file,
+            ((token, sum(token_data[token].values()),
+              [(doc_ids[archivo], freq) for archivo, freq in sorted(token_data[token].items())])
+             for token in sorted_tokens),
+            doc_names
+        )
+
+    positions_file = base_dir / "a8_positions.bin"
+    if positional_index:
+        release_searchers()
+        doc_names = sorted({archivo for docs in token_data.values() for archivo in docs})
+        doc_ids = {name: doc_id for doc_id, name in enumerate(doc_names)}
+        write_positional_index(
+            positions_file,
+            ((token, [(doc_ids[archivo], token_positions[archivo][token]) for archivo in sorted(token_data[token])])
+             for token in sorted_tokens),
+            doc_names
+        )
+
     # --- Step 5: Crear archivo log (medición de tiempos) ---
     end_total = time.time()
     total_time = end_total - start_total
@@ -1090,22 +4267,36 @@ def actividad8(output_dir="results"):
 
     print(f"\n Archivos generados exitosamente:")
     print(f"- {dict_file}")
+    print(f"- {hash_file}")
+    if perfect_hash:
+        print(f"- {mphf_file}")
     print(f"- {posting_file}")
+    if binary_index:
+        print(f"- {binary_file}")
+    if positional_index:
+        print(f"- {positions_file}")
     print(f"- {log_file}")
     print(f"\nEstadísticas:")
     print(f"- Total tokens únicos: {len(token_data)}")
-    print(f"- Total colisiones: {colisiones}")
-    occupied = sum(1 for slot in hash_table if slot)
-    print(f"- Slots ocupados: {occupied}/{HASH_TABLE_SIZE} ({occupied/HASH_TABLE_SIZE:.2%})")
+    for line in hash_table.report_lines():
+        print(line if line.startswith(' ') else f"- {line}")
+    if perfect_hash:
+        for line in dictionary.report_lines():
+            print(f"- {line}")
     print(f"- Tiempo total: {total_time:.4f} segundos")
 
                     
 
-def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
+def actividad9(output_dir="results", stoplist_path="stoplist.txt", binary_index=True, hash_name='djb2',
+               perfect_hash=False):
     """
     Actividad 9:
     Refinar el diccionario con una stop list y eliminar tokens de una sola letra o dígito. 
     Incluye medición de tiempos y reporte de factores del sistema.
+    Si binary_index es True también genera 'a9_index.bin'.
+    hash_name elige la función hash del diccionario (ver HASH_FUNCTIONS).
+    Si perfect_hash es True también genera 'a9_diccionario_mphf.bin' y el
+    diccionario de texto sigue su orden, sin posiciones vacías.
     """
     import os
     import time
@@ -1113,7 +4304,6 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
     from pathlib import Path
 
     matricula = "A00837763"
-    HASH_TABLE_SIZE = 20000
     EMPTY_SLOT_INDICATOR = "vacio"
     EMPTY_POSTING_POSITION = -1
 
@@ -1174,7 +4364,7 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
     log_lines.append("Archivos procesados:")
     log_lines.append("-" * 70)
 
-    token_files = list(token_dir.glob("*_tokens.txt"))
+    token_files = list_token_files(token_dir)
     
     if not token_files:
         print("No se encontraron archivos tokenizados")
@@ -1186,7 +4376,7 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
         start_file = time.time()
         
         # Extract original filename
-        original_filename = token_file.stem.replace('_tokens', '') + '.html'
+        original_filename = token_file_document(token_file)
         
         try:
             with open(token_file, 'r', encoding='utf-8') as f:
@@ -1245,14 +4435,15 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
     # --- Step 6: Crear archivo posting refinado ---
     posting_start = time.time()
     
-    hash_table = [[] for _ in range(HASH_TABLE_SIZE)]  # Lista de listas para chaining
-    colisiones = 0
+    hash_table = HashDictionary(4, hash_name=hash_name)  # token -> frecuencia, archivos, posición y longitud en el posting
 
     posting_file = base_dir / "a9_posting.txt"
     
-    with open(posting_file, "w", encoding="utf-8") as post:
+    # newline="\n" para que los offsets en bytes sean iguales en todas las plataformas
+    with open(posting_file, "w", encoding="utf-8", newline="\n") as post:
         # Sort tokens alphabetically
         sorted_tokens = sorted(refined_tokens.keys())
+        posting_offset = 0  # Offset en bytes dentro de a9_posting.txt
         
         for token in sorted_tokens:
             docs = refined_tokens[token]
@@ -1260,19 +4451,13 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
             total_freq = sum(docs.values())
             
             # Guardar en posting (ordenado por archivo)
-            for archivo in sorted(docs.keys()):
-                freq = docs[archivo]
-                post.write(f"{archivo};{freq}\n")
+            block = ''.join(f"{archivo};{docs[archivo]}\n" for archivo in sorted(docs.keys()))
+            post.write(block)
+            posting_length = len(block.encode('utf-8'))
 
-            # Calcular hash del token usando DJB2
-            hash_index = hash_function(token, HASH_TABLE_SIZE)
-            
-            # Manejo de colisiones con chaining (listas de listas)
-            if hash_table[hash_index]:
-                colisiones += 1
-            
-            # Almacenar en la lista de ese índice
-            hash_table[hash_index].append((token, total_freq, num_docs, hash_index))
+            # Almacenar en la tabla hash (direccionamiento abierto) junto con su ubicación real en el posting
+            hash_table.put(token, total_freq, num_docs, posting_offset, posting_length)
+            posting_offset += posting_length
 
     posting_end = time.time()
     posting_time = posting_end - posting_start
@@ -1280,30 +4465,54 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
     # --- Step 7: Generar diccionario refinado ---
     dict_start = time.time()
     
+    # With perfect_hash the dictionary is written in perfect hash order, without empty slots
+    dictionary = hash_table
+    if perfect_hash:
+        dictionary = PerfectHashDictionary.build(
+            ((token, values) for _, token, values in hash_table.slots() if token is not None), 4)
+    
     dict_file = base_dir / "a9_diccionario_refinado.txt"
     
     with open(dict_file, "w", encoding="utf-8") as dic:
-        occupied_slots = 0
-        for i, slot in enumerate(hash_table):
-            if not slot:
-                dic.write(f"Posición Hash: {i}, Token: {EMPTY_SLOT_INDICATOR}, Frecuencia: 0, Archivos: 0, Posición Posting: {EMPTY_POSTING_POSITION}\n")
+        for i, token, (freq, num_files, pos, length) in dictionary.slots():
+            if token is None:
+                dic.write(f"Posición Hash: {i}, Token: {EMPTY_SLOT_INDICATOR}, Frecuencia: 0, Archivos: 0, Posición Posting: {EMPTY_POSTING_POSITION}, Longitud Posting: 0\n")
             else:
-                occupied_slots += 1
-                for token, freq, num_files, pos in slot:
-                    dic.write(f"Posición Hash: {i}, Token: {token}, Frecuencia: {freq}, Archivos: {num_files}, Posición Posting: {pos}\n")
+                dic.write(f"Posición Hash: {i}, Token: {token}, Frecuencia: {freq}, Archivos: {num_files}, Posición Posting: {pos}, Longitud Posting: {length}\n")
         
         dic.write("\n=== ESTADÍSTICAS DE FILTRADO ===\n")
         dic.write(f"Tokens originales: {tokens_before_filter}\n")
         dic.write(f"Removidos por stop list: {tokens_removed_stoplist}\n")
         dic.write(f"Removidos por longitud/dígitos: {tokens_removed_single_char}\n")
         dic.write(f"Tokens finales: {len(refined_tokens)}\n")
-        dic.write(f"Número total de colisiones: {colisiones}\n")
-        dic.write(f"Slots ocupados: {occupied_slots}/{HASH_TABLE_SIZE}\n")
-        dic.write(f"Factor de carga: {occupied_slots/HASH_TABLE_SIZE:.2%}\n")
+        for line in hash_table.report_lines():
+            dic.write(f"{line}\n")
+        if perfect_hash:
+            for line in dictionary.report_lines():
+                dic.write(f"{line}\n")
+    
+    hash_file = base_dir / "a9_diccionario_refinado.bin"
+    hash_table.save(hash_file)
+    mphf_file = base_dir / "a9_diccionario_mphf.bin"
+    if perfect_hash:
+        dictionary.save(mphf_file)
     
     dict_end = time.time()
     dict_time = dict_end - dict_start
 
+    binary_file = base_dir / "a9_index.bin"
+    if binary_index:
+        release_searchers()
+        doc_names = sorted({archivo for docs in refined_tokens.values() for archivo in docs})
+        doc_ids = {name: doc_id for doc_id, name in enumerate(doc_names)}
+        write_binary_index(
+            binary_file,
+            ((token, sum(refined_tokens[token].values()),
+              [(doc_ids[archivo], freq) for archivo, freq in sorted(refined_tokens[token].items())])
+             for token in sorted_tokens),
+            doc_names
+        )
+
     # --- Step 8: Crear log de tiempo y documentación técnica ---
     end_total = time.time()
     total_time = end_total - start_total
@@ -1318,8 +4527,7 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
         f"Tokens refinados: {len(refined_tokens)}",
         f"Tokens removidos por stop list: {tokens_removed_stoplist}",
         f"Tokens removidos por longitud/dígitos: {tokens_removed_single_char}",
-        f"Número total de colisiones: {colisiones}",
-        f"Slots ocupados: {sum(1 for slot in hash_table if slot)}/{HASH_TABLE_SIZE}"
+        *hash_table.report_lines()
     ])
 
     log_file = base_dir / "reports" / f"activity_9_{matricula}.txt"
@@ -1341,22 +4549,373 @@ def actividad9(output_dir="results", stoplist_path="stoplist.txt"):
     print(f"\n Archivos generados:")
     print(f"- {posting_file}")
     print(f"- {dict_file}")
+    print(f"- {hash_file}")
+    if perfect_hash:
+        print(f"- {mphf_file}")
+    if binary_index:
+        print(f"- {binary_file}")
     print(f"- {log_file}")
     print(f"\nEstadísticas finales:")
     print(f"- Tokens refinados: {len(refined_tokens)}")
     print(f"- Reducción: {(1 - len(refined_tokens)/len(token_data))*100:.1f}%")
-    print(f"- Colisiones: {colisiones}")
+    mean_probes, max_probes = hash_table.probe_summary()
+    print(f"- Sondeos por búsqueda: promedio {mean_probes:.3f}, máximo {max_probes}")
     print(f"- Tiempo total: {total_time:.4f} segundos")
 
 
-def actividad10(output_dir="results"):
+# --- Pesos máximos por bloque (poda del top k) ---
+# Para cada término del índice tf·idf se guarda su peso máximo y, por cada
+# bloque de BLOCK_MAX_SIZE postings, el último doc_id y el peso máximo del
+# bloque. Multiplicados por el peso del término en la consulta son cotas del
+# puntaje que permiten no puntuar documentos que no pueden entrar en el
+# top k (maxscore_top_k).
+#   cabecera | término (peso máximo, primer bloque) * num_terms | bloques
+# El término i es el registro i del índice binario (mismo orden alfabético)
+# y tiene ceil(num_docs / block_size) bloques.
+BLOCK_MAX_SIZE = 64
+BLOCK_MAX_MAGIC = b"HTBMX001"
+BLOCK_MAX_HEADER = struct.Struct('<8sII')  # magic, num_terms, block_size
+BLOCK_MAX_TERM = struct.Struct('<fQ')      # max_weight, first_block
+BLOCK_MAX_BLOCK = struct.Struct('<If')     # last_doc_id, max_weight
+# Con menos postings en total la consulta se puntúa completa: la poda no compensa su costo
+MAXSCORE_MIN_POSTINGS = 4096
+
+
+def block_max_entries(postings, block_size=BLOCK_MAX_SIZE):
+    """[(último doc_id, peso máximo)] de cada bloque de block_size postings (doc_id, peso)."""
+    return [(postings[min(start + block_size, len(postings)) - 1][0],
+             max(weight for _, weight in postings[start:start + block_size]))
+            for start in range(0, len(postings), block_size)]
+
+
+def write_block_max(blockmax_file, term_blocks, block_size=BLOCK_MAX_SIZE):
+    """
+    Escribe la tabla de pesos máximos.
+
+    Args:
+        term_blocks: Lista con los block_max_entries de cada término, en el
+                     orden del índice binario
+    """
+    terms = bytearray()
+    blocks = bytearray()
+    num_blocks = 0
+    for entries in term_blocks:
+        terms += BLOCK_MAX_TERM.pack(max((weight for _, weight in entries), default=0.0), num_blocks)
+        for last_doc, weight in entries:
+            blocks += BLOCK_MAX_BLOCK.pack(last_doc, weight)
+        num_blocks += len(entries)
+
+    blockmax_file = Path(blockmax_file)
+    tmp_file = blockmax_file.with_name(blockmax_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(BLOCK_MAX_HEADER.pack(BLOCK_MAX_MAGIC, len(term_blocks), block_size))
+        f.write(terms)
+        f.write(blocks)
+    os.replace(tmp_file, blockmax_file)
+
+
+class BlockMaxTable:
+    """Lector de la tabla de write_block_max (se lee completa; se recarga si cambia el mtime)."""
+
+    def __init__(self, blockmax_file):
+        self.blockmax_file = Path(blockmax_file)
+        self._data = None
+        self._mtime = None
+
+    def load(self):
+        mtime = self.blockmax_file.stat().st_mtime_ns
+        data = self.blockmax_file.read_bytes()
+        magic, self.num_terms, self.block_size = BLOCK_MAX_HEADER.unpack_from(data, 0)
+        if magic != BLOCK_MAX_MAGIC:
+            raise ValueError(f"{self.blockmax_file} no es una tabla de pesos máximos válida")
+        self._blocks_offset = BLOCK_MAX_HEADER.size + self.num_terms * BLOCK_MAX_TERM.size
+        self._data = data
+        self._mtime = mtime
+
+    def _ensure_loaded(self):
+        if self._data is None or self._mtime != self.blockmax_file.stat().st_mtime_ns:
+            self.load()
+
+    def term_blocks(self, term_index, num_docs):
+        """(peso máximo, [último doc_id de cada bloque], [peso máximo de cada bloque]) del término."""
+        self._ensure_loaded()
+        max_weight, first_block = BLOCK_MAX_TERM.unpack_from(
+            self._data, BLOCK_MAX_HEADER.size + term_index * BLOCK_MAX_TERM.size)
+        num_blocks = -(-num_docs // self.block_size)
+        start = self._blocks_offset + first_block * BLOCK_MAX_BLOCK.size
+        entries = list(BLOCK_MAX_BLOCK.iter_unpack(self._data[start:start + num_blocks * BLOCK_MAX_BLOCK.size]))
+        return max_weight, [last_doc for last_doc, _ in entries], [weight for _, weight in entries]
+
+
+def maxscore_top_k(index, block_max, query_weights, k):
+    """
+    Top k (doc_id, puntaje) de una consulta OR con poda dinámica (MaxScore
+    con cotas por bloque): mismo resultado que puntuar todos los postings.
+
+    Los términos se recorren de mayor a menor cota (peso en la consulta por
+    peso máximo del término). Mientras la suma de las cotas que faltan pueda
+    superar el umbral (el k-ésimo mejor puntaje parcial), el término se suma
+    completo. Después ningún documento nuevo puede entrar en el top k: los
+    términos que faltan solo se buscan (bisect) en los documentos candidatos,
+    y ni eso si la cota del bloque donde estaría el documento no alcanza.
+
+    Args:
+        query_weights: {término: peso en la consulta}
+    """
+    terms = []
+    for term, query_weight in query_weights.items():
+        doc_ids, weights = index.posting_columns(term)
+        max_weight, last_docs, block_maxes = block_max.term_blocks(index.find(term), len(doc_ids))
+        terms.append((query_weight * max_weight, query_weight, doc_ids, weights, last_docs, block_maxes))
+    terms.sort(key=itemgetter(0), reverse=True)
+    # Bound of everything from term i on; sums, not subtractions, so rounding never undercuts a score
+    remaining = [sum(term[0] for term in terms[i:]) for i in range(len(terms) + 1)]
+
+    scores = {}
+    threshold = float('-inf')
+    i = 0
+    while i < len(terms) and remaining[i] >= threshold:
+        _, query_weight, doc_ids, weights, _, _ = terms[i]
+        get = scores.get
+        for doc_id, weight in zip(doc_ids, weights):
+            scores[doc_id] = get(doc_id, 0.0) + query_weight * weight
+        i += 1
+        # No score can exceed the bounds already summed; while those do not beat the
+        # remaining bound the threshold cannot stop the loop, so it is not computed
+        if len(scores) >= k and remaining[i] < remaining[0] - remaining[i]:
+            threshold = heapq.nlargest(k, scores.values())[-1]
+
+    candidates = {doc_id: score for doc_id, score in scores.items() if score + remaining[i] >= threshold}
+    for i in range(i, len(terms)):
+        _, query_weight, doc_ids, weights, last_docs, block_maxes = terms[i]
+        rest = remaining[i + 1]
+        pos = block = 0
+        kept = {}
+        for doc_id in sorted(candidates):
+            score = candidates[doc_id]
+            block = bisect.bisect_left(last_docs, doc_id, block)
+            if block < len(last_docs) and score + rest + query_weight * block_maxes[block] >= threshold:
+                pos = bisect.bisect_left(doc_ids, doc_id, pos)
+                if pos < len(doc_ids) and doc_ids[pos] == doc_id:
+                    score += query_weight * weights[pos]
+            if score + rest >= threshold:
+                kept[doc_id] = score
+        candidates = kept
+        if len(candidates) >= k:
+            threshold = max(threshold, heapq.nlargest(k, candidates.values())[-1])
+
+    top = heapq.nlargest(k, candidates.items(), key=itemgetter(1))
+    return sorted(top, key=lambda item: (-item[1], item[0]))
+
+
+# --- Pesos tf·idf (actividad 10) ---
+# Esquemas de la frecuencia del término (tf) y de la frecuencia inversa de
+# documento (idf, con df documentos de un total de n).
+TF_SCHEMES = {
+    'raw': lambda tf: float(tf),
+    'log': lambda tf: 1 + math.log(tf) if tf > 0 else 0.0,
+    'boolean': lambda tf: 1.0 if tf > 0 else 0.0,
+}
+IDF_SCHEMES = {
+    'none': lambda df, n: 1.0,
+    'idf': lambda df, n: math.log(n / df),
+    'smooth': lambda df, n: math.log((1 + n) / (1 + df)) + 1,
+}
+
+# Tabla de normas: cabecera y después una norma float64 por doc_id
+TFIDF_NORMS_MAGIC = b"HTNRM001"
+TFIDF_NORMS_HEADER = struct.Struct('<8sI8s8s')  # magic, num_docs, tf_scheme, idf_scheme
+TFIDF_NORM = struct.Struct('<d')
+
+
+def write_tfidf_index(index_file, norms_file, word_docs, doc_total_tokens, tf_scheme='log', idf_scheme='smooth',
+                      blockmax_file=None, block_size=BLOCK_MAX_SIZE):
+    """
+    Escribe los pesos tf·idf en un índice binario (write_binary_index) y la
+    norma del vector de cada documento en una tabla aparte.
+
+    Los pesos guardados ya están divididos entre la norma del documento, así
+    que la similitud coseno de una consulta es una sola multiplicación y suma
+    por posting (ver cosine_top_k). El índice usa el formato de los índices
+    binarios de las actividades 8 y 9, con pesos float32: con pesos en
+    [0, 1] el error relativo es de 6e-8, muy por debajo de lo que cambia el
+    orden del ranking, y cada posting ocupa 8 bytes en lugar de 12. Las
+    normas sí se guardan en float64.
+
+    Args:
+        word_docs: {token: {archivo: frecuencia}}
+        doc_total_tokens: {archivo: total de tokens}; se guarda como longitud del documento
+        blockmax_file: Si se indica, también se escribe ahí la tabla de pesos
+                       máximos por término y por bloque (write_block_max)
+
+    Returns:
+        ({archivo: norma}, {token: {archivo: peso tf·idf normalizado}})
+    """
+    if tf_scheme not in TF_SCHEMES or idf_scheme not in IDF_SCHEMES:
+        raise ValueError(f"Esquema tf·idf no válido: {tf_scheme}/{idf_scheme} "
+                         f"(tf: {', '.join(TF_SCHEMES)}; idf: {', '.join(IDF_SCHEMES)})")
+    tf_weight = TF_SCHEMES[tf_scheme]
+    idf_weight = IDF_SCHEMES[idf_scheme]
+
+    doc_names = sorted(set(doc_total_tokens).union(*word_docs.values()))
+    doc_ids = {name: doc_id for doc_id, name in enumerate(doc_names)}
+    num_docs = len(doc_names)
+
+    # Tokens in sorted order so the sums (and the files) do not depend on dict order
+    squares = [0.0] * num_docs
+    for token in sorted(word_docs):
+        docs = word_docs[token]
+        idf = idf_weight(len(docs), num_docs)
+        for filename, freq in docs.items():
+            squares[doc_ids[filename]] += (tf_weight(freq) * idf) ** 2
+    norms = [math.sqrt(square) for square in squares]
+
+    term_blocks = []
+    weights = {}  # {token: {archivo: peso}}
+
+    def term_postings():
+        for token in sorted(word_docs):
+            docs = word_docs[token]
+            idf = idf_weight(len(docs), num_docs)
+            postings = []
+            token_weights = weights[token] = {}
+            for filename in sorted(docs):
+                doc_id = doc_ids[filename]
+                norm = norms[doc_id]
+                weight = tf_weight(docs[filename]) * idf / norm if norm else 0.0
+                token_weights[filename] = weight
+                postings.append((doc_id, weight))
+            if blockmax_file is not None:
+                term_blocks.append(block_max_entries(postings, block_size))
+            yield token, sum(docs.values()), postings
+
+    write_binary_index(index_file, term_postings(), doc_names,
+                       [doc_total_tokens.get(name, 0) for name in doc_names])
+    if blockmax_file is not None:
+        write_block_max(blockmax_file, term_blocks, block_size)
+
+    norms_file = Path(norms_file)
+    tmp_file = norms_file.with_name(norms_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(TFIDF_NORMS_HEADER.pack(TFIDF_NORMS_MAGIC, num_docs,
+                                        tf_scheme.encode('ascii'), idf_scheme.encode('ascii')))
+        for norm in norms:
+            f.write(TFIDF_NORM.pack(norm))
+    os.replace(tmp_file, norms_file)
+
+    return dict(zip(doc_names, norms)), weights
+
+
+def read_tfidf_norms(norms_file):
+    """Lee la tabla de write_tfidf_index; devuelve (tf_scheme, idf_scheme, [norma por doc_id])."""
+    data = Path(norms_file).read_bytes()
+    magic, num_docs, tf_scheme, idf_scheme = TFIDF_NORMS_HEADER.unpack_from(data, 0)
+    if magic != TFIDF_NORMS_MAGIC:
+        raise ValueError(f"{norms_file} no es una tabla de normas válida")
+    norms = [norm for norm, in TFIDF_NORM.iter_unpack(
+        data[TFIDF_NORMS_HEADER.size:TFIDF_NORMS_HEADER.size + num_docs * TFIDF_NORM.size])]
+    return tf_scheme.rstrip(b'\0').decode('ascii'), idf_scheme.rstrip(b'\0').decode('ascii'), norms
+
+
+def cosine_top_k(index, query, k, tf_scheme='log', idf_scheme='smooth', block_max=None):
+    """
+    Los k documentos más similares (coseno) a la consulta: [(doc_id, puntaje)].
+
+    index es el índice de write_tfidf_index, con pesos ya normalizados: cada
+    posting suma peso_consulta * peso_documento y no se normaliza nada al
+    consultar (la norma de la consulta no cambia el orden). Con block_max
+    (BlockMaxTable) las consultas OR se resuelven con maxscore_top_k, sin
+    puntuar los documentos que no pueden entrar en el top k.
+    """
+    node = parse_query(query)
+    if node is None or k <= 0:
+        return []
+
+    tf_weight = TF_SCHEMES[tf_scheme]
+    idf_weight = IDF_SCHEMES[idf_scheme]
+    num_docs = len(index.doc_lengths())
+
+    query_weights = {}
+    num_postings = 0
+    for term, query_freq in Counter(query_terms(node)).items():
+        df = index.doc_frequency(term)
+        if df:
+            query_weights[term] = tf_weight(query_freq) * idf_weight(df, num_docs)
+            num_postings += df
+
+    if block_max is not None and is_disjunctive(node) and num_postings >= MAXSCORE_MIN_POSTINGS:
+        return maxscore_top_k(index, block_max, query_weights, k)
+
+    scores = {}
+    for term, query_weight in query_weights.items():
+        for doc_id, weight in index.postings(term):
+            scores[doc_id] = scores.get(doc_id, 0.0) + query_weight * weight
+
+    return select_top_k(scores, node, index, k)
+
+
+def a10_weight_column(weight):
+    """
+    Convierte un peso de la actividad 10 a la columna de 2 caracteres del posting.
+
+    Los pesos tf·idf normalizados están en [0, 1]: se escalan por 100
+    (0.03→3, 0.33→33) y 1.0 queda en 99.
+    """
+    return min(99, max(0, int(round(weight * 100))))  # Cap at 99 for 2-digit display
+
+def write_a10_files(weighted_dict_file, weighted_post_file, token_list, posting_by_token):
+    """
+    Escribe a10_Diccionario_Weighted.txt y a10_Posting_Weighted.txt con columnas de tamaño fijo.
+
+    Args:
+        token_list: [(token, repeticiones, num_docs)] en el orden del diccionario
+        posting_by_token: {token: [(archivo, frecuencia, peso)]}
+    """
+    # Write weighted dictionary (same structure, fixed width)
+    weighted_dict_lines = []
+    weighted_dict_lines.append(f"{'Token':<15}{'N°Docs':<5}\n")  # Header
+    
+    for token, repetitions, num_docs in token_list:
+        # Format: Token (15 chars) + N°Docs (5 chars) = 20 bytes
+        token_short = token[:15] if len(token) > 15 else token
+        line = f"{token_short:<15}{num_docs:<5}\n"
+        weighted_dict_lines.append(line)
+    
+    with open(weighted_dict_file, 'w', encoding='utf-8') as f:
+        f.writelines(weighted_dict_lines)
+    
+    # Write weighted posting file
+    weighted_posting_lines = []
+    weighted_posting_lines.append(f"{'Archivo':<8}{' P':>2}\n")  # Header (10 bytes): 8 chars filename, 2 chars weight (right-aligned, " P" for Peso)
+    
+    # Write in token order
+    for token, repetitions, num_docs in token_list:
+        if token in posting_by_token:
+            for filename, freq, weight in sorted(posting_by_token[token]):
+                # Format: Archivo (8 chars) + Peso (2 chars) = 10 bytes
+                weight_int = a10_weight_column(weight)
+                # Ensure filename is exactly 8 characters: truncate if longer, pad with spaces if shorter
+                filename_short = (filename[:8] if len(filename) >= 8 else filename).ljust(8)
+                # Format: exactly 8 chars for filename, exactly 2 chars for weight (right-aligned)
+                line = f"{filename_short}{weight_int:>2}\n"  # No space between, exact widths
+                weighted_posting_lines.append(line)
+    
+    with open(weighted_post_file, 'w', encoding='utf-8') as f:
+        f.writelines(weighted_posting_lines)
+
+def actividad10(output_dir="results", tf_scheme='log', idf_scheme='smooth'):
     """
     Actividad 10: Weight tokens using tf.idf formula.
     
-    Formula: tf.idf = (# de repeticiones * 100) / # de total de tokens en el documento
+    Formula: tf(frecuencia) * idf(documentos del token) / norma del documento,
+    con los esquemas tf_scheme e idf_scheme (ver TF_SCHEMES e IDF_SCHEMES).
     
-    Modifies the posting file to replace frequency with weight.
+    Modifies the posting file to replace frequency with weight (scaled by
+    100, see a10_weight_column).
     Uses fixed column sizes (20 bytes for dictionary, 10 bytes for posting).
+    
+    Los mismos pesos, sin redondear, van a a10_index.bin y las normas de los
+    documentos a a10_norms.bin (ver write_tfidf_index); search_cosine los usa.
     """
     import time
     from collections import defaultdict
@@ -1373,6 +4932,9 @@ def actividad10(output_dir="results"):
     post_file = dict_posting_dir / "a7_Posting.txt"
     weighted_post_file = dict_posting_dir / "a10_Posting_Weighted.txt"
     weighted_dict_file = dict_posting_dir / "a10_Diccionario_Weighted.txt"
+    tfidf_index_file = dict_posting_dir / "a10_index.bin"
+    norms_file = dict_posting_dir / "a10_norms.bin"
+    blockmax_file = dict_posting_dir / "a10_blockmax.bin"
     report_file = base_dir / "reports" / "activity_10_weighting.txt"
     report_file.parent.mkdir(parents=True, exist_ok=True)
     
@@ -1410,11 +4972,11 @@ def actividad10(output_dir="results"):
     log_lines.append("-" * 70)
     
     doc_total_tokens = {}  # {filename: total_tokens}
-    token_files = list(token_dir.glob("*_tokens.txt"))
+    token_files = list_token_files(token_dir)
     
     for token_file in token_files:
         file_start = time.time()
-        original_filename = token_file.stem.replace('_tokens', '') + '.html'
+        original_filename = token_file_document(token_file)
         total_tokens = 0
         
         try:
@@ -1476,9 +5038,8 @@ def actividad10(output_dir="results"):
                 num_docs = int(parts[2])
                 token_list.append((token, repetitions, num_docs))
     
-    # Read posting file and calculate weights
-    posting_data = []  # List of (token, filename, frequency, weight)
-    posting_index = 0
+    # Read posting file
+    word_docs = {}  # {token: {filename: frequency}}
     
     with open(post_file, 'r', encoding='utf-8') as f:
         # No header in posting file - format: archivo.html;frecuencia
@@ -1494,30 +5055,16 @@ def actividad10(output_dir="results"):
                 if len(parts) >= 2:
                     filename = parts[0]
                     frequency = int(parts[1])
-                    
-                    # Calculate weight: tf.idf = (frequency * 100) / total_tokens_in_doc
-                    total_tokens_in_doc = doc_total_tokens.get(filename)
-                    if total_tokens_in_doc is None:
-                        # If filename not found, try to find it (case-insensitive or without extension)
-                        found = False
-                        for key in doc_total_tokens.keys():
-                            if key.lower() == filename.lower() or key == filename:
-                                total_tokens_in_doc = doc_total_tokens[key]
-                                found = True
-                                break
-                        if not found:
-                            # Log warning and use a default (but this shouldn't happen)
-                            log_lines.append(f"WARNING: No se encontró total_tokens para {filename}, usando 1")
-                            total_tokens_in_doc = 1
-                    
-                    if total_tokens_in_doc == 0:
-                        total_tokens_in_doc = 1  # Avoid division by zero
-                    
-                    # Calculate weight: (frequency * 100) / total_tokens_in_doc
-                    # This gives a percentage-like value (0-100 range typically)
-                    weight = (frequency * 100) / total_tokens_in_doc
-                    
-                    posting_data.append((token, filename, frequency, weight))
+                    if filename not in doc_total_tokens:
+                        log_lines.append(f"WARNING: No se encontró total_tokens para {filename}")
+                    word_docs.setdefault(token, {})[filename] = frequency
+    
+    # Real tf·idf weights, normalized by the precomputed document norms
+    release_searchers()
+    doc_norms, tfidf = write_tfidf_index(tfidf_index_file, norms_file, word_docs, doc_total_tokens,
+                                         tf_scheme, idf_scheme, blockmax_file)
+    posting_data = [(token, filename, frequency, tfidf[token][filename])
+                    for token, docs in word_docs.items() for filename, frequency in docs.items()]
     
     weight_end = time.time()
     weight_time = weight_end - weight_start
@@ -1538,52 +5085,21 @@ def actividad10(output_dir="results"):
     DICT_COL_SIZE = 20
     POST_COL_SIZE = 10
     
-    # Write weighted dictionary (same structure, fixed width)
-    weighted_dict_lines = []
-    weighted_dict_lines.append(f"{'Token':<15}{'N°Docs':<5}\n")  # Header
-    
-    for token, repetitions, num_docs in token_list:
-        # Format: Token (15 chars) + N°Docs (5 chars) = 20 bytes
-        token_short = token[:15] if len(token) > 15 else token
-        line = f"{token_short:<15}{num_docs:<5}\n"
-        weighted_dict_lines.append(line)
-    
-    with open(weighted_dict_file, 'w', encoding='utf-8') as f:
-        f.writelines(weighted_dict_lines)
-    
-    # Write weighted posting file
-    weighted_posting_lines = []
-    weighted_posting_lines.append(f"{'Archivo':<8}{' P':>2}\n")  # Header (10 bytes): 8 chars filename, 2 chars weight (right-aligned, " P" for Peso)
-    
     # Group posting data by token (maintain order)
     posting_by_token = defaultdict(list)
     for token, filename, freq, weight in posting_data:
         posting_by_token[token].append((filename, freq, weight))
     
-    # Write in token order
-    for token, repetitions, num_docs in token_list:
-        if token in posting_by_token:
-            for filename, freq, weight in sorted(posting_by_token[token]):
-                # Format: Archivo (8 chars) + Peso (2 chars) = 10 bytes
-                # Formula: tf.idf = (frequency * 100) / total_tokens_in_doc
-                # Scale by 100 to preserve precision: converts 0.03→3, 0.33→33, 8.0→99 (capped)
-                # This preserves the relative differences between weights
-                weight_scaled = weight * 100
-                weight_int = min(99, max(0, int(round(weight_scaled))))  # Cap at 99 for 2-digit display
-                # Ensure filename is exactly 8 characters: truncate if longer, pad with spaces if shorter
-                filename_short = (filename[:8] if len(filename) >= 8 else filename).ljust(8)
-                # Format: exactly 8 chars for filename, exactly 2 chars for weight (right-aligned)
-                line = f"{filename_short}{weight_int:>2}\n"  # No space between, exact widths
-                weighted_posting_lines.append(line)
-    
-    with open(weighted_post_file, 'w', encoding='utf-8') as f:
-        f.writelines(weighted_posting_lines)
+    write_a10_files(weighted_dict_file, weighted_post_file, token_list, posting_by_token)
     
     write_end = time.time()
     write_time = write_end - write_start
     
     log_lines.append(f"Archivo diccionario: {weighted_dict_file}")
     log_lines.append(f"Archivo posting: {weighted_post_file}")
+    log_lines.append(f"Índice tf·idf ({tf_scheme}/{idf_scheme}): {tfidf_index_file}")
+    log_lines.append(f"Normas de {len(doc_norms)} documentos: {norms_file}")
+    log_lines.append(f"Pesos máximos por término y por bloque de {BLOCK_MAX_SIZE}: {blockmax_file}")
     log_lines.append(f"Tamaño columna diccionario: {DICT_COL_SIZE} bytes")
     log_lines.append(f"Tamaño columna posting: {POST_COL_SIZE} bytes")
     log_lines.append(f"Tiempo escribiendo archivos: {write_time:.6f} segundos")
@@ -1612,48 +5128,261 @@ def actividad10(output_dir="results"):
     # Sample some weights for debugging
     sample_weights = [w for _, _, _, w in posting_data[:10]] if posting_data else []
     
-    log_lines.extend([
-        "=== ESTADÍSTICAS ===",
-        f"Total tokens únicos: {unique_tokens}",
-        f"Total registros en posting: {total_tokens_weighted}",
-        f"Peso promedio: {avg_weight:.6f}",
-        f"Peso máximo: {max_weight:.6f}",
-        f"Peso mínimo: {min_weight:.6f}",
-        f"Pesos que se redondean a 0: {weights_rounded_to_zero}",
-        f"Pesos no-cero (redondeados): {weights_non_zero}",
-        f"Total documentos procesados para total_tokens: {len(doc_total_tokens)}",
-        f"Archivos en posting: {len(files_in_posting)}",
-        f"Distribución de archivos: {dict(sorted(files_in_posting.items(), key=lambda x: x[1], reverse=True))}",
-        f"Muestra de primeros 10 pesos calculados: {[f'{w:.4f}' for w in sample_weights]}",
-        "",
-        "=== TIEMPOS ===",
-        f"Tiempo calculando pesos: {weight_time:.6f} segundos",
-        f"Tiempo escribiendo archivos: {write_time:.6f} segundos",
-        f"Tiempo total de ejecución: {total_program_time:.6f} segundos",
-        "",
-        "Proceso completado correctamente."
-    ])
+    log_lines.extend([
+        "=== ESTADÍSTICAS ===",
+        f"Total tokens únicos: {unique_tokens}",
+        f"Total registros en posting: {total_tokens_weighted}",
+        f"Peso promedio: {avg_weight:.6f}",
+        f"Peso máximo: {max_weight:.6f}",
+        f"Peso mínimo: {min_weight:.6f}",
+        f"Pesos que se redondean a 0: {weights_rounded_to_zero}",
+        f"Pesos no-cero (redondeados): {weights_non_zero}",
+        f"Total documentos procesados para total_tokens: {len(doc_total_tokens)}",
+        f"Archivos en posting: {len(files_in_posting)}",
+        f"Distribución de archivos: {dict(sorted(files_in_posting.items(), key=lambda x: x[1], reverse=True))}",
+        f"Muestra de primeros 10 pesos calculados: {[f'{w:.4f}' for w in sample_weights]}",
+        "",
+        "=== TIEMPOS ===",
+        f"Tiempo calculando pesos: {weight_time:.6f} segundos",
+        f"Tiempo escribiendo archivos: {write_time:.6f} segundos",
+        f"Tiempo total de ejecución: {total_program_time:.6f} segundos",
+        "",
+        "Proceso completado correctamente."
+    ])
+    
+    # Write report file
+    with open(report_file, 'w', encoding='utf-8') as log:
+        log.write('\n'.join(log_lines))
+    
+    print(f"\nActividad 10 completada.")
+    print(f"Archivos generados:")
+    print(f"  - Diccionario con pesos: {weighted_dict_file}")
+    print(f"  - Posting con pesos: {weighted_post_file}")
+    print(f"  - Índice tf·idf: {tfidf_index_file}")
+    print(f"  - Normas de documentos: {norms_file}")
+    print(f"  - Pesos máximos por bloque: {blockmax_file}")
+    print(f"  - Reporte: {report_file}")
+    print(f"Total tokens procesados: {total_tokens_weighted}")
+    print(f"Peso promedio: {avg_weight:.4f}")
+    print(f"Tiempo total: {total_program_time:.6f} segundos")
+
+
+def write_a11_documents(documents_file, documents):
+    """
+    Escribe a11_Documentos.txt.
+
+    Args:
+        documents: [(doc_id, ruta_del_documento)] en orden de doc_id
+    """
+    documents_lines = []
+    documents_lines.append(f"{'ID':<5}{'Documento':<50}\n")  # Header
+    
+    for doc_id, full_path in documents:
+        # Format: 80 bytes = ID (10) + Documento (70)
+        documents_lines.append(f"{doc_id:<10}{full_path:<70}\n")
+    
+    with open(documents_file, 'w', encoding='utf-8') as f:
+        f.writelines(documents_lines)
+
+def write_a11_files(indexed_post_file, indexed_dict_file, token_list, posting_by_token):
+    """
+    Escribe a11_Posting_Indexed.txt y a11_Diccionario_Indexed.txt con columnas de tamaño fijo.
+
+    Args:
+        token_list: [(token, repeticiones, num_docs)] en el orden del diccionario
+        posting_by_token: {token: [(doc_id, peso)]}
+    """
+    # Write indexed posting file
+    indexed_posting_lines = []
+    indexed_posting_lines.append(f"{'DocID':<5}{'Peso':<5}\n")  # Header (10 bytes)
+    
+    # Write in token order
+    for token, _, _ in token_list:
+        if token in posting_by_token:
+            for doc_id, weight in sorted(posting_by_token[token]):  # Sort by doc_id
+                # Format: DocID (5 chars) + Peso (5 chars) = 10 bytes
+                weight_str = str(min(99999, int(weight)))[:5]  # Cap at 5 digits
+                line = f"{doc_id:<5}{weight_str:<5}\n"
+                indexed_posting_lines.append(line)
+    
+    with open(indexed_post_file, 'w', encoding='utf-8') as f:
+        f.writelines(indexed_posting_lines)
+    
+    # Write indexed dictionary file
+    indexed_dict_lines = []
+    indexed_dict_lines.append(f"{'Token':<15}{'N°Docs':<5}\n")  # Header (20 bytes)
+    
+    for token, repetitions, num_docs in token_list:
+        # Format: Token (15 chars) + N°Docs (5 chars) = 20 bytes
+        token_short = token[:15] if len(token) > 15 else token
+        line = f"{token_short:<15}{num_docs:<5}\n"
+        indexed_dict_lines.append(line)
     
-    # Write report file
+    with open(indexed_dict_file, 'w', encoding='utf-8') as f:
+        f.writelines(indexed_dict_lines)
+
+# --- Posting comprimido (actividad 11) ---
+# Por token, los doc_id ordenados como diferencias (delta_encode) y las
+# frecuencias del posting de la actividad 7, cada lista codificada con uno de los POSTING_CODECS. Las listas siguen el
+# orden de a11_Diccionario_Indexed.txt (el de a7_Diccionario.txt), así que el
+# token no se guarda: basta un offset por término.
+#   cabecera | offsets (uint32 por término) | listas
+# Cada lista empieza con num_docs y el largo de los doc_id en variable byte;
+# las frecuencias ocupan el resto hasta la lista siguiente.
+COMPRESSED_POSTING_MAGIC = b"HTCPS002"
+COMPRESSED_HEADER = struct.Struct('<8s8sI')  # magic, codec, num_terms
+
+
+def write_compressed_postings(compressed_file, tokens, posting_by_token, codec='vbyte'):
+    """
+    Escribe el posting de la actividad 11 comprimido con el codec indicado.
+
+    Args:
+        tokens: tokens en el orden del diccionario (una lista por token)
+        posting_by_token: {token: [(doc_id, frecuencia)]}
+    """
+    if codec not in POSTING_CODECS:
+        raise ValueError(f"Codec desconocido: {codec} (opciones: {', '.join(POSTING_CODECS)})")
+    encode = POSTING_CODECS[codec][0]
+
+    offsets = array('I')
+    data = bytearray()
+    for token in tokens:
+        postings = sorted(posting_by_token.get(token, ()))
+        ids = encode(delta_encode([doc_id for doc_id, _ in postings]))
+        offsets.append(len(data))
+        vbyte_encode((len(postings), len(ids)), data)
+        data += ids
+        data += encode([freq for _, freq in postings])
+
+    compressed_file = Path(compressed_file)
+    tmp_file = compressed_file.with_name(compressed_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(COMPRESSED_HEADER.pack(COMPRESSED_POSTING_MAGIC, codec.encode('ascii'), len(offsets)))
+        write_arrays(f, [offsets])
+        f.write(data)
+    os.replace(tmp_file, compressed_file)
+
+
+class CompressedPostings:
+    """
+    Lector del posting comprimido mapeado en memoria con mmap.
+
+    Solo se decodifica la lista del token consultado; el resto del archivo no
+    se toca. Para buscar por token se usa el orden de a7_Diccionario.txt
+    (por defecto el que está junto al archivo comprimido).
+    """
+
+    def __init__(self, compressed_file, dict_file=None):
+        self.compressed_file = Path(compressed_file)
+        self.dict_file = Path(dict_file) if dict_file else self.compressed_file.with_name("a7_Diccionario.txt")
+        self._term_index = None
+        self._file = open(self.compressed_file, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, codec, self.num_terms = COMPRESSED_HEADER.unpack_from(self._mm, 0)
+        if magic != COMPRESSED_POSTING_MAGIC:
+            self.close()
+            raise ValueError(f"{self.compressed_file} no es un posting comprimido válido")
+        self.codec = codec.rstrip(b'\0').decode('ascii')
+        self._decode = POSTING_CODECS[self.codec][1]
+        (self._offsets,), self._data_offset = read_arrays(self._mm, COMPRESSED_HEADER.size,
+                                                          [('I', self.num_terms)])
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def find(self, term):
+        """Devuelve el número de término del token o -1 si no existe."""
+        if self._term_index is None:
+            tokens = []
+            with open(self.dict_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.strip().split(';')
+                    if len(parts) >= 3:
+                        tokens.append(parts[0])
+            self._term_index = {token: i for i, token in enumerate(tokens)}
+        return self._term_index.get(term, -1)
+
+    def postings_at(self, i):
+        """Lista de (doc_id, frecuencia) del término número i."""
+        start = self._data_offset + self._offsets[i]
+        end = self._data_offset + self._offsets[i + 1] if i + 1 < self.num_terms else len(self._mm)
+        (num_docs, ids_len), start = vbyte_decode(self._mm, start, 2)
+        ids = self._decode(self._mm[start:start + ids_len], num_docs)
+        freqs = self._decode(self._mm[start + ids_len:end], num_docs)
+        return list(zip(delta_decode(ids), freqs))
+
+    def postings(self, term):
+        """Lista de (doc_id, frecuencia) del token; vacía si no existe."""
+        i = self.find(term)
+        if i < 0 or i >= self.num_terms:
+            return []
+        return self.postings_at(i)
+
+
+def benchmark_posting_codecs(output_dir="results", repeat=3):
+    """
+    Compara los POSTING_CODECS sobre las listas de a11_Posting_Compressed.bin:
+    tamaño total, bytes por posting y tiempo de decodificación de todas las
+    listas (el mejor de repeat). Escribe el reporte y devuelve las filas.
+    """
+    dict_posting_dir = Path(output_dir) / "dictionary_posting"
+    compressed_file = dict_posting_dir / "a11_Posting_Compressed.bin"
+    text_file = dict_posting_dir / "a11_Posting_Indexed.txt"
+    report_file = Path(output_dir) / "reports" / "codec_benchmark.txt"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+
+    reader = CompressedPostings(compressed_file)
+    try:
+        lists = []
+        for i in range(reader.num_terms):
+            postings = reader.postings_at(i)
+            lists.append(list(delta_encode([doc_id for doc_id, _ in postings])))
+            lists.append([freq for _, freq in postings])
+    finally:
+        reader.close()
+    num_postings = sum(len(numbers) for numbers in lists) // 2
+
+    rows = []  # [(codec, bytes, bytes por posting, segundos de decodificación)]
+    for name, (encode, decode) in POSTING_CODECS.items():
+        encoded = [(encode(numbers), len(numbers)) for numbers in lists]
+        size = sum(len(data) for data, _ in encoded)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for data, count in encoded:
+                decode(data, count)
+            best = min(best, time.perf_counter() - start)
+        rows.append((name, size, size / (num_postings or 1), best))
+
+    log_lines = [
+        "=== COMPARACIÓN DE CODECS DE POSTING ===",
+        f"Fecha: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Listas: {len(lists) // 2} tokens, {num_postings} postings (doc_id y frecuencia)",
+    ]
+    if text_file.exists():
+        log_lines.append(f"a11_Posting_Indexed.txt: {text_file.stat().st_size} bytes")
+    log_lines.append("")
+    log_lines.append(f"{'Codec':<10}{'Bytes':>12}{'Bytes/posting':>16}{'Decodificación (s)':>22}")
+    for name, size, per_posting, seconds in rows:
+        log_lines.append(f"{name:<10}{size:>12}{per_posting:>16.3f}{seconds:>22.6f}")
+
     with open(report_file, 'w', encoding='utf-8') as log:
         log.write('\n'.join(log_lines))
-    
-    print(f"\nActividad 10 completada.")
-    print(f"Archivos generados:")
-    print(f"  - Diccionario con pesos: {weighted_dict_file}")
-    print(f"  - Posting con pesos: {weighted_post_file}")
-    print(f"  - Reporte: {report_file}")
-    print(f"Total tokens procesados: {total_tokens_weighted}")
-    print(f"Peso promedio: {avg_weight:.4f}")
-    print(f"Tiempo total: {total_program_time:.6f} segundos")
+    print('\n'.join(log_lines))
+    print(f"Reporte: {report_file}")
+    return rows
 
 
-def actividad11(output_dir="results"):
+def actividad11(output_dir="results", codec='vbyte'):
     """
     Actividad 11: Document Index
     
     Creates a document index file that maps document names to unique IDs.
     Modifies the posting file to use document IDs instead of filenames.
+    The term frequencies of a7_Posting.txt are also written compressed with
+    the given codec (see POSTING_CODECS).
     """
     import time
     from collections import defaultdict, OrderedDict
@@ -1673,6 +5402,7 @@ def actividad11(output_dir="results"):
     documents_file = dict_posting_dir / "a11_Documentos.txt"
     indexed_post_file = dict_posting_dir / "a11_Posting_Indexed.txt"
     indexed_dict_file = dict_posting_dir / "a11_Diccionario_Indexed.txt"
+    compressed_post_file = dict_posting_dir / "a11_Posting_Compressed.bin"
     report_file = base_dir / "reports" / "activity_11_document_index.txt"
     report_file.parent.mkdir(parents=True, exist_ok=True)
     
@@ -1730,7 +5460,8 @@ def actividad11(output_dir="results"):
     
     # Read posting file to extract all document names
     with open(posting_file_to_use, 'r', encoding='utf-8') as f:
-        next(f)  # Skip header
+        if has_weights:
+            next(f)  # Skip header (a7_Posting.txt has none)
         for line in f:
             line = line.strip()
             if not line:
@@ -1773,8 +5504,7 @@ def actividad11(output_dir="results"):
     # Get full paths for documents (try to find actual files)
     html_sources_dir = base_dir.parent / "data" / "html_sources"
     
-    documents_lines = []
-    documents_lines.append(f"{'ID':<5}{'Documento':<50}\n")  # Header
+    documents = []  # [(doc_id, full_path)]
     
     for filename, doc_id in unique_documents.items():
         # Try to find full path
@@ -1788,12 +5518,9 @@ def actividad11(output_dir="results"):
         else:
             full_path = filename
         
-        # Format: ID (5 chars) + Documento (50 chars) = 55 bytes (not exactly 80, but reasonable)
-        # Actually, let's make it divisible by 80: 80 bytes = ID (10) + Documento (70)
-        documents_lines.append(f"{doc_id:<10}{full_path:<70}\n")
+        documents.append((doc_id, full_path))
     
-    with open(documents_file, 'w', encoding='utf-8') as f:
-        f.writelines(documents_lines)
+    write_a11_documents(documents_file, documents)
     
     write_docs_end = time.time()
     write_docs_time = write_docs_end - write_docs_start
@@ -1831,9 +5558,10 @@ def actividad11(output_dir="results"):
     indexed_posting_data = []  # List of (token, doc_id, weight/frequency)
     
     with open(posting_file_to_use, 'r', encoding='utf-8') as f:
-        next(f)  # Skip header
+        if has_weights:
+            next(f)  # Skip header (a7_Posting.txt has none)
         
-        for token, num_docs, position in token_list:
+        for token, _, num_docs in token_list:
             # Read num_docs entries for this token
             for _ in range(num_docs):
                 line = f.readline().strip()
@@ -1886,41 +5614,28 @@ def actividad11(output_dir="results"):
     POST_COL_SIZE = 10
     DICT_COL_SIZE = 20
     
-    # Write indexed posting file
-    indexed_posting_lines = []
-    indexed_posting_lines.append(f"{'DocID':<5}{'Peso':<5}\n")  # Header (10 bytes)
-    
     # Group posting data by token (maintain order)
     posting_by_token = defaultdict(list)
     for token, doc_id, weight in indexed_posting_data:
         posting_by_token[token].append((doc_id, weight))
     
-    # Write in token order
-    for token, num_docs, position in token_list:
-        if token in posting_by_token:
-            for doc_id, weight in sorted(posting_by_token[token]):  # Sort by doc_id
-                # Format: DocID (5 chars) + Peso (5 chars) = 10 bytes
-                weight_str = str(min(99999, int(weight)))[:5]  # Cap at 5 digits
-                line = f"{doc_id:<5}{weight_str:<5}\n"
-                indexed_posting_lines.append(line)
-    
-    with open(indexed_post_file, 'w', encoding='utf-8') as f:
-        f.writelines(indexed_posting_lines)
-    
-    # Write indexed dictionary file
-    indexed_dict_lines = []
-    indexed_dict_lines.append(f"{'Token':<15}{'N°Docs':<5}\n")  # Header (20 bytes)
-    
-    position = 0
-    for token, repetitions, num_docs in token_list:
-        # Format: Token (15 chars) + N°Docs (5 chars) = 20 bytes
-        token_short = token[:15] if len(token) > 15 else token
-        line = f"{token_short:<15}{num_docs:<5}\n"
-        indexed_dict_lines.append(line)
-        position += num_docs
-    
-    with open(indexed_dict_file, 'w', encoding='utf-8') as f:
-        f.writelines(indexed_dict_lines)
+    write_a11_files(indexed_post_file, indexed_dict_file, token_list, posting_by_token)
+    
+    # The compressed posting keeps the raw term frequencies of a7_Posting.txt
+    # (the a10 column is a rounded percentage capped at 99)
+    freq_by_token = {}  # {token: [(doc_id, frequency)]}
+    if post_file.exists():
+        with open(post_file, 'r', encoding='utf-8') as f:
+            for token, _, num_docs in token_list:
+                entries = []
+                for _ in range(num_docs):
+                    filename, _, freq = f.readline().strip().partition(';')
+                    # The weighted posting only keeps 8 characters of each name
+                    doc_id = document_id_map.get(filename[:8].strip() if has_weights else filename.strip(), 0)
+                    if doc_id and freq:
+                        entries.append((doc_id, int(freq)))
+                freq_by_token[token] = entries
+    write_compressed_postings(compressed_post_file, [token for token, _, _ in token_list], freq_by_token, codec)
     
     write_end = time.time()
     write_time = write_end - write_start
@@ -1928,6 +5643,8 @@ def actividad11(output_dir="results"):
     log_lines.append(f"Archivo de documentos: {documents_file}")
     log_lines.append(f"Archivo posting indexado: {indexed_post_file}")
     log_lines.append(f"Archivo diccionario indexado: {indexed_dict_file}")
+    log_lines.append(f"Archivo posting comprimido ({codec}): {compressed_post_file} "
+                     f"({compressed_post_file.stat().st_size} bytes, texto: {indexed_post_file.stat().st_size} bytes)")
     log_lines.append(f"Tamaño columna posting: {POST_COL_SIZE} bytes")
     log_lines.append(f"Tamaño columna diccionario: {DICT_COL_SIZE} bytes")
     log_lines.append(f"Tiempo escribiendo archivos: {write_time:.6f} segundos")
@@ -1962,12 +5679,345 @@ def actividad11(output_dir="results"):
     print(f"  - Archivo de documentos: {documents_file}")
     print(f"  - Posting indexado: {indexed_post_file}")
     print(f"  - Diccionario indexado: {indexed_dict_file}")
+    print(f"  - Posting comprimido ({codec}): {compressed_post_file}")
     print(f"  - Reporte: {report_file}")
     print(f"Total documentos: {len(unique_documents)}")
     print(f"Total registros: {len(indexed_posting_data)}")
     print(f"Tiempo total: {total_program_time:.6f} segundos")
 
 
+def build_index(input_dir, output_dir="results", workers=None, pattern='*.html', recursive=False,
+                tf_scheme='log', idf_scheme='smooth', codec='vbyte'):
+    """
+    Construcción del índice en una sola pasada.
+
+    Tokeniza cada documento una sola vez y genera en memoria lo mismo que las
+    actividades 5, 7, 10 y 11 encadenadas: diccionario y posting (a7), pesos
+    (a10), tabla de documentos y posting con IDs (a11). Solo se escriben los
+    archivos finales; no se generan ni se vuelven a leer los *_tokens.txt.
+    """
+    from collections import defaultdict
+    
+    print("=== CONSTRUCCIÓN DEL ÍNDICE EN UNA SOLA PASADA ===")
+    
+    input_path = Path(input_dir)
+    base_dir = Path(output_dir)
+    dict_posting_dir = base_dir / "dictionary_posting"
+    dict_posting_dir.mkdir(parents=True, exist_ok=True)
+    report_file = base_dir / "reports" / "activity_build_index.txt"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    if not input_path.exists():
+        print(f"Error: El directorio de entrada {input_dir} no existe")
+        return
+    
+    files_to_process = discover_html_files(input_path, pattern, recursive)
+    if not files_to_process:
+        print("No se encontraron archivos HTML")
+        return
+    
+    program_start = time.time()
+    log_lines = []
+    
+    log_lines.append("=== REPORTE DE CONSTRUCCIÓN DEL ÍNDICE EN UNA SOLA PASADA ===")
+    log_lines.append(f"Fecha: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    log_lines.append(f"Directorio de entrada: {input_dir}")
+    log_lines.append(f"Directorio de salida: {output_dir}")
+    log_lines.append("")
+    log_lines.append("Archivos procesados:")
+    log_lines.append("-" * 70)
+    
+    # Step 1: Tokenize every document once
+    word_docs = defaultdict(dict)  # {token: {filename: frequency}}
+    doc_total_tokens = {}          # {filename: total_tokens}
+    
+    results = run_parallel(tokenize_document, [input_path / filename for filename in files_to_process],
+                           workers=workers)
+    
+    for filename, (word_counter, processing_time) in zip(files_to_process, results):
+        if word_counter is None:
+            log_lines.append(f"{filename:<40} ERROR")
+            continue
+        
+        for token, count in word_counter.items():
+            word_docs[token][filename] = count
+        doc_total_tokens[filename] = sum(word_counter.values())
+        
+        log_lines.append(f"{filename:<40} {processing_time:.6f}s  {len(word_counter):>6} palabras")
+        print(f"Procesado: {filename} en {processing_time:.6f} segundos")
+    
+    tokenize_end = time.time()
+    tokenize_time = tokenize_end - program_start
+    
+    # Step 2: Dictionary and posting (actividad 7)
+    dict_file = dict_posting_dir / "a7_Diccionario.txt"
+    post_file = dict_posting_dir / "a7_Posting.txt"
+    front_coded_file = dict_posting_dir / "a7_Diccionario_fc.bin"
+    sorted_tokens, posting_records = write_a7_files(dict_file, post_file, word_docs, front_coded_file)
+    
+    # Step 3: Weights (actividad 10): tf·idf normalizado por la norma del documento
+    token_list = []            # [(token, repetitions, num_docs)]
+    weighted_by_token = {}     # {token: [(filename, frequency, weight)]}
+    tfidf_index_file = dict_posting_dir / "a10_index.bin"
+    norms_file = dict_posting_dir / "a10_norms.bin"
+    blockmax_file = dict_posting_dir / "a10_blockmax.bin"
+    release_searchers()
+    _, tfidf = write_tfidf_index(tfidf_index_file, norms_file, word_docs, doc_total_tokens, tf_scheme, idf_scheme,
+                                 blockmax_file)
+    for token in sorted_tokens:
+        docs = word_docs[token]
+        token_list.append((token, sum(docs.values()), len(docs)))
+        weighted_by_token[token] = [(filename, freq, tfidf[token][filename]) for filename, freq in docs.items()]
+    
+    weighted_dict_file = dict_posting_dir / "a10_Diccionario_Weighted.txt"
+    weighted_post_file = dict_posting_dir / "a10_Posting_Weighted.txt"
+    write_a10_files(weighted_dict_file, weighted_post_file, token_list, weighted_by_token)
+    
+    # Step 4: Document table and posting with IDs (actividad 11).
+    # IDs are assigned in order of first appearance in the posting, as actividad 11 does.
+    document_id_map = {}  # {filename: doc_id}
+    indexed_by_token = {}  # {token: [(doc_id, weight)]}
+    freq_by_token = {}     # {token: [(doc_id, frequency)]} for the compressed posting
+    for token, _, _ in token_list:
+        entries = []
+        freqs = []
+        for filename, freq, weight in sorted(weighted_by_token[token]):
+            doc_id = document_id_map.setdefault(filename, len(document_id_map) + 1)
+            entries.append((doc_id, a10_weight_column(weight)))
+            freqs.append((doc_id, freq))
+        indexed_by_token[token] = entries
+        freq_by_token[token] = freqs
+    
+    documents_file = dict_posting_dir / "a11_Documentos.txt"
+    indexed_post_file = dict_posting_dir / "a11_Posting_Indexed.txt"
+    indexed_dict_file = dict_posting_dir / "a11_Diccionario_Indexed.txt"
+    compressed_post_file = dict_posting_dir / "a11_Posting_Compressed.bin"
+    write_a11_documents(documents_file,
+                        [(doc_id, str(input_path / filename)) for filename, doc_id in document_id_map.items()])
+    write_a11_files(indexed_post_file, indexed_dict_file, token_list, indexed_by_token)
+    write_compressed_postings(compressed_post_file, [token for token, _, _ in token_list], freq_by_token, codec)
+    
+    program_end = time.time()
+    write_time = program_end - tokenize_end
+    total_program_time = program_end - program_start
+    
+    generated_files = [dict_file, front_coded_file, post_file, weighted_dict_file, weighted_post_file,
+                       tfidf_index_file, norms_file, blockmax_file, documents_file, indexed_post_file,
+                       indexed_dict_file, compressed_post_file]
+    
+    log_lines.extend([
+        "",
+        "=== ARCHIVOS GENERADOS ===",
+        *[str(path) for path in generated_files],
+        "",
+        "=== ESTADÍSTICAS ===",
+        f"Documentos indexados: {len(doc_total_tokens)}/{len(files_to_process)}",
+        f"Total tokens únicos: {len(sorted_tokens)}",
+        f"Total registros en posting: {posting_records}",
+        f"Tiempo tokenizando: {tokenize_time:.6f} segundos",
+        f"Tiempo escribiendo archivos: {write_time:.6f} segundos",
+        f"Tiempo total de ejecución: {total_program_time:.6f} segundos"
+    ])
+    
+    with open(report_file, 'w', encoding='utf-8') as log:
+        log.write('\n'.join(log_lines))
+    
+    print(f"\nÍndice construido.")
+    print(f"Archivos generados:")
+    for path in generated_files:
+        print(f"  - {path}")
+    print(f"  - Reporte: {report_file}")
+    print(f"Documentos indexados: {len(doc_total_tokens)}")
+    print(f"Total tokens únicos: {len(sorted_tokens)}")
+    print(f"Tiempo total: {total_program_time:.6f} segundos")
+
+
+# Estimación del costo en memoria de un bloque SPIMI (bytes por token nuevo y por posting)
+SPIMI_TERM_OVERHEAD = 200
+SPIMI_POSTING_OVERHEAD = 100
+# Documentos tokenizados por proceso que pueden esperar a que se agreguen al bloque
+SPIMI_PENDING_PER_WORKER = 2
+
+
+def write_spimi_block(block_file, block):
+    """
+    Escribe un bloque parcial ordenado por token.
+
+    Formato de cada línea: token<TAB>archivo;frecuencia<TAB>archivo;frecuencia...
+    """
+    with open(block_file, 'w', encoding='utf-8') as f:
+        for token in sorted(block):
+            f.write(token + '\t' + '\t'.join(f"{doc};{freq}" for doc, freq in block[token]) + '\n')
+
+
+def _read_spimi_block(block_file):
+    with open(block_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            token, _, postings = line.rstrip('\n').partition('\t')
+            yield token, postings
+
+
+def merge_spimi_blocks(block_files):
+    """
+    Mezcla k bloques SPIMI con heapq.merge.
+
+    Solo se mantiene en memoria una línea por bloque. Como los documentos se
+    asignan a los bloques en orden, concatenar las listas de un token en el
+    orden de los bloques deja sus archivos ordenados.
+
+    Yields:
+        (token, [(archivo, frecuencia)]) en orden alfabético de token
+    """
+    streams = [_read_spimi_block(block_file) for block_file in block_files]
+    merged = heapq.merge(*streams, key=itemgetter(0))
+    
+    for token, group in groupby(merged, key=itemgetter(0)):
+        docs = []
+        for _, postings in group:
+            for entry in postings.split('\t'):
+                doc, _, freq = entry.rpartition(';')
+                docs.append((doc, int(freq)))
+        yield token, docs
+
+
+def spimi_index(input_dir, output_dir="results", memory_budget_mb=64, workers=None,
+                pattern='*.html', recursive=False, keep_blocks=False):
+    """
+    Construcción del diccionario y posting de la actividad 7 con SPIMI
+    (single-pass in-memory indexing).
+
+    Los documentos se tokenizan y se agregan a un bloque en memoria; cuando
+    el tamaño estimado del bloque llega a memory_budget_mb, el bloque se
+    escribe ordenado en results/spimi_blocks/ y se empieza otro. Al final se
+    mezclan los bloques (k-way merge) directamente en a7_Diccionario.txt y
+    a7_Posting.txt, así que la memoria depende del presupuesto y no del
+    tamaño del corpus. Con workers > 1, además del bloque solo quedan en
+    memoria los conteos de a lo sumo SPIMI_PENDING_PER_WORKER documentos
+    por proceso (ver max_pending en run_parallel).
+    """
+    print("=== CONSTRUCCIÓN DEL ÍNDICE CON SPIMI ===")
+    
+    input_path = Path(input_dir)
+    base_dir = Path(output_dir)
+    blocks_dir = base_dir / "spimi_blocks"
+    dict_posting_dir = base_dir / "dictionary_posting"
+    report_file = base_dir / "reports" / "activity_spimi.txt"
+    
+    if not input_path.exists():
+        print(f"Error: El directorio de entrada {input_dir} no existe")
+        return
+    
+    files_to_process = discover_html_files(input_path, pattern, recursive)
+    if not files_to_process:
+        print("No se encontraron archivos HTML")
+        return
+    
+    blocks_dir.mkdir(parents=True, exist_ok=True)
+    dict_posting_dir.mkdir(parents=True, exist_ok=True)
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    memory_budget = memory_budget_mb * 1024 * 1024
+    program_start = time.time()
+    log_lines = []
+    
+    log_lines.append("=== REPORTE DE CONSTRUCCIÓN DEL ÍNDICE CON SPIMI ===")
+    log_lines.append(f"Fecha: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    log_lines.append(f"Directorio de entrada: {input_dir}")
+    log_lines.append(f"Presupuesto de memoria: {memory_budget_mb} MB")
+    log_lines.append("")
+    log_lines.append("Bloques escritos:")
+    log_lines.append("-" * 70)
+    
+    block_files = []
+    block = {}  # {token: [(filename, frequency)]}
+    block_size = 0
+    documents_indexed = 0
+    
+    def flush_block():
+        block_file = blocks_dir / f"block_{len(block_files):04d}.txt"
+        flush_start = time.time()
+        write_spimi_block(block_file, block)
+        block_files.append(block_file)
+        log_lines.append(f"{block_file.name:<20} {len(block):>8} tokens  ~{block_size / (1024 * 1024):.1f} MB  "
+                         f"{time.time() - flush_start:.6f}s")
+        print(f"Bloque escrito: {block_file.name} ({len(block)} tokens)")
+    
+    # Step 1: Tokenize and fill blocks, flushing whenever the budget is reached
+    workers = WORKERS if workers is None else workers
+    results = run_parallel(tokenize_document, [input_path / filename for filename in files_to_process],
+                           workers=workers, max_pending=SPIMI_PENDING_PER_WORKER * workers)
+    
+    for filename, (word_counter, _) in zip(files_to_process, results):
+        if word_counter is None:
+            continue
+        
+        documents_indexed += 1
+        for token, count in word_counter.items():
+            postings = block.get(token)
+            if postings is None:
+                postings = block[token] = []
+                block_size += SPIMI_TERM_OVERHEAD + len(token)
+            postings.append((filename, count))
+            block_size += SPIMI_POSTING_OVERHEAD + len(filename)
+        
+        if block_size >= memory_budget:
+            flush_block()
+            block = {}
+            block_size = 0
+    
+    if block:
+        flush_block()
+        block = {}
+    
+    index_end = time.time()
+    
+    # Step 2: k-way merge of the blocks into the final dictionary and posting
+    dict_file = dict_posting_dir / "a7_Diccionario.txt"
+    post_file = dict_posting_dir / "a7_Posting.txt"
+    front_coded_file = dict_posting_dir / "a7_Diccionario_fc.bin"
+    num_tokens, posting_records = write_a7_stream(dict_file, post_file, merge_spimi_blocks(block_files),
+                                                  front_coded_file)
+    
+    if not keep_blocks:
+        for block_file in block_files:
+            block_file.unlink()
+        if not any(blocks_dir.iterdir()):
+            blocks_dir.rmdir()
+    
+    program_end = time.time()
+    merge_time = program_end - index_end
+    total_program_time = program_end - program_start
+    
+    log_lines.extend([
+        "",
+        "=== ARCHIVOS GENERADOS ===",
+        f"Diccionario: {dict_file}",
+        f"Diccionario con front coding: {front_coded_file}",
+        f"Posting: {post_file}",
+        "",
+        "=== ESTADÍSTICAS ===",
+        f"Documentos indexados: {documents_indexed}/{len(files_to_process)}",
+        f"Bloques: {len(block_files)}",
+        f"Total tokens únicos: {num_tokens}",
+        f"Total registros en posting: {posting_records}",
+        f"Tiempo construyendo bloques: {index_end - program_start:.6f} segundos",
+        f"Tiempo mezclando bloques: {merge_time:.6f} segundos",
+        f"Tiempo total de ejecución: {total_program_time:.6f} segundos"
+    ])
+    
+    with open(report_file, 'w', encoding='utf-8') as log:
+        log.write('\n'.join(log_lines))
+    
+    print(f"\nÍndice SPIMI construido.")
+    print(f"Diccionario generado: {dict_file}")
+    print(f"Diccionario con front coding: {front_coded_file}")
+    print(f"Archivo Posting generado: {post_file}")
+    print(f"Reporte guardado en: {report_file}")
+    print(f"Bloques: {len(block_files)}")
+    print(f"Total tokens únicos: {num_tokens}")
+    print(f"Tiempo total: {total_program_time:.6f} segundos")
+
+
 def cleanFolders(clean_data=True, clean_results=True):
     """
     Clean output directories to start fresh.
@@ -2023,13 +6073,25 @@ def cleanFolders(clean_data=True, clean_results=True):
                         file.unlink()
                     cleaned_folders.append(f"results/tokenized/")
                 
-                # Clean dictionary_posting files
+                # Clean dictionary_posting files (text exports, binary index,
+                # norms, block-max, compressed posting and cached dictionaries)
+                release_searchers()
                 dict_posting_dir = results_dir / "dictionary_posting"
                 if dict_posting_dir.exists():
-                    for file in dict_posting_dir.glob("*.txt"):
-                        file.unlink()
+                    for pattern in ["*.txt", "*.bin", "*.tmp"]:
+                        for file in dict_posting_dir.glob(pattern):
+                            file.unlink()
                     cleaned_folders.append(f"results/dictionary_posting/")
                 
+                # Clean SPIMI blocks kept with keep_blocks=True
+                blocks_dir = results_dir / "spimi_blocks"
+                if blocks_dir.exists():
+                    for file in blocks_dir.glob("block_*.txt"):
+                        file.unlink()
+                    if not any(blocks_dir.iterdir()):
+                        blocks_dir.rmdir()
+                    cleaned_folders.append(f"results/spimi_blocks/")
+                
                 # Clean report files
                 reports_dir = results_dir / "reports"
                 if reports_dir.exists():
@@ -2037,9 +6099,11 @@ def cleanFolders(clean_data=True, clean_results=True):
                         file.unlink()
                     cleaned_folders.append(f"results/reports/")
                 
-                # Clean root results files
-                for file in results_dir.glob("*.txt"):
-                    file.unlink()
+                # Clean root results files (text exports, binary indexes and the
+                # incremental manifest, so the next run rebuilds everything)
+                for pattern in ["*.txt", "*.bin", "*.tmp", "manifest.json"]:
+                    for file in results_dir.glob(pattern):
+                        file.unlink()
                 
                 # Clean other result files
                 for pattern in ["consolidated_*.txt", "dictionary*.txt", "posting*.txt", "diccionario*.txt", "actividad*.txt"]:
@@ -2073,28 +6137,71 @@ def main():
     parser = argparse.ArgumentParser(description='Tokenizador de archivos HTML')
     parser.add_argument('input_dir', help='Directorio de entrada con archivos HTML')
     parser.add_argument('output_dir', help='Directorio de salida para archivos tokenizados')
-    parser.add_argument('--mode', choices=['all', 'actividad5'], default='actividad5',
-                       help='Modo de ejecución: all (actividades 1-4) o actividad5 (solo tokenización)')
+    parser.add_argument('--mode', choices=['all', 'actividad5', 'build_index', 'spimi', 'codec_bench', 'hash_bench',
+                                           'dict_bench'],
+                       default='actividad5',
+                       help='Modo de ejecución: all (actividades 1-4), actividad5 (solo tokenización), '
+                            'build_index (diccionario, posting, pesos e índice de documentos en una pasada), '
+                            'spimi (diccionario y posting por bloques con memoria acotada), '
+                            'codec_bench (comparar los codecs del posting comprimido de la actividad 11), '
+                            'hash_bench (comparar las funciones hash sobre el vocabulario de las actividades 8 y 9) '
+                            'o dict_bench (comparar los diccionarios hash, mphf, ordenado, trie y front coding '
+                            'sobre el de la actividad 7)')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                       help='Número de procesos para las etapas por archivo (1 = secuencial)')
+    parser.add_argument('--corpus', action='store_true',
+                       help='Actividades 5 y 6: tokenizar todos los archivos de input_dir, no solo los 4 de ejemplo')
+    parser.add_argument('--glob', default='*.html', dest='pattern',
+                       help='Filtro de archivos para --corpus, build_index y spimi (por defecto: *.html)')
+    parser.add_argument('--memory-budget', type=int, default=None, dest='memory_budget',
+                       help='Memoria máxima en MB: por bloque en el modo spimi (por defecto: 64) y para '
+                            'el ordenamiento externo de la actividad 4 en el modo all')
+    parser.add_argument('--word-counts', action='store_true', dest='word_counts',
+                       help='Actividad 4: escribir "palabra frecuencia" en consolidated_words.txt')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Actividad 5: volver a tokenizar solo los documentos nuevos o modificados '
+                            '(según results/manifest.json)')
+    parser.add_argument('--recursive', action='store_true',
+                       help='Con --corpus, build_index o spimi, buscar también en subdirectorios')
+    parser.add_argument('--codec', choices=list(POSTING_CODECS), default='vbyte',
+                       help='build_index: codec del posting comprimido de la actividad 11 (por defecto: vbyte)')
     
     args = parser.parse_args()
+    if args.memory_budget is not None and args.memory_budget < 1:
+        parser.error("--memory-budget debe ser de al menos 1 MB")
     
     if args.mode == 'all':
         print("=== PROYECTO HTML - ACTIVIDADES 1, 2, 3 y 4 ===\n")
         
-        actividad1()
+        actividad1(workers=args.workers)
         print("\n" + "="*60 + "\n")
         
-        actividad2()
+        actividad2(workers=args.workers)
         print("\n" + "="*60 + "\n")
         
-        actividad3()
+        actividad3(workers=args.workers)
         print("\n" + "="*60 + "\n")
         
-        actividad4()
+        actividad4(memory_budget_mb=args.memory_budget, word_counts=args.word_counts)
+    elif args.mode == 'spimi':
+        spimi_index(args.input_dir, args.output_dir, memory_budget_mb=args.memory_budget or 64,
+                    workers=args.workers, pattern=args.pattern, recursive=args.recursive)
+    elif args.mode == 'build_index':
+        build_index(args.input_dir, args.output_dir, workers=args.workers,
+                    pattern=args.pattern, recursive=args.recursive, codec=args.codec)
+    elif args.mode == 'codec_bench':
+        benchmark_posting_codecs(args.output_dir)
+    elif args.mode == 'hash_bench':
+        benchmark_hash_functions(args.output_dir)
+    elif args.mode == 'dict_bench':
+        benchmark_dictionaries(args.output_dir)
     else:
-        actividad5(args.input_dir, args.output_dir)
+        actividad5(args.input_dir, args.output_dir, workers=args.workers,
+                   corpus=args.corpus, pattern=args.pattern, recursive=args.recursive,
+                   incremental=args.incremental)
         print("\n" + "="*60 + "\n")
-        actividad6(args.input_dir, args.output_dir)
+        actividad6(args.input_dir, args.output_dir,
+                   corpus=args.corpus, pattern=args.pattern, recursive=args.recursive)
 
 if __name__ == "__main__":
     if len(sys.argv) == 1:
@@ -0,0 +1,167 @@
+"""
+Pruebas de ida y vuelta de los codecs, los diccionarios y el posting
+comprimido. Ejecutar con: python -m pytest -q
+"""
+
+import random
+import string
+from pathlib import Path
+
+import pytest
+
+import main
+
+
+def random_words(rng, count):
+    """count tokens distintos con algunos prefijos compartidos y acentos."""
+    alphabet = string.ascii_lowercase + 'áéíóúñ'
+    words = set()
+    while len(words) < count:
+        stem = ''.join(rng.choices(alphabet[:6], k=rng.randint(0, 3)))
+        words.add(stem + ''.join(rng.choices(alphabet, k=rng.randint(1, 8))))
+    return sorted(words)
+
+
+def random_lists(rng):
+    """Listas de enteros no negativos de tamaños y rangos variados, incluida la vacía."""
+    lists = [[], [0], [2 ** 28 - 1]]
+    for bits in (1, 3, 7, 8, 14, 20, 28):
+        for _ in range(5):
+            lists.append([rng.randrange(2 ** bits) for _ in range(rng.randint(1, 60))])
+    return lists
+
+
+@pytest.mark.parametrize('codec', sorted(main.POSTING_CODECS))
+def test_codec_round_trip(codec):
+    encode, decode = main.POSTING_CODECS[codec]
+    rng = random.Random(codec)
+    for numbers in random_lists(rng):
+        assert decode(encode(numbers), len(numbers)) == numbers
+
+
+def test_vbyte_decode_returns_offset():
+    data = main.vbyte_encode([300, 0, 127, 128], bytearray(b'\xff'))
+    assert main.vbyte_decode(data, 1, 4) == ([300, 0, 127, 128], len(data))
+
+
+def test_simple9_rejects_large_values():
+    with pytest.raises(ValueError):
+        main.simple9_encode([2 ** 28])
+
+
+def test_delta_round_trip():
+    rng = random.Random(1)
+    positions = sorted(rng.sample(range(10 ** 6), 500))
+    assert main.delta_decode(main.delta_encode(positions)) == positions
+
+
+@pytest.fixture(scope='module')
+def vocabulary():
+    rng = random.Random(42)
+    words = random_words(rng, 2000)
+    expected = {word: (rng.randrange(10 ** 6), rng.randrange(2 ** 40)) for word in words}
+    missing = [word + 'zz' for word in words[::50]] + ['', 'a' * 40, 'ñu']
+    return expected, [word for word in missing if word not in expected]
+
+
+@pytest.mark.parametrize('backend', sorted(main.DICTIONARY_BACKENDS))
+def test_dictionary_matches_dict(backend, vocabulary, tmp_path):
+    expected, missing = vocabulary
+    cls = main.DICTIONARY_BACKENDS[backend]
+    built = cls.build(sorted(expected.items()), 2)
+    dictionary_file = tmp_path / f"dict_{backend}.bin"
+    built.save(dictionary_file)
+    loaded = cls.load(dictionary_file)
+    for dictionary in (built, loaded):
+        assert len(dictionary) == len(expected)
+        for word, values in expected.items():
+            assert dictionary.get(word) == values
+        for word in missing:
+            assert dictionary.get(word) is None
+            assert word not in dictionary
+        for prefix in ('', 'a', 'ab', 'ñ', 'zzz'):
+            assert dictionary.prefix(prefix) == sorted(
+                (word, values) for word, values in expected.items() if word.startswith(prefix))
+
+
+def test_perfect_hash_rejects_non_members(vocabulary):
+    expected, missing = vocabulary
+    table = main.PerfectHashDictionary.build(expected.items(), 2)
+    # every non-member still hashes to some slot; the stored key must reject it
+    assert all(table.get(word, 'x') == 'x' for word in missing)
+    assert [table.get(word) for word in expected] == list(expected.values())
+
+
+@pytest.mark.parametrize('hash_name', sorted(main.HASH_FUNCTIONS))
+def test_hash_dictionary_functions(hash_name, vocabulary, tmp_path):
+    expected, missing = vocabulary
+    table = main.HashDictionary.build(expected.items(), 2, hash_name)
+    table.save(tmp_path / "hash.bin")
+    loaded = main.HashDictionary.load(tmp_path / "hash.bin")
+    assert loaded.hash_name == hash_name
+    assert all(loaded.get(word) == values for word, values in expected.items())
+    assert all(loaded.get(word) is None for word in missing)
+
+
+@pytest.mark.parametrize('codec', sorted(main.POSTING_CODECS))
+def test_compressed_postings_round_trip(codec, tmp_path):
+    rng = random.Random(7)
+    tokens = random_words(rng, 300)
+    posting_by_token = {token: [(doc_id, rng.randint(1, 50))
+                                for doc_id in rng.sample(range(1, 400), rng.randint(1, 30))]
+                        for token in tokens[::2]}
+    dict_file = tmp_path / "a7_Diccionario.txt"
+    dict_file.write_text(''.join(f"{token};1;0\n" for token in tokens), encoding='utf-8')
+    compressed_file = tmp_path / "a11_Posting_Compressed.bin"
+    main.write_compressed_postings(compressed_file, tokens, posting_by_token, codec)
+
+    postings = main.CompressedPostings(compressed_file)
+    try:
+        assert postings.codec == codec
+        assert postings.num_terms == len(tokens)
+        for token in tokens:
+            assert postings.postings(token) == sorted(posting_by_token.get(token, ()))
+        assert postings.postings('no-existe') == []
+    finally:
+        postings.close()
+
+
+DOCUMENTS = {
+    'a.html': "<p>apple banana apple cherry</p>",
+    'b.html': "<html><body>banana date date apple</body></html>",
+    'c.html': "<div>cherry date apple elderberry</div>",
+}
+
+
+def test_actividad11_matches_build_index(tmp_path):
+    """La cadena de actividades 5, 7, 10 y 11 y build_index deben dar los mismos archivos."""
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for name, text in DOCUMENTS.items():
+        (input_dir / name).write_text(text, encoding='utf-8')
+
+    chained = tmp_path / "chained"
+    main.actividad5(str(input_dir), str(chained), workers=1, corpus=True)
+    main.actividad7(str(chained))
+    main.actividad10(str(chained))
+    main.actividad11(str(chained))
+    single = tmp_path / "single"
+    main.build_index(str(input_dir), str(single), workers=1)
+
+    for name in ("a7_Diccionario.txt", "a7_Posting.txt", "a10_Posting_Weighted.txt", "a11_Diccionario_Indexed.txt",
+                 "a11_Posting_Indexed.txt", "a11_Posting_Compressed.bin"):
+        assert (chained / "dictionary_posting" / name).read_bytes() == \
+            (single / "dictionary_posting" / name).read_bytes(), name
+    # build_index knows input_dir and writes full paths; actividad11 only the name
+    documents = [[(line[:10].strip(), Path(line[10:].strip()).name)
+                  for line in (base / "dictionary_posting" / "a11_Documentos.txt").open(encoding='utf-8')][1:]
+                 for base in (chained, single)]
+    assert documents[0] == documents[1] == [('1', 'a.html'), ('2', 'b.html'), ('3', 'c.html')]
+
+    postings = main.CompressedPostings(chained / "dictionary_posting" / "a11_Posting_Compressed.bin")
+    try:
+        assert postings.postings('apple') == [(1, 2), (2, 1), (3, 1)]
+        assert postings.postings('date') == [(2, 2), (3, 1)]
+        assert postings.postings('elderberry') == [(3, 1)]
+    finally:
+        postings.close()